@@ -1,6 +1,8 @@
 #include "frontend/frontend.hpp"
 #include "util/file.hpp"
 
+#include <kj/vector.h>
+
 namespace frontend {
 
 template <typename T>
@@ -56,6 +58,17 @@ class FileInst : public File {
   T promise;
 };
 
+// File created by a batched execution, its id is known only after the batch
+// is sent to the server.
+class BatchedFile : public File {
+ public:
+  BatchedFile(kj::Promise<capnproto::File::Reader>&& p, Frontend* frontend,
+              bool is_executable)
+      : File(frontend, is_executable) {
+    SetPromise(std::move(p));
+  }
+};
+
 template <typename T>
 std::unique_ptr<File> File::New(kj::Promise<T>&& p, Frontend* frontend,
                                 bool is_executable) {
@@ -71,20 +84,28 @@ std::unique_ptr<Fifo> Fifo::New(kj::Promise<T>&& p) {
 namespace {
 class FileProvider : public capnproto::FileSender::Server {
  public:
-  explicit FileProvider(std::unordered_map<util::SHA256_t, util::FileWrapper,
-                                           util::SHA256_t::Hasher>
-                            known_files)
-      : known_files_(std::move(known_files)) {}
+  FileProvider(std::unordered_map<util::SHA256_t, util::FileWrapper,
+                                  util::SHA256_t::Hasher>
+                   known_files,
+               std::shared_ptr<size_t> missing_files)
+      : known_files_(std::move(known_files)),
+        missing_files_(std::move(missing_files)) {}
 
   kj::Promise<void> requestFile(RequestFileContext context) override {
-    util::FileWrapper* file = &known_files_.at(context.getParams().getHash());
+    auto file = known_files_.find(context.getParams().getHash());
+    if (file == known_files_.end()) {
+      // a stored file the server no longer has
+      (*missing_files_)++;
+      KJ_FAIL_REQUIRE("The file is not available");
+    }
     return util::File::HandleRequestFile(
-        file, context.getParams().getReceiver(), 0xffffffffffffffff);
+        &file->second, context.getParams().getReceiver(), 0xffffffffffffffff);
   }
 
  private:
   std::unordered_map<util::SHA256_t, util::FileWrapper, util::SHA256_t::Hasher>
       known_files_;
+  std::shared_ptr<size_t> missing_files_;
 };
 
 }  // namespace
@@ -114,25 +135,104 @@ void File::getContentsAsString(
       "Get file");
 }
 
+void File::getContentsAsChunks(
+    const std::function<void(const std::string&)>& callback, uint64_t limit) {
+  auto pf = kj::newPromiseAndFulfiller<void>();
+  frontend_.builder_.AddPromise(std::move(pf.promise));
+  frontend_.finish_builder_.AddPromise(
+      forked_promise.addBranch().then(
+          [this, callback, limit,
+           fulfiller = std::move(pf.fulfiller)](auto file) mutable {
+            auto req = frontend_.frontend_context_.getFileContentsRequest();
+            req.setFile(file);
+            req.setReceiver(kj::heap<util::File::Receiver>(
+                [callback](util::File::Chunk data) {
+                  if (data.size() == 0) return;
+                  callback(std::string(data.asChars().begin(), data.size()));
+                }));
+            req.setAmount(limit);
+            kj::Promise<void> ret = req.send().ignoreResult().then(
+                [callback]() { callback(""); });
+            fulfiller->fulfill();
+            return std::move(ret);
+          }),
+      "Get file");
+}
+
+void File::fetchContentsAsChunks(
+    const std::function<void(const std::string&)>& callback, uint64_t limit) {
+  frontend_.late_fetches_.push_back(
+      forked_promise.addBranch()
+          .then([this, callback, limit](auto file) {
+            auto req = frontend_.frontend_context_.getFileContentsRequest();
+            req.setFile(file);
+            req.setReceiver(kj::heap<util::File::Receiver>(
+                [callback](util::File::Chunk data) {
+                  if (data.size() == 0) return;
+                  callback(std::string(data.asChars().begin(), data.size()));
+                }));
+            req.setAmount(limit);
+            return req.send().ignoreResult();
+          })
+          .then([callback]() { callback(""); },
+                [callback](kj::Exception exc) {
+                  KJ_LOG(WARNING, "Failed to fetch file",
+                         exc.getDescription());
+                  // leave a trace in what was received so far
+                  callback(std::string("\n[The file could not be fetched: ") +
+                           exc.getDescription().cStr() + "]\n");
+                  callback("");
+                })
+          .eagerlyEvaluate(nullptr));
+}
+
 void File::getContentsToFile(const std::string& path, bool overwrite,
-                             bool exist_ok) {
+                             bool exist_ok, const std::string& current_hash,
+                             const std::string& store_dir, bool hardlink) {
   auto pf = kj::newPromiseAndFulfiller<void>();
   frontend_.builder_.AddPromise(std::move(pf.promise));
   frontend_.finish_builder_.AddPromise(
       forked_promise.addBranch().then([this, path, exist_ok, overwrite,
+                                       current_hash, store_dir, hardlink,
                                        fulfiller = std::move(pf.fulfiller)](
                                           auto file) mutable {
-        auto req = frontend_.frontend_context_.getFileContentsRequest();
-        req.setFile(file);
-        req.setReceiver(kj::heap<util::File::Receiver>(
-            util::File::LazyChunkReceiver([path, overwrite, exist_ok]() {
-              return util::File::Write(path, overwrite, exist_ok);
-            })));
-        kj::Promise<void> ret = req.send().ignoreResult().then([this, path]() {
-          if (is_executable_) {
-            util::File::MakeExecutable(path);
-          }
-        });
+        auto fetch = [this, path, overwrite, exist_ok, file]() {
+          auto req = frontend_.frontend_context_.getFileContentsRequest();
+          req.setFile(file);
+          req.setReceiver(kj::heap<util::File::Receiver>(
+              util::File::LazyChunkReceiver([path, overwrite, exist_ok]() {
+                return util::File::Write(path, overwrite, exist_ok);
+              })));
+          return req.send().ignoreResult().then([this, path]() {
+            if (is_executable_) {
+              util::File::MakeExecutable(path);
+            }
+          });
+        };
+        kj::Promise<void> ret = nullptr;
+        if (!overwrite || (current_hash.empty() && store_dir.empty())) {
+          ret = fetch();
+        } else {
+          auto req = frontend_.frontend_context_.getFileHashRequest();
+          req.setFile(file);
+          ret = req.send().then([this, path, current_hash, store_dir, hardlink,
+                                 fetch](auto res) mutable -> kj::Promise<void> {
+            util::SHA256_t hash = res.getHash();
+            if (hash.Hex() == current_hash) {
+              if (is_executable_) util::File::MakeExecutable(path);
+              return kj::READY_NOW;
+            }
+            // executables are made read-only, that would change the file in
+            // the store too
+            if (!store_dir.empty() &&
+                util::File::Link(util::File::PathForHash(hash, store_dir), path,
+                                 hardlink && !is_executable_)) {
+              if (is_executable_) util::File::MakeExecutable(path);
+              return kj::READY_NOW;
+            }
+            return fetch();
+          });
+        }
         fulfiller->fulfill();
         return ret;
       }),
@@ -140,9 +240,12 @@ void File::getContentsToFile(const std::string& path, bool overwrite,
 }
 
 Frontend::Frontend(const std::string& server, int port)
-    : client_(server, port),
+    : Frontend(std::make_shared<capnp::EzRpcClient>(server, port)) {}
+
+Frontend::Frontend(std::shared_ptr<capnp::EzRpcClient> client)
+    : client_(std::move(client)),
       frontend_context_(
-          client_.getMain<capnproto::MainServer>()
+          client_->getMain<capnproto::MainServer>()
               .registerFrontendRequest()
               .send()
               .then([](auto res) { return res.getContext(); },
@@ -151,20 +254,30 @@ Frontend::Frontend(const std::string& server, int port)
                       kj::throwRecoverableException(kj::cp(exc));
                       return std::move(exc);
                     })
-              .wait(client_.getWaitScope())),
+              .wait(client_->getWaitScope())),
       finish_builder_(false),
       stop_request_(kj::READY_NOW) {}
 
+std::unique_ptr<Frontend> Frontend::nextEvaluation() {
+  return std::unique_ptr<Frontend>(new Frontend(client_));
+}
+
 File* Frontend::provideFile(const std::string& path,
                             const std::string& description,
-                            bool is_executable) {
+                            bool is_executable,
+                            const std::string& hash_hex) {
   auto req = frontend_context_.provideFileRequest();
-  util::SHA256_t hash = util::File::Hash(path);
+  // Small files are always hashed since their content is inlined in the hash.
+  util::SHA256_t hash =
+      hash_hex.empty() || util::File::Size(path) < util::kInlineChunkThresh
+          ? util::File::Hash(path)
+          : util::SHA256_t(hash_hex);
   known_files_.emplace(hash, util::FileWrapper::FromPath(path));
   hash.ToCapnp(req.initHash());
   req.setDescription(description);
   req.setIsExecutable(is_executable);
   files_.push_back(File::New(req.send(), this, is_executable));
+  files_.back()->hash_ = hash.Hex();
   return files_.back().get();
 }
 
@@ -182,6 +295,20 @@ File* Frontend::provideFileContent(const std::string& content,
   req.setDescription(description);
   req.setIsExecutable(is_executable);
   files_.push_back(File::New(req.send(), this, is_executable));
+  files_.back()->hash_ = hash.Hex();
+  return files_.back().get();
+}
+
+File* Frontend::provideStoredFile(const std::string& hash_hex,
+                                  const std::string& description,
+                                  bool is_executable) {
+  auto req = frontend_context_.provideFileRequest();
+  util::SHA256_t hash(hash_hex);
+  hash.ToCapnp(req.initHash());
+  req.setDescription(description);
+  req.setIsExecutable(is_executable);
+  files_.push_back(File::New(req.send(), this, is_executable));
+  files_.back()->hash_ = hash.Hex();
   return files_.back().get();
 }
 
@@ -203,10 +330,164 @@ ExecutionGroup* Frontend::addExecutionGroup(const std::string& description) {
   return groups_.back().get();
 }
 
+Execution* Frontend::addBatchedExecution(const std::string& description) {
+  auto pf = kj::newPromiseAndFulfiller<capnproto::Execution::Client>();
+  batch_.push_back(std::make_unique<BatchedExecution>());
+  batch_.back()->description = description;
+  batch_.back()->fulfiller = std::move(pf.fulfiller);
+  executions_.push_back(std::make_unique<Execution>(
+      description, std::move(pf.promise), batch_.back().get(), &files_,
+      &builder_, &finish_builder_, this));
+  batch_.back()->execution = executions_.back().get();
+  return executions_.back().get();
+}
+
+void Frontend::flushExecutions() {
+  if (batch_.empty()) return;
+  auto batch =
+      kj::heap<std::vector<std::unique_ptr<BatchedExecution>>>(std::move(batch_));
+  batch_.clear();
+  // (index of the execution, index of the output) of the files created in
+  // this batch.
+  auto batch_files = kj::heap<
+      std::unordered_map<const File*, std::pair<uint32_t, uint32_t>>>();
+  for (uint32_t i = 0; i < batch->size(); i++) {
+    auto& execution = (*batch)[i];
+    // From now on the execution behaves as a normal one.
+    execution->execution->batch_ = nullptr;
+    for (uint32_t j = 0; j < execution->outputs.size(); j++) {
+      (*batch_files)[execution->outputs[j].file] = {i, j};
+    }
+  }
+  // The ids of the other files are known only when they are ready.
+  auto file_ids = kj::heap<std::unordered_map<const File*, uint64_t>>();
+  kj::Vector<kj::Promise<void>> files_ready;
+  auto wait_file = [&batch_files, &file_ids, &files_ready](File* file) {
+    if (file == nullptr || batch_files->count(file) || file_ids->count(file)) {
+      return;
+    }
+    (*file_ids)[file] = 0;
+    auto ids = file_ids.get();
+    files_ready.add(file->forked_promise.addBranch().then(
+        [ids, file](capnproto::File::Reader f) { (*ids)[file] = f.getId(); }));
+  };
+  for (auto& execution : *batch) {
+    wait_file(execution->executable);
+    wait_file(execution->stdin_file);
+    for (auto& input : execution->inputs) {
+      wait_file(input.second);
+    }
+  }
+  builder_.AddPromise(
+      kj::joinPromises(files_ready.releaseAsArray())
+          .then([this, batch = std::move(batch),
+                 batch_files = std::move(batch_files),
+                 file_ids = std::move(file_ids)]() mutable {
+            auto set_ref = [&batch_files, &file_ids](
+                               const File* file,
+                               capnproto::FileRef::Builder ref) {
+              auto it = batch_files->find(file);
+              if (it != batch_files->end()) {
+                ref.initOutput().setExecution(it->second.first);
+                ref.getOutput().setIndex(it->second.second);
+              } else {
+                ref.initFile().setId(file_ids->at(file));
+              }
+            };
+            auto req = frontend_context_.addExecutionsRequest();
+            auto descriptions = req.initExecutions(batch->size());
+            for (size_t i = 0; i < batch->size(); i++) {
+              auto& execution = *(*batch)[i];
+              auto description = descriptions[i];
+              description.setDescription(execution.description);
+              if (execution.executable) {
+                auto local_file =
+                    description.getExecutable().initLocalFile();
+                local_file.setName(execution.executable_name);
+                set_ref(execution.executable, local_file.initFile());
+              } else {
+                description.getExecutable().setSystem(
+                    execution.executable_path);
+              }
+              description.initArgs(execution.args.size());
+              for (size_t j = 0; j < execution.args.size(); j++) {
+                description.getArgs().set(j, execution.args[j]);
+              }
+              if (execution.stdin_file) {
+                set_ref(execution.stdin_file, description.initStdin());
+              }
+              auto inputs = description.initInputs(execution.inputs.size());
+              for (size_t j = 0; j < execution.inputs.size(); j++) {
+                inputs[j].setName(execution.inputs[j].first);
+                set_ref(execution.inputs[j].second, inputs[j].initFile());
+              }
+              description.setDisableCache(execution.disable_cache);
+              description.setExclusive(execution.exclusive);
+              if (execution.has_limits) {
+                auto limits = description.initLimits();
+                limits.setCpuTime(execution.limits.cpu_time);
+                limits.setWallTime(execution.limits.wall_time);
+                limits.setMemory(execution.limits.memory);
+                limits.setNproc(execution.limits.nproc);
+                limits.setNofiles(execution.limits.nofiles);
+                limits.setFsize(execution.limits.fsize);
+                limits.setMemlock(execution.limits.memlock);
+                limits.setStack(execution.limits.stack);
+              }
+              description.setExtraTime(execution.extra_time);
+              description.setPriority(execution.priority);
+              auto outputs = description.initOutputs(execution.outputs.size());
+              for (size_t j = 0; j < execution.outputs.size(); j++) {
+                auto& output = execution.outputs[j];
+                switch (output.kind) {
+                  case capnproto::ExecutionDescription::Output::STDOUT:
+                    outputs[j].setStdout();
+                    break;
+                  case capnproto::ExecutionDescription::Output::STDERR:
+                    outputs[j].setStderr();
+                    break;
+                  case capnproto::ExecutionDescription::Output::FILE:
+                    outputs[j].setFile(output.name);
+                    break;
+                }
+                outputs[j].setIsExecutable(output.is_executable);
+              }
+            }
+            return req.send().then(
+                [this, batch = std::move(batch)](auto response) mutable {
+                  batch_responses_.push_back(kj::heap(std::move(response)));
+                  auto declared = batch_responses_.back()->getExecutions();
+                  for (size_t i = 0; i < batch->size(); i++) {
+                    auto& execution = *(*batch)[i];
+                    execution.fulfiller->fulfill(declared[i].getExecution());
+                    auto files = declared[i].getFiles();
+                    for (size_t j = 0; j < execution.outputs.size(); j++) {
+                      execution.outputs[j].fulfiller->fulfill(files[j]);
+                    }
+                  }
+                });
+          }),
+      "Add executions");
+}
+
+std::pair<size_t, size_t> Frontend::countCached() {
+  flushExecutions();
+  // The server has to know the whole DAG, the requests added from now on are
+  // waited by evaluate.
+  auto setup = std::move(builder_).Finalize();
+  builder_ = util::UnionPromiseBuilder();
+  setup.wait(client_->getWaitScope());
+  auto res = frontend_context_.countCachedRequest().send().wait(
+      client_->getWaitScope());
+  return {res.getCached(), res.getTotal()};
+}
+
 void Frontend::evaluate() {
+  flushExecutions();
   finish_builder_.AddPromise(std::move(builder_).Finalize().then([this]() {
     auto req = frontend_context_.startEvaluationRequest();
-    req.setSender(kj::heap<FileProvider>(std::move(known_files_)));
+    req.setSender(
+        kj::heap<FileProvider>(std::move(known_files_), missing_files_));
     return req.send().ignoreResult();
   }),
                              "Evaluate");
@@ -215,8 +496,16 @@ void Frontend::evaluate() {
   // TODO: make this no longer necessary. Currently here to avoid death on
   // ctrl-C.
   try {
-    std::move(finish_builder_).Finalize().wait(client_.getWaitScope());
-    stop_request_.wait(client_.getWaitScope());
+    std::move(finish_builder_).Finalize().wait(client_->getWaitScope());
+    // the callbacks of the fetches may ask for more files
+    while (!late_fetches_.empty()) {
+      auto fetches = kj::heapArrayBuilder<kj::Promise<void>>(
+          late_fetches_.size());
+      for (auto& fetch : late_fetches_) fetches.add(std::move(fetch));
+      late_fetches_.clear();
+      kj::joinPromises(fetches.finish()).wait(client_->getWaitScope());
+    }
+    stop_request_.wait(client_->getWaitScope());
   } catch (...) {
   };
 }
@@ -243,12 +532,22 @@ Fifo* ExecutionGroup::createFifo() {
 }
 
 void Execution::setExecutablePath(const std::string& path) {
+  if (batch_) {
+    batch_->executable_path = path;
+    batch_->executable = nullptr;
+    return;
+  }
   auto req = execution_.setExecutablePathRequest();
   req.setPath(path);
   my_builder_.AddPromise(req.send().ignoreResult());
 }
 
 void Execution::setExecutable(const std::string& name, File* file) {
+  if (batch_) {
+    batch_->executable_name = name;
+    batch_->executable = file;
+    return;
+  }
   my_builder_.AddPromise(
       file->forked_promise.addBranch().then([this, name](auto file) {
         auto req = execution_.setExecutableRequest();
@@ -259,6 +558,10 @@ void Execution::setExecutable(const std::string& name, File* file) {
 }
 
 void Execution::setStdin(File* file) {
+  if (batch_) {
+    batch_->stdin_file = file;
+    return;
+  }
   my_builder_.AddPromise(
       file->forked_promise.addBranch().then([this](auto file) {
         auto req = execution_.setStdinRequest();
@@ -268,6 +571,10 @@ void Execution::setStdin(File* file) {
 }
 
 void Execution::addInput(const std::string& name, File* file) {
+  if (batch_) {
+    batch_->inputs.emplace_back(name, file);
+    return;
+  }
   my_builder_.AddPromise(
       file->forked_promise.addBranch().then([this, name](auto file) {
         auto req = execution_.addInputRequest();
@@ -278,6 +585,7 @@ void Execution::addInput(const std::string& name, File* file) {
 }
 
 void Execution::addFifo(const std::string& name, Fifo* fifo) {
+  KJ_REQUIRE(batch_ == nullptr, "Batched executions cannot use FIFOs");
   my_builder_.AddPromise(
       fifo->forked_promise.addBranch().then([this, name](auto fifo) {
         auto req = execution_.addFifoRequest();
@@ -287,6 +595,7 @@ void Execution::addFifo(const std::string& name, Fifo* fifo) {
       }));
 }
 void Execution::setStdinFifo(Fifo* fifo) {
+  KJ_REQUIRE(batch_ == nullptr, "Batched executions cannot use FIFOs");
   my_builder_.AddPromise(
       fifo->forked_promise.addBranch().then([this](auto fifo) {
         auto req = execution_.setStdinFifoRequest();
@@ -295,6 +604,7 @@ void Execution::setStdinFifo(Fifo* fifo) {
       }));
 }
 void Execution::setStdoutFifo(Fifo* fifo) {
+  KJ_REQUIRE(batch_ == nullptr, "Batched executions cannot use FIFOs");
   my_builder_.AddPromise(
       fifo->forked_promise.addBranch().then([this](auto fifo) {
         auto req = execution_.setStdoutFifoRequest();
@@ -303,6 +613,7 @@ void Execution::setStdoutFifo(Fifo* fifo) {
       }));
 }
 void Execution::setStderrFifo(Fifo* fifo) {
+  KJ_REQUIRE(batch_ == nullptr, "Batched executions cannot use FIFOs");
   my_builder_.AddPromise(
       fifo->forked_promise.addBranch().then([this](auto fifo) {
         auto req = execution_.setStderrFifoRequest();
@@ -312,6 +623,10 @@ void Execution::setStderrFifo(Fifo* fifo) {
 }
 
 void Execution::setArgs(const std::vector<std::string>& args) {
+  if (batch_) {
+    batch_->args = args;
+    return;
+  }
   auto req = execution_.setArgsRequest();
   req.initArgs(args.size());
   for (size_t i = 0; i < args.size(); i++) {
@@ -321,16 +636,29 @@ void Execution::setArgs(const std::vector<std::string>& args) {
 }
 
 void Execution::disableCache() {
+  if (batch_) {
+    batch_->disable_cache = true;
+    return;
+  }
   my_builder_.AddPromise(
       execution_.disableCacheRequest().send().ignoreResult());
 }
 
 void Execution::makeExclusive() {
+  if (batch_) {
+    batch_->exclusive = true;
+    return;
+  }
   my_builder_.AddPromise(
       execution_.makeExclusiveRequest().send().ignoreResult());
 }
 
 void Execution::setLimits(const Resources& limits) {
+  if (batch_) {
+    batch_->has_limits = true;
+    batch_->limits = limits;
+    return;
+  }
   auto req = execution_.setLimitsRequest();
   req.getLimits().setCpuTime(limits.cpu_time);
   req.getLimits().setWallTime(limits.wall_time);
@@ -344,30 +672,92 @@ void Execution::setLimits(const Resources& limits) {
 }
 
 void Execution::setExtraTime(float extra_time) {
+  if (batch_) {
+    batch_->extra_time = extra_time;
+    return;
+  }
   auto req = execution_.setExtraTimeRequest();
   req.setExtraTime(extra_time);
   my_builder_.AddPromise(req.send().ignoreResult());
 }
 
+void Execution::setPriority(uint32_t priority) {
+  if (batch_) {
+    batch_->priority = priority;
+    return;
+  }
+  auto req = execution_.setPriorityRequest();
+  req.setPriority(priority);
+  // The request has to reach the server before the evaluation starts.
+  builder_.AddPromise(req.send().ignoreResult());
+}
+
+void Execution::cancel() {
+  KJ_REQUIRE(batch_ == nullptr, "The evaluation has not started yet");
+  execution_.cancelRequest().send().ignoreResult().detach(
+      [](kj::Exception exc) {
+        KJ_LOG(WARNING, "Failed to cancel the execution",
+               exc.getDescription());
+      });
+}
+
 File* Execution::getStdout(bool is_executable) {
+  if (batch_) {
+    return addBatchedOutput(capnproto::ExecutionDescription::Output::STDOUT,
+                            "", is_executable);
+  }
   auto req = execution_.getStdoutRequest();
   req.setIsExecutable(is_executable);
   files_.push_back(File::New(req.send(), &frontend_, is_executable));
-  return files_.back().get();
+  stdout_ = files_.back().get();
+  return stdout_;
 }
 
 File* Execution::getStderr(bool is_executable) {
+  if (batch_) {
+    return addBatchedOutput(capnproto::ExecutionDescription::Output::STDERR,
+                            "", is_executable);
+  }
   auto req = execution_.getStderrRequest();
   req.setIsExecutable(is_executable);
   files_.push_back(File::New(req.send(), &frontend_, is_executable));
-  return files_.back().get();
+  stderr_ = files_.back().get();
+  return stderr_;
 }
 File* Execution::getOutput(const std::string& name, bool is_executable) {
+  if (batch_) {
+    return addBatchedOutput(capnproto::ExecutionDescription::Output::FILE,
+                            name, is_executable);
+  }
   auto req = execution_.getOutputRequest();
   req.setIsExecutable(is_executable);
   req.setName(name);
   files_.push_back(File::New(req.send(), &frontend_, is_executable));
-  return files_.back().get();
+  outputs_[name] = files_.back().get();
+  return outputs_[name];
+}
+
+File* Execution::addBatchedOutput(
+    capnproto::ExecutionDescription::Output::Which kind,
+    const std::string& name, bool is_executable) {
+  auto pf = kj::newPromiseAndFulfiller<capnproto::File::Reader>();
+  files_.push_back(std::make_unique<BatchedFile>(std::move(pf.promise),
+                                                 &frontend_, is_executable));
+  File* file = files_.back().get();
+  batch_->outputs.push_back(
+      {kind, name, is_executable, file, std::move(pf.fulfiller)});
+  switch (kind) {
+    case capnproto::ExecutionDescription::Output::STDOUT:
+      stdout_ = file;
+      break;
+    case capnproto::ExecutionDescription::Output::STDERR:
+      stderr_ = file;
+      break;
+    case capnproto::ExecutionDescription::Output::FILE:
+      outputs_[name] = file;
+      break;
+  }
+  return file;
 }
 
 void Execution::notifyStart(const std::function<void()>& callback) {
@@ -380,6 +770,17 @@ void Execution::notifyStart(const std::function<void()>& callback) {
       "Notify start " + description_);
 }
 
+void Execution::recordHashes(capnproto::ProcessResult::Reader result) {
+  if (stdout_) stdout_->hash_ = util::SHA256_t(result.getStdout()).Hex();
+  if (stderr_) stderr_->hash_ = util::SHA256_t(result.getStderr()).Hex();
+  for (auto output : result.getOutputFiles()) {
+    auto file = outputs_.find(output.getName().cStr());
+    if (file != outputs_.end()) {
+      file->second->hash_ = util::SHA256_t(output.getHash()).Hex();
+    }
+  }
+}
+
 void Execution::getResult(const std::function<void(Result)>& callback,
                           const std::function<void()>& errored) {
   auto promise = kj::newPromiseAndFulfiller<void>();
@@ -388,15 +789,21 @@ void Execution::getResult(const std::function<void(Result)>& callback,
   finish_builder_.AddPromise(
       std::move(my_builder_)
           .Finalize()
+          .then([this]() { return declared_.addBranch(); })
           .then(
               [this, callback, errored,
-               fulfiller = std::move(promise.fulfiller)]() mutable {
+               fulfiller = std::move(promise.fulfiller)](
+                  capnproto::Execution::Client execution) mutable {
                 fulfiller->fulfill();
-                return execution_.getResultRequest()
+                return execution.getResultRequest()
                     .send()
                     .then(
-                        [callback](auto res) {
+                        [this, callback](auto res) {
                           auto r = res.getResult();
+                          // the outputs of a failed execution are not used
+                          if (r.getStatus().isSuccess()) {
+                            recordHashes(r);
+                          }
                           Result result;
                           result.status = r.getStatus().which();
                           if (r.getStatus().isSignal()) {
@@ -431,6 +838,7 @@ void Execution::getResult(const std::function<void(Result)>& callback,
                               r.getResourceUsage().getStack();
                           result.was_cached = r.getWasCached();
                           result.was_killed = r.getWasKilled();
+                          result.worker = r.getWorker();
                           callback(result);
                         },
                         [errored](auto exc) {
@@ -3,8 +3,10 @@
 #include <capnp/ez-rpc.h>
 #include <kj/async.h>
 #include <functional>
+#include <memory>
 #include <string>
 #include <unordered_map>
+#include <utility>
 #include <vector>
 
 #include "capnp/server.capnp.h"
@@ -37,6 +39,7 @@ struct Result {
   Resources resources;
   bool was_killed;
   bool was_cached;
+  std::string worker;
 };
 
 class Frontend;
@@ -72,6 +75,7 @@ class File {
   kj::Promise<capnproto::File::Reader> promise;
   kj::ForkedPromise<capnproto::File::Reader> forked_promise;
   bool is_executable_;
+  std::string hash_;
 
  protected:
   Frontend& frontend_;
@@ -96,33 +100,104 @@ class File {
   File& operator=(const File&) = delete;
   File& operator=(File&&) = delete;
 
+  // Hex-encoded SHA256 of the file, empty until it is known: the provided files
+  // know it from the start, the outputs when the result of their execution is
+  // received.
+  const std::string& hash() const { return hash_; }
+
   // Call the provided callback with the contents of the file as soon as they
   // are available.
   void getContentsAsString(
       const std::function<void(const std::string&)>& callback,
       uint64_t limit = 0xffffffffffffffff);
 
-  // Write the file to path when it is available.
+  // Call the provided callback with each chunk of the contents of the file,
+  // as soon as they are received. An empty chunk marks the end of the file.
+  void getContentsAsChunks(
+      const std::function<void(const std::string&)>& callback,
+      uint64_t limit = 0xffffffffffffffff);
+
+  // Like getContentsAsChunks, but it can also be called during the
+  // evaluation, for example from the callback of a result. The evaluation
+  // ends only after the contents are received. If the file cannot be fetched
+  // the callback receives a chunk with the error before the final empty one.
+  void fetchContentsAsChunks(
+      const std::function<void(const std::string&)>& callback,
+      uint64_t limit = 0xffffffffffffffff);
+
+  // Write the file to path when it is available. If current_hash is the hash
+  // of the file already at path nothing is written. If store_dir is the store
+  // of the server the file is linked from there instead of copied, see
+  // util::File::Link.
   void getContentsToFile(const std::string& path, bool overwrite,
-                         bool exist_ok);
+                         bool exist_ok, const std::string& current_hash = "",
+                         const std::string& store_dir = "",
+                         bool hardlink = false);
+};
+
+class Execution;
+
+// Declaration of an execution that has not been sent to the server yet, see
+// Frontend::addBatchedExecution.
+struct BatchedExecution {
+  struct Output {
+    capnproto::ExecutionDescription::Output::Which kind;
+    std::string name;
+    bool is_executable;
+    File* file;
+    kj::Own<kj::PromiseFulfiller<capnproto::File::Reader>> fulfiller;
+  };
+  std::string description;
+  std::string executable_path;
+  std::string executable_name;
+  File* executable = nullptr;
+  std::vector<std::string> args;
+  File* stdin_file = nullptr;
+  std::vector<std::pair<std::string, File*>> inputs;
+  bool disable_cache = false;
+  bool exclusive = false;
+  bool has_limits = false;
+  Resources limits{};
+  float extra_time = 0;
+  uint32_t priority = 0;
+  std::vector<Output> outputs;
+  Execution* execution = nullptr;
+  kj::Own<kj::PromiseFulfiller<capnproto::Execution::Client>> fulfiller;
 };
 
 // Class representing a specific execution. Methods are proxies to the ones in
 // the respective capnproto interface. No method of this class should be called
 // after calling getResult. getResult should be called at least once, otherwise
-// the execution will not run.
+// the execution will not run. The methods of a batched execution only update
+// its declaration, which is sent to the server by Frontend::flushExecutions.
 class Execution {
+  friend class Frontend;
+
  public:
   Execution(std::string description, capnproto::Execution::Client execution,
             std::vector<std::unique_ptr<File>>* files,
             util::UnionPromiseBuilder* builder,
             util::UnionPromiseBuilder* finish_builder, Frontend* frontend)
       : description_(std::move(description)),
+        declared_(kj::Promise<capnproto::Execution::Client>(execution).fork()),
         execution_(std::move(execution)),
         files_(*files),
         builder_(*builder),
         finish_builder_(*finish_builder),
         frontend_(*frontend) {}
+  Execution(std::string description,
+            kj::Promise<capnproto::Execution::Client> execution,
+            BatchedExecution* batch, std::vector<std::unique_ptr<File>>* files,
+            util::UnionPromiseBuilder* builder,
+            util::UnionPromiseBuilder* finish_builder, Frontend* frontend)
+      : description_(std::move(description)),
+        declared_(execution.fork()),
+        execution_(declared_.addBranch()),
+        files_(*files),
+        builder_(*builder),
+        finish_builder_(*finish_builder),
+        frontend_(*frontend),
+        batch_(batch) {}
 
   void setExecutablePath(const std::string& path);
   void setExecutable(const std::string& name, File* file);
@@ -140,6 +215,14 @@ class Execution {
   void setLimits(const Resources& limits);
   void setExtraTime(float extra_time);
 
+  // Unlike the other methods this can be called after getResult, as long as
+  // Frontend::evaluate has not been called yet.
+  void setPriority(uint32_t priority);
+
+  // Can be called only during the evaluation, i.e. from a callback. The
+  // execution is not run if it has not started yet.
+  void cancel();
+
   File* getStdout(bool is_executable);
   File* getStderr(bool is_executable);
   File* getOutput(const std::string& name, bool is_executable);
@@ -150,13 +233,25 @@ class Execution {
                  const std::function<void()>& errored = nullptr);
 
  private:
+  File* addBatchedOutput(capnproto::ExecutionDescription::Output::Which kind,
+                         const std::string& name, bool is_executable);
+  void recordHashes(capnproto::ProcessResult::Reader result);
+
   std::string description_;
+  // Resolves when the server knows about this execution.
+  kj::ForkedPromise<capnproto::Execution::Client> declared_;
   capnproto::Execution::Client execution_;
   std::vector<std::unique_ptr<File>>& files_;
   util::UnionPromiseBuilder& builder_;
   util::UnionPromiseBuilder& finish_builder_;
   util::UnionPromiseBuilder my_builder_;
   Frontend& frontend_;
+  // Not null until the execution is sent to the server.
+  BatchedExecution* batch_ = nullptr;
+  // The files created by the execution, their hashes are set from the result.
+  File* stdout_ = nullptr;
+  File* stderr_ = nullptr;
+  std::unordered_map<std::string, File*> outputs_;
 };
 
 // Class representing a group of executions. Methods are proxies to the ones in
@@ -189,39 +284,76 @@ class ExecutionGroup {
   Frontend& frontend_;
 };
 
-// Frontend that communicates with a specific server on a given port.
+// Frontend that communicates with a specific server on a given port. Each
+// frontend runs a single evaluation and owns its files and executions, the
+// next evaluation uses a new frontend on the same connection.
 class Frontend {
   friend class File;
 
  public:
   Frontend(const std::string& server, int port);
 
+  // Creates a frontend for a new evaluation on the same connection to the
+  // server. The files and executions of this frontend stay valid as long as
+  // it is alive, but cannot be used in the new evaluation.
+  std::unique_ptr<Frontend> nextEvaluation();
+
   // Defines a file that is provided by the frontend, loading it from the given
-  // path.
+  // path. If hash is not empty it is used as the hex-encoded SHA256 of the
+  // file, avoiding to read it again.
   File* provideFile(const std::string& path, const std::string& description,
-                    bool is_executable);
+                    bool is_executable, const std::string& hash = "");
 
   // Defines a file that is provided by the frontend, loading it from its
   // content.
   File* provideFileContent(const std::string& content,
                            const std::string& description, bool is_executable);
 
+  // Defines a file that is already in the store of the server, given its
+  // hex-encoded SHA256, for example an output of a previous evaluation. Its
+  // content is not sent: if the server no longer has it the executions that
+  // use it fail, see missingFiles.
+  File* provideStoredFile(const std::string& hash,
+                          const std::string& description, bool is_executable);
+
   // Creates a new execution with the given description.
   Execution* addExecution(const std::string& description);
 
   // Creates a new execution group with the given description.
   ExecutionGroup* addExecutionGroup(const std::string& description);
 
+  // Creates a new execution with the given description. Its declaration is
+  // sent to the server, together with all the other batched executions, by
+  // flushExecutions. Batched executions cannot use FIFOs.
+  Execution* addBatchedExecution(const std::string& description);
+
+  // Sends the pending batched executions to the server with a single request.
+  // Called automatically by evaluate.
+  void flushExecutions();
+
+  // Asks the server how many of the executions defined so far its cache
+  // would answer, returning the number of those and the total number of
+  // executions. Should be called after all the executions are defined and
+  // before evaluate.
+  std::pair<size_t, size_t> countCached();
+
   // Starts evaluation and returns when complete. Should only be called after
   // all the executions are defined.
   void evaluate();
 
+  // Number of files the server asked for during the evaluation that this
+  // frontend could not send, i.e. the stored files that are gone.
+  size_t missingFiles() const { return *missing_files_; }
+
   // Stops the evaluation. This is best-effort: some executions may still run
   // after this method is called.
   void stopEvaluation();
 
  private:
-  capnp::EzRpcClient client_;
+  explicit Frontend(std::shared_ptr<capnp::EzRpcClient> client);
+
+  // Shared by the frontends of the evaluations on the same connection.
+  std::shared_ptr<capnp::EzRpcClient> client_;
   capnproto::FrontendContext::Client frontend_context_;
   std::unordered_map<util::SHA256_t, util::FileWrapper, util::SHA256_t::Hasher>
       known_files_;
@@ -230,7 +362,15 @@ class Frontend {
   std::vector<std::unique_ptr<File>> files_;
   std::vector<std::unique_ptr<Execution>> executions_;
   std::vector<std::unique_ptr<ExecutionGroup>> groups_;
+  std::vector<std::unique_ptr<BatchedExecution>> batch_;
+  // Keeps alive the files returned by the server for the batched executions.
+  std::vector<kj::Own<
+      capnp::Response<capnproto::FrontendContext::AddExecutionsResults>>>
+      batch_responses_;
+  // Contents requested with File::fetchContentsAsChunks, not yet received.
+  std::vector<kj::Promise<void>> late_fetches_;
   kj::Promise<void> stop_request_;
+  std::shared_ptr<size_t> missing_files_ = std::make_shared<size_t>(0);
 };
 }  // namespace frontend
 
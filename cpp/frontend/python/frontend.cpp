@@ -70,6 +70,7 @@ PYBIND11_MODULE(task_maker_frontend, m) {
       .def_readonly("resources", &frontend::Result::resources)
       .def_readonly("was_cached", &frontend::Result::was_cached)
       .def_readonly("was_killed", &frontend::Result::was_killed)
+      .def_readonly("worker", &frontend::Result::worker)
       .def("__repr__", [](const frontend::Result& res) {
         std::string message = "<Result ";
         if (res.status == capnproto::ProcessResult::Status::Which::SUCCESS) {
@@ -137,8 +138,44 @@ PYBIND11_MODULE(task_maker_frontend, m) {
                  limit);
            },
            "callback"_a, "limit"_a = 0xffffffffffffffff)
+      .def("getContentsAsChunks",
+           [](frontend::File& f, std::function<void(pybind11::bytes)> cb,
+              uint64_t limit) {
+             f.getContentsAsChunks(
+                 [cb = destroy_with_gil(cb)](std::string s) mutable {
+                   pybind11::gil_scoped_acquire acquire;
+                   try {
+                     (*cb)(s);
+                   } catch (pybind11::error_already_set& exc) {
+                     std::cerr << __FILE__ << ":" << __LINE__ << " "
+                               << exc.what() << std::endl;
+                     _Exit(1);
+                   }
+                 },
+                 limit);
+           },
+           "callback"_a, "limit"_a = 0xffffffffffffffff)
+      .def("fetchContentsAsChunks",
+           [](frontend::File& f, std::function<void(pybind11::bytes)> cb,
+              uint64_t limit) {
+             f.fetchContentsAsChunks(
+                 [cb = destroy_with_gil(cb)](std::string s) mutable {
+                   pybind11::gil_scoped_acquire acquire;
+                   try {
+                     (*cb)(s);
+                   } catch (pybind11::error_already_set& exc) {
+                     std::cerr << __FILE__ << ":" << __LINE__ << " "
+                               << exc.what() << std::endl;
+                     _Exit(1);
+                   }
+                 },
+                 limit);
+           },
+           "callback"_a, "limit"_a = 0xffffffffffffffff)
       .def("getContentsToFile", &frontend::File::getContentsToFile, "path"_a,
-           "overwrite"_a = true, "exist_ok"_a = true);
+           "overwrite"_a = true, "exist_ok"_a = true, "current_hash"_a = "",
+           "store_dir"_a = "", "hardlink"_a = false)
+      .def("hash", &frontend::File::hash);
 
   pybind11::class_<frontend::Fifo> _(m, "Fifo");
 
@@ -158,12 +195,17 @@ PYBIND11_MODULE(task_maker_frontend, m) {
       .def("makeExclusive", &frontend::Execution::makeExclusive)
       .def("setLimits", &frontend::Execution::setLimits, "limits"_a)
       .def("setExtraTime", &frontend::Execution::setExtraTime, "extra_time"_a)
+      .def("setPriority", &frontend::Execution::setPriority, "priority"_a)
+      .def("cancel", &frontend::Execution::cancel)
       .def("stdout", &frontend::Execution::getStdout,
-           pybind11::return_value_policy::reference, "is_executable"_a = false)
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "is_executable"_a = false)
       .def("stderr", &frontend::Execution::getStderr,
-           pybind11::return_value_policy::reference, "is_executable"_a = false)
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "is_executable"_a = false)
       .def("output", &frontend::Execution::getOutput,
-           pybind11::return_value_policy::reference, "name"_a,
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "name"_a,
            "is_executable"_a = false)
       .def("notifyStart",
            [](frontend::Execution& f, std::function<void()> cb) {
@@ -208,23 +250,43 @@ PYBIND11_MODULE(task_maker_frontend, m) {
 
   pybind11::class_<frontend::ExecutionGroup>(m, "ExecutionGroup")
       .def("addExecution", &frontend::ExecutionGroup::addExecution,
-           pybind11::return_value_policy::reference, "description"_a)
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "description"_a)
       .def("createFifo", &frontend::ExecutionGroup::createFifo,
-           pybind11::return_value_policy::reference);
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>());
 
+  // The objects returned by reference are owned by their frontend, which is
+  // kept alive as long as they are used
   pybind11::class_<frontend::Frontend>(m, "Frontend")
       .def(pybind11::init<std::string, int>())
       .def("provideFile", &frontend::Frontend::provideFile,
-           pybind11::return_value_policy::reference, "path"_a, "description"_a,
-           "is_executable"_a = false)
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "path"_a, "description"_a,
+           "is_executable"_a = false, "hash"_a = "")
       .def("provideFileContent", &frontend::Frontend::provideFileContent,
-           pybind11::return_value_policy::reference, "content"_a,
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "content"_a,
            "description"_a, "is_executable"_a = false)
+      .def("provideStoredFile", &frontend::Frontend::provideStoredFile,
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "hash"_a, "description"_a,
+           "is_executable"_a = false)
       .def("addExecution", &frontend::Frontend::addExecution,
-           pybind11::return_value_policy::reference, "description"_a)
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "description"_a)
       .def("addExecutionGroup", &frontend::Frontend::addExecutionGroup,
-           pybind11::return_value_policy::reference)
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>())
+      .def("addBatchedExecution", &frontend::Frontend::addBatchedExecution,
+           pybind11::return_value_policy::reference,
+           pybind11::keep_alive<0, 1>(), "description"_a)
+      .def("flushExecutions", &frontend::Frontend::flushExecutions)
+      .def("countCached", &frontend::Frontend::countCached,
+           pybind11::call_guard<pybind11::gil_scoped_release>())
       .def("evaluate", &frontend::Frontend::evaluate,
            pybind11::call_guard<pybind11::gil_scoped_release>())
+      .def("nextEvaluation", &frontend::Frontend::nextEvaluation)
+      .def("missingFiles", &frontend::Frontend::missingFiles)
       .def("stopEvaluation", &frontend::Frontend::stopEvaluation);
 }
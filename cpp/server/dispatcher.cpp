@@ -45,7 +45,7 @@ Dispatcher::HandleRequest(capnproto::Evaluator::Client evaluator,
 
 kj::Promise<void> Dispatcher::AddEvaluator(
     capnproto::Evaluator::Client evaluator) {
-  std::remove_reference_t<decltype(requests_.back())> request_info;
+  std::remove_reference_t<decltype(requests_.begin()->second)> request_info;
   do {
     if (requests_.empty()) {
       auto evaluator_promise = kj::newPromiseAndFulfiller<void>();
@@ -53,8 +53,9 @@ kj::Promise<void> Dispatcher::AddEvaluator(
       fulfillers_.push_back(std::move(evaluator_promise.fulfiller));
       return std::move(evaluator_promise.promise);
     }
-    request_info = std::move(requests_.front());
-    requests_.pop();
+    auto front = requests_.begin();
+    request_info = std::move(front->second);
+    requests_.erase(front);
   } while (*std::get<3>(request_info));
   auto p = HandleRequest(evaluator, std::get<0>(request_info));
   // Signal execution started
@@ -115,8 +116,12 @@ Dispatcher::AddRequest(capnproto::Request::Reader request,
   if (evaluators_.empty()) {
     auto request_promise = kj::newPromiseAndFulfiller<
         capnp::Response<capnproto::Evaluator::EvaluateResults>>();
-    requests_.emplace(request, std::move(request_promise.fulfiller),
-                      std::move(notify), canceled, retries);
+    requests_.emplace(
+        std::piecewise_construct,
+        std::forward_as_tuple(-static_cast<int64_t>(request.getPriority()),
+                              request_cnt_++),
+        std::forward_as_tuple(request, std::move(request_promise.fulfiller),
+                              std::move(notify), canceled, retries));
     return std::move(request_promise.promise);
   }
   auto evaluator = std::move(evaluators_.back());
@@ -2,10 +2,12 @@
 #define SERVER_DISPATCHER_HPP
 
 #include <kj/async.h>
+#include <map>
 #include <memory>
-#include <queue>
 #include <set>
+#include <tuple>
 #include <unordered_map>
+#include <utility>
 #include <vector>
 #include "capnp/evaluation.capnp.h"
 
@@ -14,9 +16,13 @@ namespace server {
 // Class to dispatch execution requests to workers.
 class Dispatcher {
   template <typename T, typename U>
-  using Queue = std::queue<std::tuple<T, kj::Own<kj::PromiseFulfiller<U>>,
-                                      kj::Own<kj::PromiseFulfiller<void>>,
-                                      std::shared_ptr<bool>, size_t>>;
+  using QueueItem = std::tuple<T, kj::Own<kj::PromiseFulfiller<U>>,
+                               kj::Own<kj::PromiseFulfiller<void>>,
+                               std::shared_ptr<bool>, size_t>;
+  // The key is (-priority, insertion order): requests with higher priority are
+  // dispatched first, requests with the same priority in FIFO order.
+  template <typename T, typename U>
+  using Queue = std::map<std::pair<int64_t, size_t>, QueueItem<T, U>>;
 
  public:
   // Adds a new evaluator to the worker queue. Returns a promise that will
@@ -25,8 +31,8 @@ class Dispatcher {
       KJ_WARN_UNUSED_RESULT;
 
   // Adds a new request to the request queue. Returns a promise that will
-  // resolve when some worker has finished running the request. When a worker
-  // is available:
+  // resolve when some worker has finished running the request. Requests are
+  // dispatched in order of decreasing priority. When a worker is available:
   //  - if the request has been cancelled by setting cancelled to true,
   //    the promise will be rejected.
   //  - otherwise, notify->fulfill() will be called, the request will be
@@ -43,6 +49,7 @@ class Dispatcher {
 
  private:
   size_t client_cnt_ = 0;
+  size_t request_cnt_ = 0;
 
   kj::Promise<capnp::Response<capnproto::Evaluator::EvaluateResults>>
   HandleRequest(capnproto::Evaluator::Client evaluator,
@@ -20,10 +20,34 @@ uint32_t AddFileInfo(uint32_t* last_file_id,
 }
 }  // namespace
 
+ExecutionGroup::ExecutionGroup(FrontendContext* frontend_context,
+                               std::string description)
+    : frontend_context_(*frontend_context),
+      description_(std::move(description)) {
+  frontend_context_.canceled_.push_back(canceled_);
+}
+
 void ExecutionGroup::Register(Execution* ex) { executions_.push_back(ex); }
 
 void ExecutionGroup::setExclusive() { request_.setExclusive(true); }
 void ExecutionGroup::disableCache() { cache_enabled_ = false; }
+void ExecutionGroup::setPriority(uint32_t priority) {
+  // The group has the priority of its most important execution.
+  if (priority > request_.getPriority()) request_.setPriority(priority);
+}
+void ExecutionGroup::Cancel() {
+  if (started_ || *canceled_) return;
+  KJ_LOG(INFO, "Execution group " + description_, "Canceled");
+  // The dispatcher drops the request, if already queued.
+  *canceled_ = true;
+  for (auto ex : executions_) {
+    ex->onDependenciesFailure(
+        KJ_EXCEPTION(FAILED, "Execution canceled: " + description_));
+  }
+  cancel_.fulfiller->reject(
+      KJ_EXCEPTION(FAILED, "Execution canceled: " + description_));
+}
+
 kj::Promise<void> ExecutionGroup::notifyStart() {
   return forked_start_.addBranch()
       .then([this]() {
@@ -57,6 +81,10 @@ kj::Promise<void> ExecutionGroup::Finalize(Execution* ex) {
     finalized_ = true;
     KJ_LOG(INFO, "Execution group " + description_,
            "Creating dependency edges");
+    watch_start_ = forked_start_.addBranch()
+                       .then([this]() { started_ = true; },
+                             [](kj::Exception /*exc*/) {})
+                       .eagerlyEvaluate(nullptr);
     util::UnionPromiseBuilder dependencies;
     dependencies.AddPromise(
         frontend_context_.forked_evaluation_start_.addBranch(),
@@ -108,7 +136,7 @@ kj::Promise<void> ExecutionGroup::Finalize(Execution* ex) {
 
               return frontend_context_.dispatcher_
                   .AddRequest(request_, std::move(start_.fulfiller),
-                              frontend_context_.canceled_)
+                              canceled_)
                   .then(
                       [this](
                           capnp::Response<capnproto::Evaluator::EvaluateResults>
@@ -140,6 +168,7 @@ kj::Promise<void> ExecutionGroup::Finalize(Execution* ex) {
                   .eagerlyEvaluate(nullptr);
             })
             .exclusiveJoin(frontend_context_.forked_early_stop_.addBranch())
+            .exclusiveJoin(std::move(cancel_.promise))
             .eagerlyEvaluate(nullptr);
     forked_done_ = done_.fork();
   }
@@ -151,6 +180,34 @@ kj::Promise<void> ExecutionGroup::Finalize(Execution* ex) {
   KJ_FAIL_ASSERT("Invalid execution for this group!");
 }  // namespace server
 
+bool ExecutionGroup::InputsKnown(const detail::FileHashes& hashes) const {
+  for (auto ex : executions_) {
+    if (!ex->inputsKnown(hashes)) return false;
+  }
+  return true;
+}
+
+bool ExecutionGroup::InCache(detail::FileHashes* hashes) {
+  if (!cache_enabled_) return false;
+  // The request of the group is filled only when it is ready to run, here it
+  // is built on a copy.
+  capnp::MallocMessageBuilder builder;
+  builder.setRoot(request_.asReader());
+  auto request = builder.getRoot<capnproto::Request>();
+  request.initProcesses(executions_.size());
+  auto hash_of = [hashes](uint32_t id) { return hashes->at(id); };
+  for (size_t i = 0; i < executions_.size(); i++) {
+    request.getProcesses().setWithCaveats(i, executions_[i]->request_);
+    executions_[i]->prepareRequest(request.getProcesses()[i], hash_of);
+  }
+  if (!frontend_context_.cache_manager_.Has(request)) return false;
+  auto result = frontend_context_.cache_manager_.Get(request);
+  for (size_t i = 0; i < executions_.size(); i++) {
+    executions_[i]->addOutputHashes(result.getProcesses()[i], hashes);
+  }
+  return true;
+}
+
 Execution::Execution(FrontendContext* frontend_context, std::string description,
                      ExecutionGroup* group)
     : frontend_context_(*frontend_context),
@@ -218,6 +275,17 @@ kj::Promise<void> Execution::setLimits(SetLimitsContext context) {
   request_.setLimits(context.getParams().getLimits());
   return kj::READY_NOW;
 }
+kj::Promise<void> Execution::setPriority(SetPriorityContext context) {
+  KJ_LOG(INFO, "Execution " + description_,
+         kj::str("Setting priority to ", context.getParams().getPriority()));
+  group_.setPriority(context.getParams().getPriority());
+  return kj::READY_NOW;
+}
+kj::Promise<void> Execution::cancel(CancelContext /*context*/) {
+  KJ_LOG(INFO, "Execution " + description_, "Cancel requested");
+  group_.Cancel();
+  return kj::READY_NOW;
+}
 kj::Promise<void> Execution::setExtraTime(SetExtraTimeContext context) {
   KJ_LOG(INFO, "Execution " + description_,
          kj::str("Setting extra time to ",
@@ -299,6 +367,73 @@ kj::Promise<void> Execution::notifyStart(NotifyStartContext /*context*/) {
   return group_.notifyStart();
 }
 
+void Execution::Declare(
+    capnproto::ExecutionDescription::Reader description,
+    capnp::List<capnproto::DeclaredExecution>::Builder declared,
+    size_t index) {
+  auto resolve = [&declared, index](capnproto::FileRef::Reader ref) {
+    if (ref.isFile()) return ref.getFile().getId();
+    auto output = ref.getOutput();
+    KJ_REQUIRE(output.getExecution() < index, output.getExecution(),
+               "Reference to an execution not yet declared");
+    auto files = declared[output.getExecution()].getFiles();
+    KJ_REQUIRE(output.getIndex() < files.size(), output.getIndex(),
+               "Invalid output");
+    return files[output.getIndex()].getId();
+  };
+  auto executable = description.getExecutable();
+  if (executable.isSystem()) {
+    request_.getExecutable().setSystem(executable.getSystem());
+  } else {
+    request_.getExecutable().initLocalFile().setName(
+        executable.getLocalFile().getName());
+    executable_ = resolve(executable.getLocalFile().getFile());
+  }
+  request_.setArgs(description.getArgs());
+  if (description.hasStdin()) {
+    stdin_ = resolve(description.getStdin());
+  }
+  for (auto input : description.getInputs()) {
+    inputs_.emplace(input.getName(), resolve(input.getFile()));
+  }
+  if (description.getDisableCache()) group_.disableCache();
+  if (description.getExclusive()) group_.setExclusive();
+  if (description.hasLimits()) request_.setLimits(description.getLimits());
+  request_.setExtraTime(description.getExtraTime());
+  group_.setPriority(description.getPriority());
+  auto outputs = description.getOutputs();
+  auto files = declared[index].initFiles(outputs.size());
+  for (size_t i = 0; i < outputs.size(); i++) {
+    auto output = outputs[i];
+    switch (output.which()) {
+      case capnproto::ExecutionDescription::Output::STDOUT:
+        KJ_REQUIRE(!stdout_, "Duplicated stdout");
+        stdout_ = AddFileInfo(&frontend_context_.last_file_id_,
+                              &frontend_context_.file_info_, files[i],
+                              output.getIsExecutable(),
+                              "Standard output of execution " + description_);
+        break;
+      case capnproto::ExecutionDescription::Output::STDERR:
+        KJ_REQUIRE(!stderr_, "Duplicated stderr");
+        stderr_ = AddFileInfo(&frontend_context_.last_file_id_,
+                              &frontend_context_.file_info_, files[i],
+                              output.getIsExecutable(),
+                              "Standard error of execution " + description_);
+        break;
+      case capnproto::ExecutionDescription::Output::FILE:
+        outputs_.emplace(
+            output.getFile(),
+            AddFileInfo(&frontend_context_.last_file_id_,
+                        &frontend_context_.file_info_, files[i],
+                        output.getIsExecutable(),
+                        "Output " + std::string(output.getFile()) +
+                            " of execution " + description_));
+        break;
+    }
+  }
+  KJ_LOG(INFO, "Execution " + description_, "Declared", request_);
+}
+
 void Execution::addDependencies(util::UnionPromiseBuilder* dependencies) {
   auto add_dep = [&dependencies, this](uint32_t id) {
     KJ_ASSERT(id != 0);
@@ -324,54 +459,84 @@ void Execution::addDependencies(util::UnionPromiseBuilder* dependencies) {
 }
 
 void Execution::prepareRequest() {
-  auto get_hash = [this](uint32_t id, capnproto::SHA256::Builder builder) {
+  prepareRequest(request_, [this](uint32_t id) {
+    return frontend_context_.file_info_[id].hash;
+  });
+}
+
+void Execution::prepareRequest(
+    capnproto::ProcessRequest::Builder request,
+    const std::function<util::SHA256_t(uint32_t)>& hash_of) {
+  auto get_hash = [&hash_of](uint32_t id,
+                             capnproto::SHA256::Builder builder) {
     KJ_ASSERT(id != 0);
-    auto hash = frontend_context_.file_info_[id].hash;
+    auto hash = hash_of(id);
     KJ_ASSERT(!hash.isZero(), id);
     hash.ToCapnp(builder);
   };
   if (stdin_) {
-    get_hash(stdin_, request_.initStdin().initHash());
+    get_hash(stdin_, request.initStdin().initHash());
   } else if (stdin_fifo_) {
-    request_.initStdin().setFifo(stdin_fifo_);
+    request.initStdin().setFifo(stdin_fifo_);
   }
   if (stdout_fifo_) {
-    request_.setStdout(stdout_fifo_);
+    request.setStdout(stdout_fifo_);
   }
   if (stderr_fifo_) {
-    request_.setStderr(stderr_fifo_);
+    request.setStderr(stderr_fifo_);
   }
   if (executable_) {
-    get_hash(executable_, request_.getExecutable().getLocalFile().initHash());
+    get_hash(executable_, request.getExecutable().getLocalFile().initHash());
   }
-  request_.initFifos(fifos_.size());
+  request.initFifos(fifos_.size());
   {
     size_t i = 0;
     for (auto& fifo : fifos_) {
-      request_.getFifos()[i].setName(fifo.first);
-      request_.getFifos()[i].setId(fifo.second);
+      request.getFifos()[i].setName(fifo.first);
+      request.getFifos()[i].setId(fifo.second);
       i++;
     }
   }
-  request_.initInputFiles(inputs_.size());
+  request.initInputFiles(inputs_.size());
   {
     size_t i = 0;
     for (auto& input : inputs_) {
-      request_.getInputFiles()[i].setName(input.first);
-      get_hash(input.second, request_.getInputFiles()[i].getHash());
+      request.getInputFiles()[i].setName(input.first);
+      get_hash(input.second, request.getInputFiles()[i].getHash());
       i++;
     }
   }
-  request_.initOutputFiles(outputs_.size());
+  request.initOutputFiles(outputs_.size());
   {
     size_t i = 0;
     for (auto& output : outputs_) {
-      request_.getOutputFiles().set(i, output.first);
+      request.getOutputFiles().set(i, output.first);
       i++;
     }
   }
 }
 
+bool Execution::inputsKnown(const detail::FileHashes& hashes) const {
+  if (executable_ && !hashes.count(executable_)) return false;
+  if (stdin_ && !hashes.count(stdin_)) return false;
+  for (const auto& input : inputs_) {
+    if (!hashes.count(input.second)) return false;
+  }
+  return true;
+}
+
+void Execution::addOutputHashes(capnproto::ProcessResult::Reader result,
+                                detail::FileHashes* hashes) const {
+  // The outputs of a failed execution are never used.
+  if (!result.getStatus().isSuccess()) return;
+  if (stdout_) (*hashes)[stdout_] = result.getStdout();
+  if (stderr_) (*hashes)[stderr_] = result.getStderr();
+  for (auto output : result.getOutputFiles()) {
+    auto file = outputs_.find(output.getName());
+    if (file != outputs_.end()) (*hashes)[file->second] = output.getHash();
+  }
+}
+
 void Execution::processResult(
     capnproto::ProcessResult::Reader result,
     util::UnionPromiseBuilder* dependencies_propagated, bool from_cache) {
@@ -486,12 +651,31 @@ kj::Promise<void> FrontendContext::addExecution(AddExecutionContext context) {
   return kj::READY_NOW;
 }
 
+kj::Promise<void> FrontendContext::addExecutions(
+    AddExecutionsContext context) {
+  auto descriptions = context.getParams().getExecutions();
+  KJ_LOG(INFO, "Adding " + std::to_string(descriptions.size()) + " executions");
+  auto declared = context.getResults().initExecutions(descriptions.size());
+  for (size_t i = 0; i < descriptions.size(); i++) {
+    auto description = descriptions[i];
+    groups_.push_back(
+        kj::heap<ExecutionGroup>(this, description.getDescription()));
+    auto execution =
+        kj::heap<Execution>(this, description.getDescription(), groups_.back());
+    execution->Declare(description, declared, i);
+    declared[i].setExecution(std::move(execution));
+  }
+  return kj::READY_NOW;
+}
+
 kj::Promise<void> FrontendContext::addExecutionGroup(
     AddExecutionGroupContext context) {
   KJ_LOG(INFO, "Adding execution group " +
                    std::string(context.getParams().getDescription()));
-  context.getResults().setGroup(
+  groups_.push_back(
       kj::heap<ExecutionGroup>(this, context.getParams().getDescription()));
+  context.getResults().setGroup(
+      kj::heap<ExecutionGroupRef>(groups_.back().get()));
   return kj::READY_NOW;
 }
 kj::Promise<void> FrontendContext::startEvaluation(
@@ -584,10 +768,64 @@ kj::Promise<void> FrontendContext::getFileContents(
       .exclusiveJoin(forked_early_stop_.addBranch());
 }
 
+kj::Promise<void> FrontendContext::getFileHash(GetFileHashContext context) {
+  uint32_t id = context.getParams().getFile().getId();
+  KJ_ASSERT(id != 0);
+  auto send_hash = [id, context, this]() mutable {
+    file_info_.at(id).hash.ToCapnp(context.getResults().initHash());
+  };
+  return file_info_[id]
+      .forked_promise.addBranch()
+      .then([send_hash]() mutable { send_hash(); },
+            [send_hash, this, id](kj::Exception exc) mutable {
+              if (file_info_[id].hash.isZero()) {
+                kj::throwRecoverableException(std::move(exc));
+              }
+              send_hash();
+            })
+      .exclusiveJoin(forked_early_stop_.addBranch());
+}
+
+kj::Promise<void> FrontendContext::countCached(CountCachedContext context) {
+  // The hashes known before running anything: the ones of the provided files
+  // and of the outputs of the groups answered by the cache.
+  detail::FileHashes hashes;
+  for (const auto& file : file_info_) {
+    if (file.second.provided) hashes.emplace(file.first, file.second.hash);
+  }
+  uint32_t total = 0;
+  uint32_t cached = 0;
+  std::vector<ExecutionGroup*> pending;
+  for (auto& group : groups_) {
+    total += group->Size();
+    pending.push_back(group.get());
+  }
+  // The groups are not declared in topological order, a group is looked up
+  // when the hashes of its inputs become known.
+  bool progress = true;
+  while (progress) {
+    progress = false;
+    std::vector<ExecutionGroup*> waiting;
+    for (auto group : pending) {
+      if (!group->InputsKnown(hashes)) {
+        waiting.push_back(group);
+        continue;
+      }
+      progress = true;
+      if (group->InCache(&hashes)) cached += group->Size();
+    }
+    pending.swap(waiting);
+  }
+  KJ_LOG(INFO, "Executions in cache", cached, total);
+  context.getResults().setCached(cached);
+  context.getResults().setTotal(total);
+  return kj::READY_NOW;
+}
+
 kj::Promise<void> FrontendContext::stopEvaluation(
     StopEvaluationContext /*context*/) {
   KJ_LOG(INFO, "Early stop");
-  *canceled_ = true;
+  for (auto& canceled : canceled_) *canceled = true;
   evaluation_early_stop_.fulfiller->reject(
       KJ_EXCEPTION(FAILED, "Evaluation stopped"));
   return dispatcher_.Cancel(frontend_id_);
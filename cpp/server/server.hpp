@@ -8,6 +8,7 @@
 #include "util/union_promise.hpp"
 
 #include <capnp/message.h>
+#include <functional>
 #include <memory>
 #include <unordered_map>
 
@@ -24,6 +25,8 @@ struct FileInfo {
   util::SHA256_t hash = util::SHA256_t::ZERO;
   util::UnionPromiseBuilder dependencies_propagated_;
 };
+// Hashes of the files, by id.
+using FileHashes = std::unordered_map<uint32_t, util::SHA256_t>;
 };  // namespace detail
 
 // Implementations of the server interface.
@@ -55,10 +58,28 @@ class Execution : public capnproto::Execution::Server {
   kj::Promise<void> getOutput(GetOutputContext context) override;
   kj::Promise<void> notifyStart(NotifyStartContext context) override;
   kj::Promise<void> getResult(GetResultContext context) override;
+  kj::Promise<void> setPriority(SetPriorityContext context) override;
+  kj::Promise<void> cancel(CancelContext context) override;
+
+  // Set up the execution from its description, the files are added to the
+  // index-th element of declared.
+  void Declare(capnproto::ExecutionDescription::Reader description,
+               capnp::List<capnproto::DeclaredExecution>::Builder declared,
+               size_t index);
 
  private:
   void addDependencies(util::UnionPromiseBuilder* dependencies);
   void prepareRequest();
+  // Fills the files read by the execution in request, given the hash of each
+  // file id.
+  void prepareRequest(
+      capnproto::ProcessRequest::Builder request,
+      const std::function<util::SHA256_t(uint32_t)>& hash_of);
+  // Whether the hashes of all the files read by the execution are known.
+  bool inputsKnown(const detail::FileHashes& hashes) const;
+  // Adds to hashes the hashes of the files created by the execution.
+  void addOutputHashes(capnproto::ProcessResult::Reader result,
+                       detail::FileHashes* hashes) const;
   void processResult(capnproto::ProcessResult::Reader result,
                      util::UnionPromiseBuilder* dependencies_propagated,
                      bool from_cache = false);
@@ -90,11 +111,13 @@ class Execution : public capnproto::Execution::Server {
 class ExecutionGroup : public capnproto::ExecutionGroup::Server {
  public:
   void Register(Execution* ex);
-  ExecutionGroup(FrontendContext* frontend_context, std::string description)
-      : frontend_context_(*frontend_context),
-        description_(std::move(description)) {}
+  ExecutionGroup(FrontendContext* frontend_context, std::string description);
   void setExclusive();
   void disableCache();
+  void setPriority(uint32_t priority);
+  // Prevents the group from being executed if it has not started yet, its
+  // executions fail as if their dependencies failed.
+  void Cancel();
 
   kj::Promise<void> addExecution(AddExecutionContext context) override;
   kj::Promise<void> createFifo(CreateFifoContext context) override;
@@ -103,6 +126,13 @@ class ExecutionGroup : public capnproto::ExecutionGroup::Server {
   kj::Promise<void> notifyStart();
   kj::Promise<void> Finalize(Execution* ex);
 
+  size_t Size() const { return executions_.size(); }
+  // Whether the hashes of all the files read by the group are known.
+  bool InputsKnown(const detail::FileHashes& hashes) const;
+  // Whether the cache has the result of the group, given the hashes of the
+  // files it reads. If so the hashes of the files it creates are added.
+  bool InCache(detail::FileHashes* hashes);
+
  private:
   FrontendContext& frontend_context_;
   std::string description_;
@@ -116,16 +146,39 @@ class ExecutionGroup : public capnproto::ExecutionGroup::Server {
   uint32_t cache_enabled_ = true;
   kj::PromiseFulfillerPair<void> start_ = kj::newPromiseAndFulfiller<void>();
   kj::ForkedPromise<void> forked_start_ = start_.promise.fork();
+  kj::Promise<void> watch_start_ = kj::READY_NOW;
+  bool started_ = false;
+  kj::PromiseFulfillerPair<void> cancel_ = kj::newPromiseAndFulfiller<void>();
+  std::shared_ptr<bool> canceled_ = std::make_shared<bool>(false);
   size_t next_fifo_ = 1;
 };
 
+// Capability of a group owned by the FrontendContext, the group stays known
+// to the FrontendContext even if the frontend drops it.
+class ExecutionGroupRef : public capnproto::ExecutionGroup::Server {
+ public:
+  explicit ExecutionGroupRef(ExecutionGroup* group) : group_(*group) {}
+
+  kj::Promise<void> addExecution(AddExecutionContext context) override {
+    return group_.addExecution(context);
+  }
+  kj::Promise<void> createFifo(CreateFifoContext context) override {
+    return group_.createFifo(context);
+  }
+
+ private:
+  ExecutionGroup& group_;
+};
+
 class FrontendContext : public capnproto::FrontendContext::Server {
  public:
   FrontendContext(Dispatcher* dispatcher, CacheManager* cache_manager)
       : dispatcher_(*dispatcher),
         builder_(false),
         cache_manager_(*cache_manager) {}
-  ~FrontendContext() { *canceled_ = true; }
+  ~FrontendContext() {
+    for (auto& canceled : canceled_) *canceled = true;
+  }
   FrontendContext(const FrontendContext&) = delete;
   FrontendContext(FrontendContext&&) = delete;
   FrontendContext& operator=(const FrontendContext&) = delete;
@@ -137,6 +190,9 @@ class FrontendContext : public capnproto::FrontendContext::Server {
   kj::Promise<void> startEvaluation(StartEvaluationContext context) override;
   kj::Promise<void> getFileContents(GetFileContentsContext context) override;
   kj::Promise<void> stopEvaluation(StopEvaluationContext context) override;
+  kj::Promise<void> addExecutions(AddExecutionsContext context) override;
+  kj::Promise<void> getFileHash(GetFileHashContext context) override;
+  kj::Promise<void> countCached(CountCachedContext context) override;
 
  private:
   friend class Execution;
@@ -159,7 +215,8 @@ class FrontendContext : public capnproto::FrontendContext::Server {
   uint32_t scheduled_tasks_ = 0;
   CacheManager& cache_manager_;
   std::vector<kj::Own<ExecutionGroup>> groups_;
-  std::shared_ptr<bool> canceled_ = std::make_shared<bool>(false);
+  // Cancellation flags of the requests of all the groups of this frontend.
+  std::vector<std::shared_ptr<bool>> canceled_;
 };
 
 class Server : public capnproto::MainServer::Server {
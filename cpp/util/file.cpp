@@ -17,6 +17,10 @@
 #include <ftw.h>
 #include <sys/stat.h>
 #include <unistd.h>
+#ifdef __linux__
+#include <linux/fs.h>
+#include <sys/ioctl.h>
+#endif
 
 // if REMOVE_ALSO_MOUNT_POINTS is set remove also the mount points mounted in
 // the sandbox when cleaning
@@ -140,6 +144,25 @@ int OsAtomicCopy(const std::string& src, const std::string& dst,
   return 0;
 }
 
+// Makes dst a copy-on-write clone of src, where the filesystem supports it.
+bool OsReflink(const std::string& src, const std::string& dst) {
+#ifdef FICLONE
+  kj::AutoCloseFd in{open(src.c_str(), O_CLOEXEC | O_RDONLY)};  // NOLINT
+  if (in.get() == -1) return false;
+  std::string temp_file;
+  auto out = OsTempFile(dst, &temp_file);
+  if (out.get() == -1) return false;
+  if (ioctl(out.get(), FICLONE, in.get()) == -1 ||  // NOLINT
+      OsAtomicMove(temp_file, dst, /*overwrite=*/true)) {
+    OsRemove(temp_file);
+    return false;
+  }
+  return true;
+#else
+  return false;
+#endif
+}
+
 util::File::ChunkProducer OsRead(const std::string& path, uint64_t limit) {
   kj::AutoCloseFd fd{open(path.c_str(), O_CLOEXEC | O_RDONLY)};  // NOLINT
   if (fd.get() == -1) {
@@ -287,6 +310,14 @@ void File::Copy(const std::string& from, const std::string& to, bool overwrite,
   }
 }
 
+bool File::Link(const std::string& from, const std::string& to,
+                bool hardlink) {
+  if (!Exists(from)) return false;
+  MakeDirs(BaseDir(to));
+  if (OsReflink(from, to)) return true;
+  return hardlink && !OsIsLink(from) && !OsAtomicCopy(from, to, true, true);
+}
+
 void File::Move(const std::string& from, const std::string& to, bool overwrite,
                 bool exist_ok) {
   if (OsIsLink(from) || OsAtomicMove(from, to, overwrite, exist_ok)) {
@@ -320,9 +351,14 @@ void File::MakeImmutable(const std::string& path) {
 }
 
 std::string File::PathForHash(const SHA256_t& hash) {
+  return PathForHash(hash, Flags::store_directory);
+}
+
+std::string File::PathForHash(const SHA256_t& hash,
+                              const std::string& store_directory) {
   std::string path = hash.Hex();
   return JoinPath(
-      Flags::store_directory,
+      store_directory,
       JoinPath(JoinPath(path.substr(0, 2), path.substr(2, 2)), path));
 }
 
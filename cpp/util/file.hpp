@@ -58,6 +58,12 @@ class File {
                        bool overwrite = false, bool exist_ok = true,
                        bool make_dirs = true);
 
+  // Makes to share the contents of from without copying them: with a reflink
+  // where the filesystem supports it, otherwise with a hard link if hardlink
+  // is true. Returns false if neither is possible, to is overwritten.
+  static bool Link(const std::string& from, const std::string& to,
+                   bool hardlink);
+
   // Moves a file to a new position. If overwrite is false and exist_ok
   // is true, the original file is deleted anyway.
   static void Move(const std::string& from, const std::string& to,
@@ -77,6 +83,8 @@ class File {
 
   // Computes the path for a file with the given hash.
   static std::string PathForHash(const SHA256_t& hash);
+  static std::string PathForHash(const SHA256_t& hash,
+                                 const std::string& store_directory);
 
   // Joins two paths.
   static std::string JoinPath(const std::string& first,
@@ -215,6 +215,9 @@ kj::Promise<void> Executor::Execute(capnproto::Request::Reader request_,
   std::vector<std::string> stdout_paths(num_processes);
   std::vector<sandbox::ExecutionOptions> exec_options_v;
   result_.initProcesses(num_processes);
+  for (auto result : result_.getProcesses()) {
+    result.setWorker(name_);
+  }
   for (size_t i = 0; i < request_.getProcesses().size(); i++) {
     auto request = request_.getProcesses()[i];
     auto executable = request.getExecutable();
@@ -3,6 +3,7 @@
 
 #include <mutex>
 #include <set>
+#include <string>
 #include <unordered_map>
 
 #include "capnp/evaluation.capnp.h"
@@ -16,8 +17,12 @@ namespace worker {
 class Executor : public capnproto::Evaluator::Server {
  public:
   KJ_DISALLOW_COPY(Executor);
-  Executor(capnproto::FileSender::Client server, Manager* manager, Cache* cache)
-      : server_(std::move(server)), manager_(manager), cache_(cache) {}
+  Executor(capnproto::FileSender::Client server, Manager* manager, Cache* cache,
+           std::string name)
+      : server_(std::move(server)),
+        manager_(manager),
+        cache_(cache),
+        name_(std::move(name)) {}
   Executor(Executor&&) = default;
   Executor& operator=(Executor&&) = default;
   ~Executor() = default;
@@ -46,6 +51,7 @@ class Executor : public capnproto::Evaluator::Server {
   capnproto::FileSender::Client server_;
   Manager* manager_;
   Cache* cache_;
+  std::string name_;
 };
 
 }  // namespace worker
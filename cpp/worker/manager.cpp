@@ -31,8 +31,9 @@ void Manager::OnDone() {
       pending_requests_++;
       auto server = client_.getMain<capnproto::MainServer>();
       auto req = server.registerEvaluatorRequest();
-      req.setName(name_ + " " + std::to_string(last_worker_id_++));
-      req.setEvaluator(kj::heap<Executor>(server, this, &cache_));
+      std::string name = name_ + " " + std::to_string(last_worker_id_++);
+      req.setName(name);
+      req.setEvaluator(kj::heap<Executor>(server, this, &cache_, name));
       req.send().detach([this](kj::Exception exc) {
         on_error_.fulfiller->reject(std::move(exc));
       });
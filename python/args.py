@@ -48,8 +48,27 @@ class Arch(Enum):
     I686 = 2  # force i686 32-bit executables
 
 
+class Statistic(Enum):
+    """
+    Statistic of the repeated runs of a testcase used for the verdict
+    """
+    MIN = 0  # the fastest run
+    MEDIAN = 1  # the run in the middle
+    MAX = 2  # the slowest run
+
+
+class ExportMode(Enum):
+    """
+    How the files are written in the task directory, the server store is
+    used only when the server is on the same filesystem
+    """
+    COPY = 0  # always copy the files
+    REFLINK = 1  # clone the files from the store, copy if not supported
+    HARDLINK = 2  # like reflink, then hard link the files from the store
+
+
 # patch the classes for argparse
-for cls in [UIS, CacheMode, TaskFormat, Arch]:
+for cls in [UIS, CacheMode, TaskFormat, Arch, Statistic, ExportMode]:
 
     def from_string(cls, name: str):
         try:
@@ -59,6 +78,9 @@ for cls in [UIS, CacheMode, TaskFormat, Arch]:
 
     cls.__new__ = from_string
     cls.__str__ = lambda self: self.name.lower()
+    # pickle calls the class with the value, which from_string rejects
+    cls.__reduce_ex__ = lambda self, protocol: (getattr,
+                                                (type(self), self.name))
 
 
 def _validate_num_cores(num: str) -> int:
@@ -115,6 +137,25 @@ def add_generic_group(parser: argparse.ArgumentParser, bulk: bool):
         nargs=2,
         metavar=("INPUT_FILE", "OUTPUT_FILE"),
         help="Fuzz the checker mutating the output file with radamsa")
+    group.add_argument(
+        "--plan",
+        action="store_true",
+        help="Build the DAG and print an estimate of the work without "
+        "running anything")
+    group.add_argument(
+        "--trace",
+        action="store",
+        metavar="FILE",
+        help="Write the timings of the executions in FILE as a Chrome trace")
+    group.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and evaluate the task again when it changes")
+    group.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Fetch and show the stderr of the generators, validators and "
+        "official solution also when they succeed")
 
 
 def add_remote_group(parser: argparse.ArgumentParser):
@@ -152,6 +193,13 @@ def add_remote_group(parser: argparse.ArgumentParser):
         action="store",
         type=int,
         help="Maximum size of the cache, in megabytes. 0 means unlimited")
+    group.add_argument(
+        "--export-mode",
+        help="How to write the inputs, outputs and executables in the task "
+        "directory",
+        action="store",
+        choices=list(ExportMode),
+        type=ExportMode)
 
 
 def add_server_group(parser: argparse.ArgumentParser):
@@ -208,6 +256,19 @@ def add_worker_group(parser: argparse.ArgumentParser):
         "--worker-verbose",
         action="store_true",
         help="Verbose logging for the worker")
+    group.add_argument(
+        "--worker-instances",
+        action="store",
+        type=int,
+        help="Number of local workers to spawn")
+    group.add_argument(
+        "--worker-pin",
+        action="store_true",
+        help="Pin each worker to a disjoint set of cores")
+    group.add_argument(
+        "--worker-numa",
+        action="store_true",
+        help="Pin each worker to cores of a single NUMA node")
 
 
 def add_execution_group(parser: argparse.ArgumentParser):
@@ -225,6 +286,25 @@ def add_execution_group(parser: argparse.ArgumentParser):
         "--copy-exe",
         help="Copy executable files in bin/ folder",
         action="store_true")
+    group.add_argument(
+        "--repeat",
+        help="Evaluate the solutions this many times on each testcase, "
+        "without the cache, and report the timing statistics. Add "
+        "--exclusive for steadier timings, at the cost of a whole worker per "
+        "run",
+        action="store",
+        type=int)
+    group.add_argument(
+        "--warmup",
+        help="With --repeat, run the solution once more before the timed "
+        "runs and discard its timing",
+        action="store_true")
+    group.add_argument(
+        "--repeat-statistic",
+        help="With --repeat, the run used for the verdict",
+        action="store",
+        choices=list(Statistic),
+        type=Statistic)
 
 
 def add_ioi_group(parser: argparse.ArgumentParser):
@@ -233,6 +313,24 @@ def add_ioi_group(parser: argparse.ArgumentParser):
         "--detailed-checker",
         help="Show the execution information also for the checker",
         action="store_true")
+    group.add_argument(
+        "--short-circuit",
+        help="Skip the remaining testcases of a min subtask once a solution "
+        "scored zero on it",
+        action="store_true")
+    group.add_argument(
+        "--subtask",
+        help="Generate and evaluate only these subtasks, e.g. 0,2-3",
+        action="store")
+    group.add_argument(
+        "--testcase",
+        help="Generate and evaluate only these testcases, e.g. 0-9,15",
+        action="store")
+    group.add_argument(
+        "--quick-feedback",
+        help="Evaluate first the first, the largest and the last testcase of "
+        "each subtask and show a provisional score",
+        action="store_true")
 
 
 def add_terry_group(parser: argparse.ArgumentParser):
@@ -249,6 +347,11 @@ def add_terry_group(parser: argparse.ArgumentParser):
         help="Seed for the terry generator",
         type=int,
         action="store")
+    group.add_argument(
+        "--seeds",
+        help="Evaluate each solution with this many seeds, starting from "
+        "--seed if set, or with this list of seeds, e.g. 1,5,10-20",
+        action="store")
 
 
 def add_statement_group(parser: argparse.ArgumentParser):
@@ -282,6 +385,10 @@ def add_bulk_group(parser: argparse.ArgumentParser):
         "--make-booklet",
         help="Build the booklet with the statements of all the tasks",
         action="store_true")
+    group.add_argument(
+        "--concurrent",
+        help="Evaluate all the tasks together sharing the workers",
+        action="store_true")
 
 
 def get_parser(bulk: bool) -> argparse.ArgumentParser:
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+from typing import BinaryIO, Callable, Optional
+
+# bytes kept from the beginning and from the end of a captured stream, enough
+# for the error messages shown by the UIs
+DEFAULT_HEAD = 16 * 1024
+DEFAULT_TAIL = 16 * 1024
+
+
+class StreamCapture:
+    """
+    Capture of the stdout or the stderr of an execution, fed chunk by chunk as
+    the file is received from the server. Only the first `head` and the last
+    `tail` bytes are kept in memory, the whole stream is written to `path` if
+    set and every chunk is passed to `on_chunk`.
+    """
+
+    def __init__(self,
+                 head: int = DEFAULT_HEAD,
+                 tail: int = DEFAULT_TAIL,
+                 path: Optional[str] = None,
+                 on_chunk: Optional[Callable[[bytes], None]] = None):
+        self.head = head
+        self.tail = tail
+        self.path = path
+        self.on_chunk = on_chunk
+        # total size of the stream, including the bytes not kept
+        self.size = 0
+        self.done = False
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._file = None  # type: Optional[BinaryIO]
+
+    def feed(self, chunk: bytes):
+        """
+        Add the next chunk of the stream, an empty chunk marks its end.
+        """
+        if self.done:
+            raise ValueError("The stream is already closed")
+        if self.path is not None and self._file is None:
+            self._file = open(self.path, "wb")
+        if not chunk:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.done = True
+            return
+        self.size += len(chunk)
+        if self._file is not None:
+            self._file.write(chunk)
+        if self.on_chunk:
+            self.on_chunk(chunk)
+        missing = self.head - len(self._head)
+        if missing > 0:
+            self._head += chunk[:missing]
+            chunk = chunk[missing:]
+        if self.tail > 0 and chunk:
+            self._tail += chunk[-self.tail:]
+            if len(self._tail) > self.tail:
+                del self._tail[:len(self._tail) - self.tail]
+
+    @property
+    def truncated(self) -> bool:
+        """
+        Whether some bytes in the middle of the stream were not kept
+        """
+        return self.size > len(self._head) + len(self._tail)
+
+    @property
+    def content_bytes(self) -> bytes:
+        """
+        The kept part of the stream, with a marker in place of the missing
+        bytes
+        """
+        if not self.truncated:
+            return bytes(self._head + self._tail)
+        omitted = self.size - len(self._head) - len(self._tail)
+        return bytes(self._head) + b"\n[... %d bytes omitted ...]\n" % \
+            omitted + bytes(self._tail)
+
+    @property
+    def content(self) -> str:
+        """
+        The kept part of the stream decoded as text, the cuts may split a
+        multibyte character
+        """
+        return self.content_bytes.decode(errors="replace")
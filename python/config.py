@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import os
-import pytoml
-from task_maker.args import CacheMode, UIS, TaskFormat, Arch
+from task_maker.args import CacheMode, UIS, TaskFormat, Arch, Statistic, \
+    ExportMode
 from typing import List, Optional, Tuple, Any, Union
 
 
@@ -9,11 +9,12 @@ class Config:
     OPTIONS = {
         "generic": [
             "solutions", "task_dir", "max_depth", "ui", "cache", "dry_run",
-            "no_sanity_checks", "clean", "task_info", "format", "fuzz_checker"
+            "no_sanity_checks", "clean", "task_info", "format", "fuzz_checker",
+            "plan", "trace", "watch", "verbose"
         ],
         "remote": [
             "server", "no_spawn", "run_server", "run_worker", "stop",
-            "storedir", "tempdir", "cache_size"
+            "storedir", "tempdir", "cache_size", "export_mode"
         ],
         "server": [
             "server_logfile", "server_pidfile", "server_address",
@@ -22,20 +23,29 @@ class Config:
         "worker": [
             "worker_logfile", "worker_pidfile", "worker_keep_sandboxes",
             "worker_name", "worker_num_cores", "worker_port", "worker_address",
-            "worker_pending_requests", "worker_verbose"
+            "worker_pending_requests", "worker_verbose", "worker_instances",
+            "worker_pin", "worker_numa"
         ],
-        "execution": ["exclusive", "extra_time", "copy_exe"],
-        "ioi": ["detailed_checker"],
-        "terry": ["arch", "seed"],
+        "execution": [
+            "exclusive", "extra_time", "copy_exe", "repeat", "warmup",
+            "repeat_statistic"
+        ],
+        "ioi": [
+            "detailed_checker", "short_circuit", "subtask", "testcase",
+            "quick_feedback"
+        ],
+        "terry": ["arch", "seed", "seeds"],
         "statement": ["no_statement", "set"],
         "help": ["help_colors"],
-        "bulk": ["contest_dir", "contest_yaml", "make_booklet"]
+        "bulk": ["contest_dir", "contest_yaml", "make_booklet", "concurrent"]
     }
     CUSTOM_TYPES = {
         "ui": UIS,
         "cache": CacheMode,
         "format": TaskFormat,
-        "arch": Arch
+        "arch": Arch,
+        "repeat_statistic": Statistic,
+        "export_mode": ExportMode
     }
 
     def __init__(self):
@@ -53,6 +63,10 @@ class Config:
         self.task_info = False
         self.format = None  # type: Optional[TaskFormat]
         self.fuzz_checker = None  # type: Tuple[str, str]
+        self.plan = False
+        self.trace = None  # type: Optional[str]
+        self.watch = False
+        self.verbose = False
 
         # remote group
         self.server = "127.0.0.1:7070"
@@ -63,6 +77,7 @@ class Config:
         self.storedir = "~/.cache/task-maker/files"
         self.tempdir = "~/.cache/task-maker/temp"
         self.cache_size = 2048  # in MiB
+        self.export_mode = ExportMode.REFLINK
         self._get_host_port()
         self._resolve_dir()
 
@@ -83,18 +98,29 @@ class Config:
         self.worker_address = "127.0.0.1"
         self.worker_pending_requests = None  # type: Optional[int]
         self.worker_verbose = False
+        self.worker_instances = 1
+        self.worker_pin = False
+        self.worker_numa = False
 
         # execution group
         self.exclusive = False
         self.extra_time = 0.0
         self.copy_exe = False
+        self.repeat = 1
+        self.warmup = False
+        self.repeat_statistic = Statistic.MEDIAN
 
         # IOI group
         self.detailed_checker = False
+        self.short_circuit = False
+        self.subtask = None  # type: Optional[str]
+        self.testcase = None  # type: Optional[str]
+        self.quick_feedback = False
 
         # terry group
         self.arch = Arch.DEFAULT
         self.seed = None
+        self.seeds = None  # type: Optional[str]
 
         # statement group
         self.no_statement = False
@@ -107,6 +133,7 @@ class Config:
         self.contest_dir = os.getcwd()
         self.contest_yaml = None
         self.make_booklet = False
+        self.concurrent = False
         # current index in bulk run and total number of bulk tasks
         self.bulk_number = None  # type: Optional[int]
         self.bulk_total = None  # type: Optional[int]
@@ -127,9 +154,12 @@ class Config:
         path = os.path.join(os.path.expanduser("~"), ".task-maker.toml")
         try:
             with open(path, "r") as f:
-                config = pytoml.loads(f.read())
+                content = f.read()
         except FileNotFoundError:
             return
+        # most users don't have a config file, don't import the parser for them
+        import pytoml
+        config = pytoml.loads(content)
         for group, items in config.items():
             if group not in Config.OPTIONS:
                 raise ValueError("Invalid group specified in config file: " +
@@ -192,6 +222,7 @@ class Config:
         _do_absolutize("worker_pidfile")
         _do_absolutize("contest_dir")
         _do_absolutize("contest_yaml")
+        _do_absolutize("trace")
         if self.fuzz_checker:
             _do_absolutize(0, self.fuzz_checker)
             _do_absolutize(1, self.fuzz_checker)
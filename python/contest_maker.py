@@ -9,9 +9,11 @@ from task_maker.config import Config
 from task_maker.detect_format import find_task_dir
 from task_maker.formats import Task
 from task_maker.manager import get_frontend
+from task_maker.remote import ExecutionPool
 from task_maker.task_maker import setup, run, get_task_format
+from task_maker.uis import UIInterface
 from task_maker.uis.bulk_finish_ui import BulkFinishUI
-from typing import List, Tuple
+from typing import List, Tuple, Optional, Iterator
 
 
 def get_task_paths(config: Config) -> List[str]:
@@ -43,6 +45,56 @@ def make_booklet(config: Config, tasks: List[str]) -> int:
     return task_format.make_booklet(frontend, config, res)
 
 
+def concurrent_run(config: Config, tasks: List[str],
+                   finish_ui: BulkFinishUI) -> int:
+    """
+    Build the DAGs of all the tasks on the same frontend and evaluate them
+    together, will return the exit code to use
+    """
+    frontend = get_frontend(config)
+    shared_pool = None  # type: Optional[ExecutionPool]
+    evaluations = []  # type: List[Tuple[str, UIInterface, Iterator]]
+    exitcode = 0
+    for index, task in enumerate(tasks):
+        config.bulk_number = index
+        try:
+            task_dir, fmt = find_task_dir(task, config.max_depth,
+                                          config.format)
+            if not fmt:
+                raise ValueError("Cannot detect format of " + task)
+            config.task_dir = task_dir
+            os.chdir(task_dir)
+            if config.ui != UIS.SILENT:
+                print("Building task %s [%d / %d]" %
+                      (task, config.bulk_number + 1, config.bulk_total))
+            interface, steps = get_task_format(fmt).prepare_evaluation(
+                frontend, config, shared_pool)
+            pool = next(steps, None)
+        except:
+            finish_ui.add_error("Failed to build " + task)
+            exitcode += 1
+            continue
+        if pool is None:
+            finish_ui.add_interface(interface)
+            exitcode += len(interface.errors)
+            continue
+        shared_pool = pool
+        evaluations.append((task_dir, interface, steps))
+
+    if shared_pool is not None:
+        if config.ui != UIS.SILENT:
+            print("Evaluating %d tasks" % len(evaluations))
+        shared_pool.start()
+    # the post-evaluation steps expect to run inside the task directory
+    for task_dir, interface, steps in evaluations:
+        config.task_dir = task_dir
+        os.chdir(task_dir)
+        next(steps, None)
+        finish_ui.add_interface(interface)
+        exitcode += len(interface.errors)
+    return exitcode
+
+
 def bulk_run(config: Config) -> int:
     """
     Run all the tasks using task-maker, will return the exit code to use
@@ -54,6 +106,11 @@ def bulk_run(config: Config) -> int:
         return make_booklet(config, tasks)
     config.bulk_total = len(tasks)
     finish_ui = BulkFinishUI(config)
+    if config.concurrent and not config.clean and not config.task_info:
+        exitcode = concurrent_run(config, tasks, finish_ui)
+        if config.ui != UIS.SILENT:
+            finish_ui.print()
+        return exitcode
     exitcode = 0
     for index, task in enumerate(tasks):
         config.task_dir = task
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import os
+from typing import Dict, Tuple, TYPE_CHECKING
+
+# the files are hashed without the frontend, so the task can be parsed without
+# loading it
+if TYPE_CHECKING:
+    from task_maker.task_maker_frontend import Frontend, File
+
+HASH_CACHE_VERSION = 1
+# size of the blocks in which the files are read to be hashed
+HASH_BLOCK_SIZE = 1 << 20
+
+
+class FileHashCache:
+    """
+    Persistent index of the hashes of the files provided to the frontend. A
+    file is identified by its path, inode, size and modification time, if any
+    of them changes the file is hashed again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hashes = dict()  # type: Dict[str, Tuple[int, int, int, str]]
+        self.dirty = False
+        self._load()
+
+    def get_hash(self, path: str) -> str:
+        """
+        Get the hex-encoded SHA256 of the file, using the index if the file
+        didn't change since the last time it was hashed.
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if path in self.hashes and tuple(self.hashes[path][:3]) == key:
+            return self.hashes[path][3]
+        digest = _hash_file(path)
+        self.hashes[path] = key + (digest, )
+        self.dirty = True
+        return digest
+
+    def save(self):
+        """
+        Write the index back to disk if something changed. The write is atomic
+        so concurrent runs can't corrupt the file.
+        """
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": HASH_CACHE_VERSION,
+                "hashes": self.hashes
+            }, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") != HASH_CACHE_VERSION:
+            return
+        self.hashes = data.get("hashes", dict())
+
+
+# the hash caches used during the run, by path
+_hash_caches = dict()  # type: Dict[str, FileHashCache]
+
+
+def get_hash_cache(path: str) -> FileHashCache:
+    """
+    Get the hash cache persisted at path, the same instance is shared by all
+    the users of the run so none of them overwrites the hashes of the others
+    """
+    if path not in _hash_caches:
+        _hash_caches[path] = FileHashCache(path)
+    return _hash_caches[path]
+
+
+class FileRegistry:
+    """
+    Registry of the files provided to the frontend during an evaluation. Each
+    path is sent to the frontend at most once, the following requests return
+    the same File.
+    """
+
+    def __init__(self, frontend: "Frontend", hash_cache: FileHashCache):
+        self.frontend = frontend
+        self.hash_cache = hash_cache
+        self.files = dict()  # type: Dict[Tuple[str, bool], File]
+        self.digests = dict()  # type: Dict[File, str]
+
+    def provide_file(self, path: str, description: str,
+                     is_executable: bool = False) -> "File":
+        """
+        Provide the file at path to the frontend, reusing the File if the same
+        path was already provided.
+        """
+        key = (os.path.abspath(path), is_executable)
+        if key not in self.files:
+            digest = self.hash_cache.get_hash(path)
+            self.files[key] = self.frontend.provideFile(
+                path, description, is_executable, digest)
+            self.digests[self.files[key]] = digest
+        return self.files[key]
+
+
+def _hash_file(path: str) -> str:
+    # the same hex-encoded SHA256 the server uses for the file
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
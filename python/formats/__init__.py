@@ -1,14 +1,21 @@
 #!/usr/bin/env python3
+import copy
 import glob
 import os.path
+import shlex
 from abc import ABC, abstractmethod
 from enum import Enum
 from task_maker.config import Config
 from task_maker.languages import GraderInfo, LanguageManager, Dependency, \
     Language
 from task_maker.source_file import SourceFile
-from task_maker.task_maker_frontend import Frontend
-from typing import List, Dict, Optional, Union, Any, Tuple
+from typing import List, Dict, Optional, Union, Any, Tuple, Iterator, Set, \
+    TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from task_maker.remote import ExecutionPool
+    from task_maker.task_maker_frontend import Frontend
+    from task_maker.uis import UIInterface
 
 # Name of the input file on disk when doing the validation process
 VALIDATION_INPUT_NAME = "tm_input_file"
@@ -334,13 +341,38 @@ class TaskFormat(ABC):
 
     @staticmethod
     @abstractmethod
-    def evaluate_task(frontend: Frontend, config: Config):
+    def evaluate_task(frontend: "Frontend", config: Config):
         """
         Given the connection to the Frontend and the Config start the evaluation
         of a task.
         """
         pass
 
+    @staticmethod
+    def update_task(frontend: "Frontend", config: Config,
+                    interface: "UIInterface", changed: List[str]) -> bool:
+        """
+        With --watch, evaluate again only the part of the task affected by the
+        changed files, relative to the task directory, updating the results of
+        the previous evaluation in the interface. False if the format cannot do
+        that, the whole task is evaluated again then.
+        """
+        return False
+
+    @staticmethod
+    @abstractmethod
+    def prepare_evaluation(
+            frontend: "Frontend", config: Config,
+            shared_pool: Optional["ExecutionPool"]
+    ) -> Tuple["UIInterface", Iterator["ExecutionPool"]]:
+        """
+        Like evaluate_task but the pool is not started: the returned iterator
+        yields the pool once the DAG is built, sharing the executions with
+        shared_pool if set. Resuming the iterator after the evaluation
+        completes the post-evaluation steps of the task.
+        """
+        pass
+
     @staticmethod
     @abstractmethod
     def clean():
@@ -367,7 +399,7 @@ class TaskFormat(ABC):
 
     @staticmethod
     @abstractmethod
-    def make_booklet(frontend: Frontend, config: Config,
+    def make_booklet(frontend: "Frontend", config: Config,
                      tasks: List[Tuple[str, Task]]) -> int:
         """
         Make the booklet of the specified tasks
@@ -436,6 +468,63 @@ def list_files(patterns: List[str],
     ]
 
 
+def parse_ranges(ranges: str) -> Set[int]:
+    """
+    Parse a comma separated list of numbers and inclusive ranges, like
+    "0,2-4,7", into the set of the numbers
+    """
+    numbers = set()  # type: Set[int]
+    for item in ranges.split(","):
+        item = item.strip()
+        try:
+            if "-" in item:
+                first, last = item.split("-", 1)
+                numbers.update(range(int(first), int(last) + 1))
+            else:
+                numbers.add(int(item))
+        except ValueError:
+            raise ValueError("Invalid range '%s' in '%s'" % (item, ranges))
+    return numbers
+
+
+def select_testcases(task: "IOITask", config: Config) -> "IOITask":
+    """
+    Restrict the task to the subtasks and the testcases selected with
+    --subtask and --testcase, the other ones are not generated nor evaluated.
+    The task is not modified, a copy with only the selected ones is returned.
+    """
+    if not config.subtask and not config.testcase:
+        return task
+    st_nums = parse_ranges(config.subtask) if config.subtask else None
+    tc_nums = parse_ranges(config.testcase) if config.testcase else None
+    selected = copy.copy(task)
+    selected.subtasks = dict()
+    for st_num, subtask in task.subtasks.items():
+        if st_nums is not None and st_num not in st_nums:
+            continue
+        testcases = dict((tc_num, testcase)
+                         for tc_num, testcase in subtask.testcases.items()
+                         if tc_nums is None or tc_num in tc_nums)
+        if not testcases:
+            continue
+        selected.subtasks[st_num] = copy.copy(subtask)
+        selected.subtasks[st_num].testcases = testcases
+    if not selected.subtasks:
+        raise ValueError("No testcase matches --subtask=%s --testcase=%s" %
+                         (config.subtask or "all", config.testcase or "all"))
+    return selected
+
+
+def split_args(line: str) -> List[str]:
+    """
+    Split a line in arguments like a shell would do. Most of the lines have no
+    quotes nor escapes and a plain split gives the same result much faster.
+    """
+    if "'" in line or '"' in line or "\\" in line:
+        return shlex.split(line)
+    return line.split()
+
+
 def parse_variable(arg: str, testcase: TestCase, subtask: Subtask, tc_num: int,
                    st_num: int) -> str:
     """
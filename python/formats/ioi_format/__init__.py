@@ -5,19 +5,18 @@ import os
 import pprint
 from task_maker.args import UIS
 from task_maker.config import Config
-from task_maker.formats import IOITask, TaskFormat, list_files, Task
-from task_maker.formats.ioi_format.execution import evaluate_task
-from task_maker.formats.ioi_format.fuzz_checker import fuzz_checker
+from task_maker.formats import IOITask, TaskFormat, list_files, Task, \
+    select_testcases
 from task_maker.formats.ioi_format.parsing import get_generator, get_task, \
     get_task_solutions
-from task_maker.printer import StdoutPrinter, Printer
-from task_maker.remote import ExecutionPool
-from task_maker.statements.oii_tex import OIITexStatement
-from task_maker.task_maker_frontend import Frontend, Result, ResultStatus
-from task_maker.uis import UIPrinter
-from task_maker.uis.ioi import IOIUIInterface
-from task_maker.formats.tmsocial_metadata import generate_metadata
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Iterator, Optional, TYPE_CHECKING
+
+# the modules needed only to evaluate the task (the frontend, the UIs, ...) are
+# imported when used, keeping fast the commands that only read the task
+if TYPE_CHECKING:
+    from task_maker.remote import ExecutionPool
+    from task_maker.task_maker_frontend import Frontend
+    from task_maker.uis.ioi import IOIUIInterface
 
 
 class IOIFormat(TaskFormat):
@@ -63,6 +62,7 @@ class IOIFormat(TaskFormat):
     def task_info(config: Config):
         task = get_task(config)
         if config.ui == UIS.TMSOCIAL:
+            from task_maker.formats.tmsocial_metadata import generate_metadata
             print(json.dumps(generate_metadata(task, config.task_dir)))
         elif config.ui == UIS.JSON:
             print(json.dumps(task.to_dict()))
@@ -74,18 +74,48 @@ class IOIFormat(TaskFormat):
         return get_task(config)
 
     @staticmethod
-    def evaluate_task(frontend: Frontend, config: Config) -> IOIUIInterface:
+    def evaluate_task(frontend: "Frontend",
+                      config: Config) -> "IOIUIInterface":
         """
         Evaluate the task, generating inputs and outputs, compiling all the
         files and checking all the specified solutions.
         """
-        task = get_task(config)
+        from task_maker.formats.ioi_format.execution import evaluate_task
+        task = select_testcases(get_task(config), config)
         solutions = get_task_solutions(config, task)
         return evaluate_task(frontend, task, solutions, config)
 
     @staticmethod
-    def make_booklet(frontend: Frontend, config: Config,
+    def update_task(frontend: "Frontend", config: Config,
+                    interface: "IOIUIInterface", changed: List[str]) -> bool:
+        """
+        Evaluate again only the part of the task affected by the changed
+        files, reusing the rest of the previous evaluation.
+        """
+        from task_maker.formats.ioi_format.execution import update_task
+        return update_task(frontend, config, interface, changed)
+
+    @staticmethod
+    def prepare_evaluation(
+            frontend: "Frontend", config: Config,
+            shared_pool: Optional["ExecutionPool"]
+    ) -> Tuple["IOIUIInterface", Iterator["ExecutionPool"]]:
+        from task_maker.formats.ioi_format.execution import create_interface, \
+            evaluation_steps
+        task = select_testcases(get_task(config), config)
+        solutions = get_task_solutions(config, task)
+        interface = create_interface(task, config)
+        return interface, evaluation_steps(frontend, task, solutions, config,
+                                           interface, shared_pool)
+
+    @staticmethod
+    def make_booklet(frontend: "Frontend", config: Config,
                      tasks: List[Tuple[str, IOITask]]) -> int:
+        from task_maker.printer import StdoutPrinter, Printer
+        from task_maker.remote import ExecutionPool
+        from task_maker.statements.oii_tex import OIITexStatement
+        from task_maker.task_maker_frontend import Result, ResultStatus
+        from task_maker.uis import UIPrinter
         statements = dict()  # type: Dict[str, List[OIITexStatement]]
         for path, task in tasks:
             config.task_dir = path
@@ -113,7 +143,7 @@ class IOIFormat(TaskFormat):
             compilation, pdf_file, deps = OIITexStatement.compile_booklet(
                 pool, texts, lang)
             if not pool.config.dry_run:
-                pdf_file.getContentsToFile(target_file)
+                pool.write_file(pdf_file, target_file)
 
             def on_done(res: Result):
                 nonlocal successful_compilations
@@ -128,4 +158,5 @@ class IOIFormat(TaskFormat):
 
     @staticmethod
     def fuzz_checker(config: Config):
+        from task_maker.formats.ioi_format.fuzz_checker import fuzz_checker
         fuzz_checker(config)
@@ -1,20 +1,47 @@
 #!/usr/bin/env python3
 import os
+import sys
 from task_maker.args import UIS
+from task_maker.capture import StreamCapture
 from task_maker.config import Config
+from task_maker.plan import ExecutionPlan, print_plan
 from task_maker.formats import IOITask, list_files, VALIDATION_INPUT_NAME, \
-    TaskType
+    TaskType, TestCase
 from task_maker.remote import ExecutionPool, Execution
-from task_maker.sanity_checks.ioi import sanity_pre_checks, sanity_post_checks
-from task_maker.solution import Solution
+from task_maker.sanity_checks.ioi import sanity_pre_checks, \
+    sanity_post_checks, PRE_CHECKS, POST_CHECKS
+from task_maker.solution import Solution, BatchSolution
 from task_maker.source_file import SourceFile
 from task_maker.statements.oii_tex import OIITexStatement
 from task_maker.task_maker_frontend import File, Frontend
-from task_maker.uis.ioi import IOIUIInterface, TestcaseGenerationStatus
+from task_maker.uis import FinishUI
+from task_maker.uis.ioi import IOIUIInterface, TestcaseGenerationStatus, \
+    TestcaseSolutionStatus
 from task_maker.uis.ioi_curses_ui import IOICursesUI
 from task_maker.uis.ioi_finish_ui import IOIFinishUI
 from task_maker.uis.ioi_finish_ui_json import IOIFinishUIJSON
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Iterator, Optional, Set, Iterable
+
+
+class EvaluationFiles:
+    """
+    The files of an evaluation of the task. With --watch the next evaluation
+    takes from the store of the server the ones that the changes do not affect,
+    instead of producing them again.
+    """
+
+    def __init__(self, solutions: List[Solution],
+                 inputs: Dict[Tuple[int, int], File],
+                 outputs: Dict[Tuple[int, int], File],
+                 validations: Dict[Tuple[int, int], File]):
+        self.solutions = dict((solution.solution.name, solution)
+                              for solution in solutions)
+        self.inputs = inputs
+        self.outputs = outputs
+        self.validations = validations
+        # (solution, subtask, testcase) -> output of the solution, only for
+        # the batch solutions evaluated once
+        self.solution_outputs = dict()  # type: Dict[Tuple[str, int, int], File]
 
 
 def evaluate_task(frontend: Frontend, task: IOITask, solutions: List[Solution],
@@ -23,18 +50,82 @@ def evaluate_task(frontend: Frontend, task: IOITask, solutions: List[Solution],
     Build the computation DAG and run the evaluation of the task. All the sanity
     checks are also run and a IOIUIInterface with all the results is returned.
     """
-    ui_interface = IOIUIInterface(
+    ui_interface = create_interface(task, config)
+    for pool in evaluation_steps(frontend, task, solutions, config,
+                                 ui_interface):
+        pool.start()
+    return ui_interface
+
+
+def create_interface(task: IOITask, config: Config) -> IOIUIInterface:
+    """
+    Create the IOIUIInterface that will hold the results of the evaluation
+    """
+    return IOIUIInterface(
         task,
         dict((st_num, [tc for tc in st.testcases.keys()])
              for st_num, st in task.subtasks.items()),
-        config.ui in [UIS.PRINT, UIS.JSON], config.ui == UIS.JSON, config.ui == UIS.TMSOCIAL)
-    pool = ExecutionPool(config, frontend, ui_interface.ui_printer)
+        config.ui in [UIS.PRINT, UIS.JSON] and not config.plan,
+        config.ui == UIS.JSON, config.ui == UIS.TMSOCIAL,
+        config.short_circuit, config.repeat_statistic, config.verbose)
+
+
+def evaluation_steps(frontend: Frontend,
+                     task: IOITask,
+                     solutions: List[Solution],
+                     config: Config,
+                     ui_interface: IOIUIInterface,
+                     shared_pool: Optional[ExecutionPool] = None
+                     ) -> Iterator[ExecutionPool]:
+    """
+    Build the computation DAG of the task and yield the pool once it's ready
+    to be started. When resumed, after the pool has been evaluated, the sanity
+    checks are run and the UIs are closed. Nothing is yielded if the DAG
+    cannot be built or if only the plan is requested.
+    """
+    pool = ExecutionPool(config, frontend, ui_interface.ui_printer,
+                         shared_pool)
     ui_interface.pool = pool
+    curses_ui, finish_ui = create_uis(config, ui_interface,
+                                      shared_pool is None)
+
+    sanity_checks = run_sanity_checks(config)
+    with ui_interface.run_in_ui(curses_ui, finish_ui):
+        ins, outs, vals = generate_inputs(pool, task, ui_interface)
+        files = EvaluationFiles(solutions, ins, outs, vals)
+        if config.quick_feedback:
+            ui_interface.sample = quick_feedback_sample(task)
+        evaluate_solutions(pool, files, ui_interface)
+        if not config.no_statement:
+            compile_statements(pool, task, ui_interface)
+        for warning in task.warnings:
+            ui_interface.add_warning(warning)
+        if sanity_checks:
+            sanity_pre_checks(task, solutions, pool, ui_interface)
+        if config.plan:
+            print_plan(ExecutionPlan(pool), config.ui == UIS.JSON)
+            return
+        yield pool
+        if not pool.stopped:
+            ui_interface.evaluation = files
+        if sanity_checks:
+            sanity_post_checks(task, solutions, ui_interface)
+
+
+def create_uis(config: Config, ui_interface: IOIUIInterface,
+               curses: bool = True
+               ) -> Tuple[Optional[IOICursesUI], Optional[FinishUI]]:
+    """
+    Create the curses UI, if curses is allowed, and the finish UI that show an
+    evaluation of the task, according to the config
+    """
     curses_ui = None
     finish_ui = None
-    if config.ui == UIS.CURSES:
+    if config.ui == UIS.CURSES and not config.plan and curses \
+            and not config.concurrent:
         curses_ui = IOICursesUI(config, ui_interface)
-    if config.ui != UIS.SILENT and config.bulk_number is None:
+    if config.ui != UIS.SILENT and config.bulk_number is None and \
+            not config.plan:
         if config.ui in [UIS.PRINT, UIS.CURSES]:
             finish_ui = IOIFinishUI(config, ui_interface)
         elif config.ui == UIS.JSON:
@@ -43,21 +134,245 @@ def evaluate_task(frontend: Frontend, task: IOITask, solutions: List[Solution],
             finish_ui = None
         else:
             raise ValueError("Unsupported UI %s" % str(config.ui))
+    return curses_ui, finish_ui
+
+
+def run_sanity_checks(config: Config) -> bool:
+    """
+    Whether the sanity checks are run, the checks about the whole task are
+    meaningless on a part of it
+    """
+    return not config.no_sanity_checks and not config.subtask and \
+        not config.testcase
+
+
+def update_task(frontend: Frontend, config: Config,
+                interface: IOIUIInterface, changed: List[str]) -> bool:
+    """
+    Evaluate again only the part of the task affected by the changed files,
+    after a completed evaluation with --watch: the changed sources are
+    compiled again and only the executions that depend on them are run, the
+    files of the others are taken from the store of the server. The results
+    are updated in the interface. False if the changes cannot be handled this
+    way, because a file that is not a source of the task changed or because
+    the server no longer has some file: the whole task has to be evaluated
+    again.
+    """
+    files = interface.evaluation  # type: Optional[EvaluationFiles]
+    if files is None or config.plan:
+        return False
+    # from now on a failure leaves the results half updated
+    interface.evaluation = None
+    task = interface.task
+    changed_paths = set(os.path.abspath(path) for path in changed)
+    solutions = list(files.solutions.values())
+    task_sources = _task_sources(task)
+    sources = task_sources + [sol.solution for sol in solutions]
+    known_paths = set()  # type: Set[str]
+    for source in sources:
+        known_paths |= _source_paths(source)
+    testcase_ids = []  # type: List[Tuple[int, int]]
+    for st_num, subtask in task.subtasks.items():
+        for tc_num, testcase in subtask.testcases.items():
+            testcase_ids.append((st_num, tc_num))
+            known_paths |= _testcase_paths(testcase)
+    if not changed_paths <= known_paths or \
+            not all(os.path.exists(path) for path in changed_paths):
+        return False
+
+    rebuilt = set(source for source in sources
+                  if _source_paths(source) & changed_paths)
+    for source in sources:
+        if source in rebuilt:
+            source.dependencies = source.language.get_dependencies(
+                source.path)
+            source.unprepare()
+        else:
+            source.unprepare(keep_executable=True)
+
+    batch = task.task_type == TaskType.Batch
+    regenerate = []  # type: List[Tuple[int, int]]
+    for st_num, tc_num in testcase_ids:
+        testcase = task.subtasks[st_num].testcases[tc_num]
+        used = set()  # type: Set[SourceFile]
+        stored = [files.inputs.get((st_num, tc_num))]
+        if not testcase.input_file:
+            used.add(testcase.generator.source_file)
+        if testcase.validator:
+            used.add(testcase.validator.source_file)
+            stored.append(files.validations.get((st_num, tc_num)))
+        if batch:
+            stored.append(files.outputs.get((st_num, tc_num)))
+            if not testcase.output_file:
+                used.add(task.official_solution)
+        # the testcases that failed are generated again too
+        if used & rebuilt or _testcase_paths(testcase) & changed_paths or \
+                not all(file is not None and file.hash() for file in stored):
+            regenerate.append((st_num, tc_num))
+
+    # solution -> testcases to evaluate again, or only to check again
+    evaluate = dict()  # type: Dict[str, Set[Tuple[int, int]]]
+    recheck = dict()  # type: Dict[str, Set[Tuple[int, int]]]
+    checker_rebuilt = task.checker is not None and task.checker in rebuilt
+    for name, solution in files.solutions.items():
+        status = interface.testing[name]
+        evaluate[name] = set()
+        recheck[name] = set()
+        if solution.solution in rebuilt or (checker_rebuilt and not batch):
+            # a new manager runs together with the solution
+            evaluate[name] = set(testcase_ids)
+            continue
+        if solution.solution.executable is None:
+            # it did not compile, nothing changes
+            continue
+        evaluate[name] = set(regenerate)
+        if checker_rebuilt:
+            for testcase_id in set(testcase_ids) - evaluate[name]:
+                output = files.solution_outputs.get((name, ) + testcase_id)
+                st_num, tc_num = testcase_id
+                info = status.testcase_results[st_num][tc_num]
+                if output is not None and output.hash():
+                    recheck[name].add(testcase_id)
+                elif output is None or \
+                        info.status == TestcaseSolutionStatus.SKIPPED:
+                    evaluate[name].add(testcase_id)
+        # the testcases skipped by a short-circuit may be needed now
+        for st_num in set(st for st, _ in evaluate[name] | recheck[name]):
+            if st_num not in status.short_circuited:
+                continue
+            for tc_num, info in status.testcase_results[st_num].items():
+                if info.status == TestcaseSolutionStatus.SKIPPED:
+                    evaluate[name].add((st_num, tc_num))
+        recheck[name] -= evaluate[name]
+
+    pool = ExecutionPool(config, frontend, interface.ui_printer)
+    interface.pool = pool
+    curses_ui, finish_ui = create_uis(config, interface)
+    sanity_checks = run_sanity_checks(config)
+    completed = False
+    missing = 0
+    with interface.run_in_ui(curses_ui, finish_ui):
+        provided = set(regenerate)
+
+        def provide(testcase_id: Tuple[int, int]):
+            # the files of a testcase from the previous evaluation
+            if testcase_id in provided:
+                return
+            provided.add(testcase_id)
+            for kind, task_files in [("Input", files.inputs),
+                                     ("Output", files.outputs),
+                                     ("Validation", files.validations)]:
+                if testcase_id in task_files:
+                    task_files[testcase_id] = pool.provide_stored_file(
+                        task_files[testcase_id],
+                        "%s %d" % (kind, testcase_id[1]))
+
+        for source in task_sources:
+            if source in rebuilt:
+                _prepare_source(pool, interface, source)
+        for testcase_id in regenerate:
+            interface.reset_testcase(*testcase_id)
+            for task_files in [files.inputs, files.outputs, files.validations]:
+                task_files.pop(testcase_id, None)
+            generate_testcase(pool, task, interface, testcase_id, files.inputs,
+                              files.outputs, files.validations)
+        if task.checker and (any(evaluate.values()) or
+                             any(recheck.values())):
+            _prepare_source(pool, interface, task.checker)
+
+        for name, solution in files.solutions.items():
+            source = solution.solution
+            if source in rebuilt:
+                source.prepare(pool)
+                # the results of the previous version are discarded
+                interface.add_solution(source)
+            elif evaluate[name] or recheck[name]:
+                source.prepare(pool)
+            status = interface.testing[name]
+            for testcase_id in _sample_first(evaluate[name], interface):
+                if source not in rebuilt:
+                    status.reset_testcase(*testcase_id)
+                # the generation of the testcase may have failed
+                if testcase_id in files.inputs:
+                    provide(testcase_id)
+                    evaluate_testcase(solution, testcase_id, files, interface)
+            for testcase_id in _sample_first(recheck[name], interface):
+                st_num, tc_num = testcase_id
+                provide(testcase_id)
+                status.reset_testcase(st_num, tc_num, keep_evaluation=True)
+                output = pool.provide_stored_file(
+                    files.solution_outputs[(name, ) + testcase_id],
+                    "Output of %s on testcase %d" % (name, tc_num))
+                files.solution_outputs[(name, ) + testcase_id] = output
+                check = solution.check(tc_num, st_num,
+                                       files.inputs[testcase_id], output,
+                                       files.outputs[testcase_id])
+                interface.add_evaluate_checking(st_num, tc_num, name, check)
+
+        # the sample cases depend on the validator, the official solution and
+        # the checker
+        sample_sources = {task.official_solution, task.checker}
+        if task.default_val:
+            sample_sources.add(task.default_val.source_file)
+        if sanity_checks and sample_sources & rebuilt:
+            interface.forget_messages(PRE_CHECKS)
+            if task.default_val:
+                _prepare_source(pool, interface, task.default_val.source_file)
+            sanity_pre_checks(task, solutions, pool, interface)
 
-    with ui_interface.run_in_ui(curses_ui, finish_ui):
-        ins, outs, vals = generate_inputs(pool, task, ui_interface)
-        evaluate_solutions(pool, ins, outs, vals, solutions, ui_interface)
-        if not config.no_statement:
-            compile_statements(pool, task, ui_interface)
-        for warning in task.warnings:
-            ui_interface.add_warning(warning)
-        if not config.no_sanity_checks:
-            sanity_pre_checks(task, solutions, pool, ui_interface)
         pool.start()
-        if not config.no_sanity_checks:
-            sanity_post_checks(task, solutions, ui_interface)
+        missing = frontend.missingFiles()
+        if not pool.stopped and not missing:
+            completed = True
+            if sanity_checks:
+                interface.forget_messages(POST_CHECKS)
+                sanity_post_checks(task, solutions, interface)
+    if missing:
+        print("%d files of the previous evaluation are no longer on the "
+              "server, evaluating the whole task" % missing,
+              file=sys.stderr)
+    if not completed:
+        return pool.stopped
+    interface.evaluation = files
+    return True
 
-    return ui_interface
+
+def _task_sources(task: IOITask) -> List[SourceFile]:
+    """
+    The non-solution source files of the task, each one once
+    """
+    sources = [task.checker, task.official_solution]
+    for program in [task.default_gen, task.default_val]:
+        if program:
+            sources.append(program.source_file)
+    for subtask in task.subtasks.values():
+        for testcase in subtask.testcases.values():
+            if testcase.generator:
+                sources.append(testcase.generator.source_file)
+            if testcase.validator:
+                sources.append(testcase.validator.source_file)
+    return list(
+        dict.fromkeys(source for source in sources if source is not None))
+
+
+def _source_paths(source: SourceFile) -> Set[str]:
+    """
+    The absolute paths of the files a source file is built from
+    """
+    paths = [source.path] + [dep.path for dep in source.dependencies]
+    if source.grader:
+        paths += [dep.path for dep in source.grader.files]
+    return set(os.path.abspath(path) for path in paths)
+
+
+def _testcase_paths(testcase: TestCase) -> Set[str]:
+    """
+    The absolute paths of the static files of a testcase
+    """
+    paths = [dep.path for dep in testcase.extra_deps]
+    paths += [path for path in [testcase.input_file, testcase.output_file]
+              if path]
+    return set(os.path.abspath(path) for path in paths)
 
 
 def generate_inputs(
@@ -69,161 +384,234 @@ def generate_inputs(
     return 3 dicts: one for input, one for output and one for validations.
     Each dict has (subtask number, test case number) -> File
     """
-
-    def add_non_solution(source: SourceFile):
-        if not source.prepared:
-            source.prepare(pool)
-            interface.add_non_solution(source)
-
     inputs = dict()  # type: Dict[Tuple[int, int], File]
     outputs = dict()  # type: Dict[Tuple[int, int], File]
     validations = dict()  # type: Dict[Tuple[int, int], File]
     for st_num, subtask in task.subtasks.items():
-        for tc_num, testcase in subtask.testcases.items():
-            testcase_id = (st_num, tc_num)
+        for tc_num in subtask.testcases:
+            generate_testcase(pool, task, interface, (st_num, tc_num), inputs,
+                              outputs, validations)
+    if task.checker:
+        _prepare_source(pool, interface, task.checker)
+    return inputs, outputs, validations
 
-            if testcase.validator:
-                add_non_solution(testcase.validator.source_file)
-
-            # static input file
-            if testcase.input_file:
-                try:
-                    inputs[testcase_id] = pool.frontend.provideFile(
-                        testcase.input_file, "Static input %d" % tc_num, False)
-
-                    if testcase.validator:
-                        val = Execution(
-                            "Validation of input %d" % tc_num,
-                            pool,
-                            testcase.validator.source_file,
-                            testcase.validator.get_args(
-                                testcase, subtask, tc_num, st_num + 1),
-                            "validation", {
-                                "subtask": st_num,
-                                "testcase": tc_num
-                            },
-                            inputs={
-                                VALIDATION_INPUT_NAME: inputs[testcase_id]
-                            },
-                            store_stderr=True)
-                        validations[testcase_id] = val.stdout
-
-                        interface.add_validation(st_num, tc_num, val)
-                except RuntimeError as ex:
-                    interface.add_error(str(ex))
-                    interface.subtasks[st_num][
-                        tc_num].status = TestcaseGenerationStatus.FAILURE
-                    continue
-            # generate input file
-            else:
-                add_non_solution(testcase.generator.source_file)
-
-                deps = dict()
-                for dep in testcase.extra_deps:
-                    deps[dep.name] = pool.frontend.provideFile(
-                        dep.path, dep.path, False)
-                gen = Execution(
-                    "Generation of input %d" % tc_num,
-                    pool,
-                    testcase.generator.source_file,
-                    testcase.generator_args,
-                    "generation", {
-                        "subtask": st_num,
-                        "testcase": tc_num
-                    },
-                    inputs=deps,
-                    store_stderr=True)
-                inputs[testcase_id] = gen.stdout
 
-                interface.add_generation(st_num, tc_num, gen)
+def generate_testcase(pool: ExecutionPool, task: IOITask,
+                      interface: IOIUIInterface, testcase_id: Tuple[int, int],
+                      inputs: Dict[Tuple[int, int], File],
+                      outputs: Dict[Tuple[int, int], File],
+                      validations: Dict[Tuple[int, int], File]):
+    """
+    Create the part of the DAG that generates, validates and solves a
+    testcase, adding its files to the dicts of generate_inputs
+    """
+    st_num, tc_num = testcase_id
+    subtask = task.subtasks[st_num]
+    testcase = subtask.testcases[tc_num]
+
+    if testcase.validator:
+        _prepare_source(pool, interface, testcase.validator.source_file)
 
+    # static input file
+    if testcase.input_file:
+        try:
+            inputs[testcase_id] = pool.provide_file(
+                testcase.input_file, "Static input %d" % tc_num, False)
+
+            if testcase.validator:
                 val = Execution(
                     "Validation of input %d" % tc_num,
                     pool,
                     testcase.validator.source_file,
-                    testcase.validator.get_args(testcase, subtask, tc_num,
-                                                st_num + 1),
+                    testcase.validator.get_args(
+                        testcase, subtask, tc_num, st_num + 1),
                     "validation", {
                         "subtask": st_num,
                         "testcase": tc_num
                     },
                     inputs={VALIDATION_INPUT_NAME: inputs[testcase_id]},
-                    store_stderr=True)
+                    stderr_capture=StreamCapture(),
+                    lazy_stderr=True)
                 validations[testcase_id] = val.stdout
 
                 interface.add_validation(st_num, tc_num, val)
+        except RuntimeError as ex:
+            interface.add_error(str(ex), ("testcase", st_num, tc_num))
+            interface.subtasks[st_num][
+                tc_num].status = TestcaseGenerationStatus.FAILURE
+            return
+    # generate input file
+    else:
+        _prepare_source(pool, interface, testcase.generator.source_file)
 
-            if testcase.write_input_to and not pool.config.dry_run:
-                inputs[testcase_id].getContentsToFile(testcase.write_input_to)
-
-            if task.task_type == TaskType.Batch:
-                # static output file
-                if testcase.output_file:
-                    outputs[testcase_id] = pool.frontend.provideFile(
-                        testcase.output_file, "Static output %d" % tc_num,
-                        False)
-                else:
-                    add_non_solution(task.official_solution)
-                    deps = {"wait_for_validation": validations[testcase_id]}
-                    if task.input_file:
-                        deps[task.input_file] = inputs[testcase_id]
-                        stdin = None
-                    else:
-                        stdin = inputs[testcase_id]
-                    outs = []
-                    if task.output_file:
-                        outs.append(task.output_file)
-
-                    sol = Execution(
-                        "Generation of output %d" % tc_num,
-                        pool,
-                        task.official_solution, [],
-                        "solution", {
-                            "subtask": st_num,
-                            "testcase": tc_num
-                        },
-                        inputs=deps,
-                        outputs=outs,
-                        stdin=stdin,
-                        store_stderr=True)
-                    if task.output_file:
-                        outputs[testcase_id] = sol.output(task.output_file)
-                    else:
-                        outputs[testcase_id] = sol.stdout
-
-                    interface.add_solving(st_num, tc_num, sol)
-
-                if testcase.write_output_to and not pool.config.dry_run:
-                    outputs[testcase_id].getContentsToFile(
-                        testcase.write_output_to, True, True)
-    if task.checker:
-        add_non_solution(task.checker)
-    return inputs, outputs, validations
+        deps = dict()
+        for dep in testcase.extra_deps:
+            deps[dep.name] = pool.provide_file(dep.path, dep.path, False)
+        gen = Execution(
+            "Generation of input %d" % tc_num,
+            pool,
+            testcase.generator.source_file,
+            testcase.generator_args,
+            "generation", {
+                "subtask": st_num,
+                "testcase": tc_num
+            },
+            inputs=deps,
+            stderr_capture=StreamCapture(),
+            lazy_stderr=True)
+        inputs[testcase_id] = gen.stdout
+
+        interface.add_generation(st_num, tc_num, gen)
 
+        val = Execution(
+            "Validation of input %d" % tc_num,
+            pool,
+            testcase.validator.source_file,
+            testcase.validator.get_args(testcase, subtask, tc_num,
+                                        st_num + 1),
+            "validation", {
+                "subtask": st_num,
+                "testcase": tc_num
+            },
+            inputs={VALIDATION_INPUT_NAME: inputs[testcase_id]},
+            stderr_capture=StreamCapture(),
+            lazy_stderr=True)
+        validations[testcase_id] = val.stdout
 
-def evaluate_solutions(pool: ExecutionPool,
-                       inputs: Dict[Tuple[int, int], File],
-                       outputs: Dict[Tuple[int, int], File],
-                       validations: Dict[Tuple[int, int], File],
-                       solutions: List[Solution], interface: IOIUIInterface):
+        interface.add_validation(st_num, tc_num, val)
+
+    if testcase.write_input_to and not pool.config.dry_run:
+        pool.write_file(inputs[testcase_id], testcase.write_input_to)
+
+    if task.task_type == TaskType.Batch:
+        # static output file
+        if testcase.output_file:
+            outputs[testcase_id] = pool.provide_file(
+                testcase.output_file, "Static output %d" % tc_num, False)
+        else:
+            _prepare_source(pool, interface, task.official_solution)
+            deps = {"wait_for_validation": validations[testcase_id]}
+            if task.input_file:
+                deps[task.input_file] = inputs[testcase_id]
+                stdin = None
+            else:
+                stdin = inputs[testcase_id]
+            outs = []
+            if task.output_file:
+                outs.append(task.output_file)
+
+            sol = Execution(
+                "Generation of output %d" % tc_num,
+                pool,
+                task.official_solution, [],
+                "solution", {
+                    "subtask": st_num,
+                    "testcase": tc_num
+                },
+                inputs=deps,
+                outputs=outs,
+                stdin=stdin,
+                stderr_capture=StreamCapture(),
+                lazy_stderr=True)
+            if task.output_file:
+                outputs[testcase_id] = sol.output(task.output_file)
+            else:
+                outputs[testcase_id] = sol.stdout
+
+            interface.add_solving(st_num, tc_num, sol)
+
+        if testcase.write_output_to and not pool.config.dry_run:
+            pool.write_file(outputs[testcase_id], testcase.write_output_to)
+
+
+def _prepare_source(pool: ExecutionPool, interface: IOIUIInterface,
+                    source: SourceFile):
+    """
+    Prepare a non-solution source file in the pool, tracking its compilation
+    if it is compiled in this pool
+    """
+    if source.prepared:
+        return
+    compilation = source.compilation
+    source.prepare(pool)
+    if compilation is None or source.compilation is not compilation:
+        interface.add_non_solution(source)
+
+
+def quick_feedback_sample(task: IOITask) -> Dict[int, Set[int]]:
+    """
+    Pick the testcases evaluated first with --quick-feedback: the first, the
+    largest and the last of each subtask. The largest is guessed from the
+    inputs of the previous run, the one in the middle is used if there are
+    none yet.
+    """
+    sample = dict()  # type: Dict[int, Set[int]]
+    for st_num, subtask in task.subtasks.items():
+        tc_nums = list(subtask.testcases.keys())
+        if not tc_nums:
+            continue
+        sizes = dict()  # type: Dict[int, int]
+        for tc_num, testcase in subtask.testcases.items():
+            path = testcase.input_file or testcase.write_input_to
+            if path and os.path.exists(path):
+                sizes[tc_num] = os.path.getsize(path)
+        if sizes:
+            largest = max(sizes, key=lambda tc_num: sizes[tc_num])
+        else:
+            largest = tc_nums[len(tc_nums) // 2]
+        sample[st_num] = {tc_nums[0], largest, tc_nums[-1]}
+    return sample
+
+
+def evaluate_solutions(pool: ExecutionPool, files: EvaluationFiles,
+                       interface: IOIUIInterface):
     """
     Create the evaluation part of the DAG, for each solution at least 2
     executions will be run: the evaluation that produces an output file and
-    the checking that produces a score.
+    the checking that produces a score. The testcases in the sample of the
+    interface, if any, are evaluated before the others.
     """
-    for solution in solutions:
+    testcase_ids = _sample_first(files.inputs.keys(), interface)
+    for solution in files.solutions.values():
         solution.solution.prepare(pool)
         interface.add_solution(solution.solution)
-        for testcase_id, input in inputs.items():
-            st_num, tc_num = testcase_id
-            evals, check = solution.evaluate(tc_num, st_num,
-                                             inputs[testcase_id],
-                                             validations.get(testcase_id),
-                                             outputs.get(testcase_id))
-            interface.add_evaluate_solution(st_num, tc_num,
-                                            solution.solution.name, evals)
-            interface.add_evaluate_checking(st_num, tc_num,
-                                            solution.solution.name, check)
+        for testcase_id in testcase_ids:
+            evaluate_testcase(solution, testcase_id, files, interface)
+
+
+def evaluate_testcase(solution: Solution, testcase_id: Tuple[int, int],
+                      files: EvaluationFiles, interface: IOIUIInterface):
+    """
+    Create the part of the DAG that evaluates the solution on a testcase, the
+    solution must be prepared
+    """
+    st_num, tc_num = testcase_id
+    name = solution.solution.name
+    evals, check = solution.evaluate(tc_num, st_num, files.inputs[testcase_id],
+                                     files.validations.get(testcase_id),
+                                     files.outputs.get(testcase_id))
+    warmup, runs, checks = solution.timed_runs.pop(testcase_id,
+                                                   (None, [], []))
+    if tc_num in interface.sample.get(st_num, ()):
+        for execution in evals + runs + checks + [warmup, check]:
+            if execution is not None:
+                execution.sample = True
+    if runs:
+        interface.add_repeated_evaluation(st_num, tc_num, name, runs, checks,
+                                          warmup)
+        return
+    if isinstance(solution, BatchSolution):
+        files.solution_outputs[(name, ) + testcase_id] = \
+            solution.get_output(evals[0])
+    interface.add_evaluate_solution(st_num, tc_num, name, evals)
+    interface.add_evaluate_checking(st_num, tc_num, name, check)
+
+
+def _sample_first(testcase_ids: Iterable[Tuple[int, int]],
+                  interface: IOIUIInterface) -> List[Tuple[int, int]]:
+    sample = interface.sample
+    return sorted(
+        testcase_ids, key=lambda tc: tc[1] not in sample.get(tc[0], ()))
 
 
 def compile_statements(pool: ExecutionPool, task: IOITask,
@@ -239,5 +627,5 @@ def compile_statements(pool: ExecutionPool, task: IOITask,
         statement = OIITexStatement(task, os.path.abspath(tex_file))
         statement.compile(pool, language)
         if not pool.config.dry_run:
-            statement.pdf_file.getContentsToFile(pdf_file, True, True)
+            pool.write_file(statement.pdf_file, pdf_file)
         interface.add_statement(statement)
@@ -3,6 +3,7 @@ import json
 import os.path
 import random
 import shutil
+from task_maker.capture import StreamCapture
 from task_maker.config import Config
 from task_maker.manager import get_frontend
 from task_maker.printer import Printer
@@ -35,7 +36,7 @@ class FuzzCheckerState:
 
         def check_on_done(res: Result):
             failed = False
-            out = checker.stdout_content_bytes
+            out = checker.stdout_capture.content_bytes
             score = -1
             try:
                 score = float(out.decode())
@@ -46,19 +47,22 @@ class FuzzCheckerState:
             if res.status != ResultStatus.SUCCESS:
                 failed = True
 
+            captures = {
+                "fuzz_output": generator.stdout_capture,
+                "checker_stdout": checker.stdout_capture,
+                "checker_stderr": checker.stderr_capture
+            }
             if not failed:
                 self.num_successes += 1
+                for capture in captures.values():
+                    os.remove(capture.path)
                 return
 
             self.num_fails += 1
             dest_dir = os.path.join(results_dir, "fail%d" % self.num_fails)
             os.makedirs(dest_dir, exist_ok=True)
-            with open(os.path.join(dest_dir, "fuzz_output"), "wb") as f:
-                f.write(generator.stdout_content_bytes)
-            with open(os.path.join(dest_dir, "checker_stdout"), "wb") as f:
-                f.write(checker.stdout_content_bytes)
-            with open(os.path.join(dest_dir, "checker_stderr"), "wb") as f:
-                f.write(checker.stderr_content_bytes)
+            for name, capture in captures.items():
+                os.replace(capture.path, os.path.join(dest_dir, name))
             with open(os.path.join(dest_dir, "data.json"), "w") as f:
                 data = {
                     "data": checker.ui_print_data,
@@ -83,7 +87,10 @@ def fuzz_checker(config: Config):
         raise ValueError("This task does not have a checker")
 
     results_dir = os.path.join(config.cwd, "fuzz_checker_" + task.name)
-    os.makedirs(results_dir, exist_ok=True)
+    # the outputs are written here while they are received, only the ones of
+    # the failed tests are kept
+    tmp_dir = os.path.join(results_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
     shutil.copy(in_file, os.path.join(results_dir, "input.txt"))
     shutil.copy(out_file, os.path.join(results_dir, "output.txt"))
 
@@ -94,8 +101,8 @@ def fuzz_checker(config: Config):
         frontend = get_frontend(config)
         pool = ExecutionPool(config, frontend, ui_printer)
 
-        input = frontend.provideFile(in_file, "Input file")
-        output = frontend.provideFile(out_file, "Output file")
+        input = pool.provide_file(in_file, "Input file")
+        output = pool.provide_file(out_file, "Output file")
         task.checker.unprepare()
         task.checker.prepare(pool)
 
@@ -113,7 +120,8 @@ def fuzz_checker(config: Config):
                 },
                 cache_on=[],
                 stdin=output,
-                store_stdout_bytes=True)
+                stdout_capture=StreamCapture(
+                    0, 0, os.path.join(tmp_dir, "%d_fuzz_output" % num)))
             fuzz_output = gen.stdout
             check = Execution(
                 "Checking output %d of batch %d" % (num, state.batch_num),
@@ -131,8 +139,10 @@ def fuzz_checker(config: Config):
                     "output": output,
                     "fuzz": fuzz_output
                 },
-                store_stdout_bytes=True,
-                store_stderr_bytes=True)
+                stdout_capture=StreamCapture(
+                    path=os.path.join(tmp_dir, "%d_checker_stdout" % num)),
+                stderr_capture=StreamCapture(
+                    0, 0, os.path.join(tmp_dir, "%d_checker_stderr" % num)))
             state.bind(results_dir, gen, check)
 
         def compilation_on_done(res: Result):
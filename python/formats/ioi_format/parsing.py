@@ -2,18 +2,20 @@
 
 import glob
 import os
-import ruamel.yaml
-import shlex
 from task_maker.args import Arch
 from task_maker.config import Config
 from task_maker.formats import ScoreMode, Subtask, TestCase, IOITask, \
     list_files, Validator, Generator, get_options, gen_grader_map, \
-    get_write_input_file, get_write_output_file, TaskType, get_solutions
+    get_write_input_file, get_write_output_file, TaskType, get_solutions, \
+    split_args
 from task_maker.sanitize import sanitize_command
-from task_maker.solution import Solution, BatchSolution, CommunicationSolution
 from task_maker.source_file import SourceFile
 from typing import Dict, List, Any
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
+
+# the solutions need the frontend, which is not needed to parse the task
+if TYPE_CHECKING:
+    from task_maker.solution import Solution
 
 
 def load_static_testcases() -> Subtask:
@@ -153,6 +155,8 @@ def gen_testcases(copy_compiled: bool, task: IOITask) -> Dict[int, Subtask]:
     subtask_num = -1  # the first #ST line will skip a subtask!
     testcase_num = 0
     current_score = 0.0
+    # the same arguments are usually repeated in many lines
+    exists = dict()  # type: Dict[str, bool]
     for line in open("gen/GEN"):
         if line.startswith("#ST:"):
             create_subtask(subtask_num, current_testcases, current_score)
@@ -171,8 +175,8 @@ def gen_testcases(copy_compiled: bool, task: IOITask) -> Dict[int, Subtask]:
             # a new testcase without subtask
             if subtask_num < 0:
                 subtask_num = 0
-            args = shlex.split(line)
-            arg_deps = sanitize_command(args)
+            args = split_args(line)
+            arg_deps = sanitize_command(args, exists)
             testcase = TestCase(generator, validator, args, arg_deps, None,
                                 None, get_write_input_file(testcase_num),
                                 get_write_output_file(testcase_num))
@@ -211,6 +215,7 @@ def parse_task_yaml() -> Dict[str, Any]:
     """
     Gets the content of the task.yaml file
     """
+    import ruamel.yaml
     path = detect_yaml()
     with open(path) as yaml_file:
         return ruamel.yaml.safe_load(yaml_file)
@@ -285,22 +290,28 @@ def get_task_without_testcases(config: Config) -> IOITask:
 
 def get_task(config: Config) -> IOITask:
     """
-    Given the Config build all the information about a task.
+    Given the Config build all the information about a task. The parsed task
+    is reused from the previous run if none of its files changed.
     """
-    task = get_task_without_testcases(config)
-    subtasks = gen_testcases(config.copy_exe, task)
-    for subtask_num, subtask in subtasks.items():
-        task.subtasks[subtask_num] = subtask
-    return task
+    from task_maker.task_cache import get_cached_task
+
+    def build():
+        task = get_task_without_testcases(config)
+        subtasks = gen_testcases(config.copy_exe, task)
+        for subtask_num, subtask in subtasks.items():
+            task.subtasks[subtask_num] = subtask
+        return task
 
+    return get_cached_task(config, "ioi", [detect_yaml(), "gen/GEN"], build)
 
-def get_task_solutions(config: Config, task: IOITask) -> List[Solution]:
+
+def get_task_solutions(config: Config, task: IOITask) -> List["Solution"]:
     """
     Search all the solutions in the sol/ directory (and according to the filters
     specified in the config) prepare and put them in a list.
     """
-    data = parse_task_yaml()
-    num_processes = get_options(data, ["num_processes"], 1)
+    from task_maker.solution import BatchSolution, CommunicationSolution
+    num_processes = get_options(task.yaml, ["num_processes"], 1)
     graders = get_graders(task)
     solutions = get_solutions(config.solutions, "sol/", graders)
     sols = []  # type: List[Solution]
@@ -6,10 +6,13 @@ import pprint
 from task_maker.args import UIS
 from task_maker.config import Config
 from task_maker.formats import TaskFormat, Task
-from task_maker.formats.terry_format.execution import evaluate_task
 from task_maker.formats.terry_format.parsing import get_task, get_task_solutions
-from task_maker.task_maker_frontend import Frontend
-from typing import List, Tuple
+from typing import List, Tuple, Iterator, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from task_maker.remote import ExecutionPool
+    from task_maker.task_maker_frontend import Frontend
+    from task_maker.uis.terry import TerryUIInterface
 
 
 class TerryFormat(TaskFormat):
@@ -45,16 +48,30 @@ class TerryFormat(TaskFormat):
         return get_task(config)
 
     @staticmethod
-    def evaluate_task(frontend: Frontend, config: Config):
+    def evaluate_task(frontend: "Frontend", config: Config):
         """
         Evaluate the task, compiling the solutions and testing them.
         """
+        from task_maker.formats.terry_format.execution import evaluate_task
         task = get_task(config)
         solutions = get_task_solutions(config, task)
         return evaluate_task(frontend, task, solutions, config)
 
     @staticmethod
-    def make_booklet(frontend: Frontend, config: Config,
+    def prepare_evaluation(
+            frontend: "Frontend", config: Config,
+            shared_pool: Optional["ExecutionPool"]
+    ) -> Tuple["TerryUIInterface", Iterator["ExecutionPool"]]:
+        from task_maker.formats.terry_format.execution import \
+            create_interface, evaluation_steps
+        task = get_task(config)
+        solutions = get_task_solutions(config, task)
+        interface = create_interface(task, config)
+        return interface, evaluation_steps(frontend, task, solutions, config,
+                                           interface, shared_pool)
+
+    @staticmethod
+    def make_booklet(frontend: "Frontend", config: Config,
                      tasks: List[Tuple[str, Task]]) -> int:
         raise NotImplementedError("Terry booklets are not supported yet")
 
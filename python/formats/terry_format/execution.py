@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
+import collections
 import random
 from task_maker.args import CacheMode, UIS
+from task_maker.capture import StreamCapture
 from task_maker.config import Config
-from task_maker.formats import TerryTask
+from task_maker.formats import TerryTask, parse_ranges
+from task_maker.plan import ExecutionPlan, print_plan
 from task_maker.remote import ExecutionPool, Execution
 from task_maker.source_file import SourceFile
-from task_maker.task_maker_frontend import Frontend, Resources
+from task_maker.task_maker_frontend import Frontend, Resources, File
 from task_maker.uis.terry import TerryUIInterface
 from task_maker.uis.terry_curses_ui import TerryCursesUI
 from task_maker.uis.terry_finish_ui import TerryFinishUI
 from task_maker.uis.terry_finish_ui_json import TerryFinishUIJSON
-from typing import List
+from typing import Any, Dict, List, Iterator, Optional
 
 
 def evaluate_task(frontend: Frontend, task: TerryTask,
@@ -19,16 +22,48 @@ def evaluate_task(frontend: Frontend, task: TerryTask,
     """
     Build the computation DAG and run it in order to test all the solutions.
     """
-    ui_interface = TerryUIInterface(
-        task, config.ui == UIS.PRINT or config.ui == UIS.JSON,
-              config.ui == UIS.JSON)
-    pool = ExecutionPool(config, frontend, ui_interface.ui_printer)
+    ui_interface = create_interface(task, config)
+    for pool in evaluation_steps(frontend, task, solutions, config,
+                                 ui_interface):
+        pool.start()
+    return ui_interface
+
+
+def create_interface(task: TerryTask, config: Config) -> TerryUIInterface:
+    """
+    Create the TerryUIInterface that will hold the results of the evaluation
+    """
+    return TerryUIInterface(
+        task, (config.ui == UIS.PRINT or config.ui == UIS.JSON) and
+        not config.plan, config.ui == UIS.JSON)
+
+
+def evaluation_steps(frontend: Frontend,
+                     task: TerryTask,
+                     solutions: List[SourceFile],
+                     config: Config,
+                     ui_interface: TerryUIInterface,
+                     shared_pool: Optional[ExecutionPool] = None
+                     ) -> Iterator[ExecutionPool]:
+    """
+    Build the computation DAG of the task and yield the pool once it's ready
+    to be started, the UIs are closed when resumed. Nothing is yielded if the
+    DAG cannot be built or if only the plan is requested.
+    """
+    if config.repeat > 1 or config.warmup:
+        # a Terry solution is run once per seed, its time is not scored
+        raise ValueError("--repeat and --warmup are not supported by Terry "
+                         "tasks")
+    pool = ExecutionPool(config, frontend, ui_interface.ui_printer,
+                         shared_pool)
     ui_interface.pool = pool
     curses_ui = None
     finish_ui = None
-    if config.ui == UIS.CURSES:
+    if config.ui == UIS.CURSES and not config.plan and shared_pool is None \
+            and not config.concurrent:
         curses_ui = TerryCursesUI(config, ui_interface)
-    if config.ui != UIS.SILENT and config.bulk_number is None:
+    if config.ui != UIS.SILENT and config.bulk_number is None and \
+            not config.plan:
         if config.ui == UIS.JSON:
             finish_ui = TerryFinishUIJSON(config, ui_interface)
         else:
@@ -49,66 +84,120 @@ def evaluate_task(frontend: Frontend, task: TerryTask,
         for solution in solutions:
             solution.prepare(pool)
             ui_interface.add_solution(solution)
-            evaluate_solution(pool, task, solution, ui_interface)
 
-        pool.start()
-    return ui_interface
+        # seed -> solutions evaluated with it, the input of a seed is
+        # generated and validated once for all of them
+        by_seed = collections.OrderedDict(
+        )  # type: Dict[int, List[SourceFile]]
+        seeds = get_seeds(config)
+        for solution in solutions:
+            if seeds is None:
+                # without --seed each solution gets a different random seed
+                solution_seeds = [get_seed(config)]
+            else:
+                solution_seeds = seeds
+            for seed in solution_seeds:
+                by_seed.setdefault(seed, []).append(solution)
+        for seed, seed_solutions in by_seed.items():
+            names = [solution.name for solution in seed_solutions]
+            input = generate_input(pool, task, seed, names, ui_interface)
+            for solution in seed_solutions:
+                evaluate_solution(pool, task, solution, seed, input,
+                                  ui_interface)
 
+        if config.plan:
+            print_plan(ExecutionPlan(pool), config.ui == UIS.JSON)
+            return
+        yield pool
 
-def evaluate_solution(pool: ExecutionPool, task: TerryTask,
-                      solution: SourceFile, interface: TerryUIInterface):
+
+def get_seed(config: Config) -> int:
     """
-    Build the part of the DAG relative of a single solution.
+    The seed set with --seed, a random one if not set
     """
-    if pool.config.seed:
-        seed = pool.config.seed
+    if config.seed:
+        return config.seed
+    return random.randint(0, 2 ** 31 - 1)
+
+
+def get_seeds(config: Config) -> Optional[List[int]]:
+    """
+    The seeds to evaluate every solution with, specified with --seeds: either
+    their number or their list. None if a single seed is used.
+    """
+    if not config.seeds:
+        return None
+    if config.seeds.isdigit():
+        count = int(config.seeds)
+        if count < 1:
+            raise ValueError("--seeds needs at least one seed")
+        if config.seed:
+            return list(range(config.seed, config.seed + count))
+        return random.sample(range(2 ** 31), count)
+    return sorted(parse_ranges(config.seeds))
+
+
+def generate_input(pool: ExecutionPool, task: TerryTask, seed: int,
+                   solutions: List[str],
+                   interface: TerryUIInterface) -> File:
+    """
+    Build the part of the DAG that generates and validates the input of a
+    seed, used by all the specified solutions. Returns the input file.
+    """
+    data = {"seed": seed}  # type: Dict[str, Any]
+    if len(solutions) == 1:
+        description = "for solution {} with seed {}".format(solutions[0], seed)
+        data["name"] = solutions[0]
     else:
-        seed = random.randint(0, 2 ** 31 - 1)
-    name = solution.name
+        description = "with seed {}".format(seed)
 
     inputs = dict()
     if task.official_solution:
         inputs[task.official_solution.
             exe_name] = task.official_solution.executable
     generation = Execution(
-        "Generation of input for solution {} with seed {}".format(name, seed),
+        "Generation of input {}".format(description),
         pool,
         task.generator, [str(seed), "0"],
-        "terry-generation", {
-            "name": solution.name,
-            "seed": seed
-        },
+        "terry-generation", data,
         inputs=inputs,
-        store_stderr=True)
+        stderr_capture=StreamCapture())
     input = generation.stdout
-    interface.add_generation(name, seed, generation)
+    interface.add_generation(solutions, seed, generation)
 
-    inputs = dict()
-    if task.validator:
-        val_inputs = dict()
-        if task.official_solution:
-            val_inputs[task.official_solution.
-                exe_name] = task.official_solution.executable
-        validation = Execution(
-            "Validation of input for solution {}".format(name),
-            pool,
-            task.validator, ["0"],
-            "terry-validation", {
-                "name": solution.name,
-                "seed": seed
-            },
-            stdin=input,
-            inputs=val_inputs,
-            store_stderr=True)
-        inputs["wait_for_validation"] = validation.stdout
-        interface.add_validation(name, validation)
+    if not task.validator:
+        return input
+    val_inputs = dict()
+    if task.official_solution:
+        val_inputs[task.official_solution.
+            exe_name] = task.official_solution.executable
+    validation = Execution(
+        "Validation of input {}".format(description),
+        pool,
+        task.validator, ["0"],
+        "terry-validation", data,
+        stdin=input,
+        inputs=val_inputs,
+        stderr_capture=StreamCapture())
+    interface.add_validation(solutions, seed, validation)
+    return input
+
+
+def evaluate_solution(pool: ExecutionPool, task: TerryTask,
+                      solution: SourceFile, seed: int, input: File,
+                      interface: TerryUIInterface):
+    """
+    Build the part of the DAG relative of a single solution on the input
+    generated with a seed.
+    """
+    name = solution.name
 
     limits = Resources()
     limits.cpu_time = 20
     limits.wall_time = 30
     limits.memory = 1024*1024
     solving = Execution(
-        "Running solution {}".format(name),
+        "Running solution {} with seed {}".format(name, seed),
         pool,
         solution, [],
         "terry-evaluation", {
@@ -119,16 +208,16 @@ def evaluate_solution(pool: ExecutionPool, task: TerryTask,
         cache_on=[CacheMode.ALL],
         can_exclusive=True,
         stdin=input,
-        store_stderr=True)
+        stderr_capture=StreamCapture())
     output = solving.stdout
-    interface.add_solving(name, solving)
+    interface.add_solving(name, seed, solving)
 
     inputs = {"input": input, "output": output}
     if task.official_solution:
         inputs[task.official_solution.
             exe_name] = task.official_solution.executable
     checker = Execution(
-        "Checking solution {}".format(name),
+        "Checking solution {} with seed {}".format(name, seed),
         pool,
         task.checker, ["input", "output"],
         "terry-checking", {
@@ -136,6 +225,6 @@ def evaluate_solution(pool: ExecutionPool, task: TerryTask,
             "seed": seed
         },
         inputs=inputs,
-        store_stderr=True,
+        stderr_capture=StreamCapture(),
         store_stdout=True)
-    interface.add_checking(name, checker)
+    interface.add_checking(name, seed, checker)
@@ -7,27 +7,34 @@ from task_maker.args import Arch, UIS
 from task_maker.config import Config
 from task_maker.formats import ioi_format, IOITask, \
     Subtask, Generator, Validator, Constraint, ScoreMode, TestCase, \
-    parse_variable, get_write_input_file, \
-    get_write_output_file, TaskFormat, Task
+    parse_variable, get_write_input_file, split_args, \
+    get_write_output_file, TaskFormat, Task, select_testcases
 from task_maker.formats.ioi_format.parsing import get_generator, get_validator, \
-    get_task_without_testcases, get_task_solutions
+    get_task_without_testcases, get_task_solutions, detect_yaml
 from task_maker.source_file import SourceFile
-from task_maker.task_maker_frontend import Frontend
-from typing import List, IO, Dict, Tuple
-from typing import Optional
+from typing import List, IO, Dict, Tuple, Iterator
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from task_maker.remote import ExecutionPool
+    from task_maker.task_maker_frontend import Frontend
+    from task_maker.uis.ioi import IOIUIInterface
 
 
 def parse_cases(gen: IO, task: IOITask, copy_compiled: bool) -> List[Subtask]:
     """
     Parse the cases.gen file and build a list of subtasks. If there is an error
-    in the file, an exception is raised.
+    in the file, an exception is raised. The file is parsed one line at a time
+    so even the huge ones are never loaded entirely in memory.
     """
-    lines = [l.strip() for l in gen.readlines()]
-
     subtasks = []  # type: List[Subtask]
     generators = dict()  # type: Dict[str, Generator]
     validators = dict()  # type: Dict[str, Validator]
     constraints = []  # type: List[Constraint]
+    # the constraints of the current subtask, indexed by variable name
+    constraints_by_name = dict()  # type: Dict[str, List[Constraint]]
+    # $MIN_XXX/$MAX_XXX variables already resolved in the current subtask
+    bounds = dict()  # type: Dict[str, str]
     current_gen = None  # type: Optional[Generator]
     current_val = None  # type: Optional[Validator]
     default_gen = None  # type: Optional[Generator]
@@ -57,7 +64,7 @@ def parse_cases(gen: IO, task: IOITask, copy_compiled: bool) -> List[Subtask]:
             return False
 
     def parse_command(line: str):
-        return shlex.split(line[1:])
+        return split_args(line[1:])
 
     def process_GEN(args: List[str]):
         nonlocal default_gen, current_gen
@@ -192,6 +199,9 @@ def parse_cases(gen: IO, task: IOITask, copy_compiled: bool) -> List[Subtask]:
         # subtask constraints
         else:
             subtasks[-1].constraints.append(constraint)
+            constraints_by_name.setdefault(constraint.name,
+                                           []).append(constraint)
+            bounds.clear()
 
     def process_SUBTASK(args: List[str]):
         nonlocal current_gen, current_val, st_num
@@ -206,6 +216,11 @@ def parse_cases(gen: IO, task: IOITask, copy_compiled: bool) -> List[Subtask]:
         subtask = Subtask(name, "", ScoreMode.MIN, float(args[0]), {},
                           constraints.copy())
         subtasks.append(subtask)
+        constraints_by_name.clear()
+        for constraint in constraints:
+            constraints_by_name.setdefault(constraint.name,
+                                           []).append(constraint)
+        bounds.clear()
         current_gen = default_gen
         current_val = default_val
 
@@ -246,17 +261,28 @@ def parse_cases(gen: IO, task: IOITask, copy_compiled: bool) -> List[Subtask]:
             for index, (name, value) in enumerate(
                     zip(generator.args_spec, args)):
                 if value.startswith("$"):
-                    value = parse_variable(value, testcase, subtasks[-1],
-                                           tc_num, st_num)
+                    # the bounds are the same for the whole subtask
+                    if value.startswith(("$MIN_", "$MAX_")):
+                        if value not in bounds:
+                            bounds[value] = parse_variable(
+                                value, testcase, subtasks[-1], tc_num, st_num)
+                        value = bounds[value]
+                    else:
+                        value = parse_variable(value, testcase, subtasks[-1],
+                                               tc_num, st_num)
                     testcase.generator_args[index] = value
                 testcase.matched_params[name] = value
-                for constraint in subtasks[-1].constraints:
-                    if name != constraint.name or not is_float(value):
-                        continue
-                    if not constraint.accept(float(value)):
+                if name not in constraints_by_name:
+                    continue
+                try:
+                    number = float(value)
+                except ValueError:
+                    continue
+                for constraint in constraints_by_name[name]:
+                    if not constraint.accept(number):
                         raise ValueError("Constraint not met: %s when %s=%f "
                                          "(line %d)" % (constraint, name,
-                                                        float(value), lineno))
+                                                        number, lineno))
         subtasks[-1].testcases[tc_num] = testcase
         tc_num += 1
 
@@ -281,7 +307,8 @@ def parse_cases(gen: IO, task: IOITask, copy_compiled: bool) -> List[Subtask]:
             raise ValueError("No VAL available (line %d)" % lineno)
         add_testcase(args, current_gen, current_val)
 
-    for lineno, line in enumerate(lines, 1):
+    for lineno, line in enumerate(gen, 1):
+        line = line.strip()
         # skip empty lines
         if not line:
             continue
@@ -310,7 +337,7 @@ def parse_cases(gen: IO, task: IOITask, copy_compiled: bool) -> List[Subtask]:
                                  (cmd, line, lineno))
         # a simple testcase
         else:
-            process_TESTCASE(shlex.split(line))
+            process_TESTCASE(split_args(line))
     return subtasks
 
 
@@ -351,26 +378,36 @@ def write_gen_GEN(task: IOITask):
     """
     Check if gen/GEN can be removed and then write a fake one for cmsImportTask.
     """
+    GEN = generate_gen_GEN(task.subtasks.values())
     if os.path.exists("gen/GEN"):
         with open("gen/GEN") as f:
-            if "tm-allow-delete" not in f.read(1024):
-                return
+            current = f.read()
+        # don't touch it if unchanged, --watch would see it as an edit
+        if "tm-allow-delete" not in current[:1024] or current == GEN:
+            return
 
     with open("gen/GEN", "w") as f:
-        f.write(generate_gen_GEN(task.subtasks.values()))
+        f.write(GEN)
 
 
 def get_task(config: Config):
     """
-    Get the task from the config
+    Get the task from the config, reusing the one parsed by the previous run
+    if none of its files changed
     """
-    task = get_task_without_testcases(config)
-    with open("gen/cases.gen", "r") as gen:
-        subtasks = parse_cases(gen, task, config.copy_exe)
+    from task_maker.task_cache import get_cached_task
+
+    def build():
+        task = get_task_without_testcases(config)
+        with open("gen/cases.gen", "r") as gen:
+            subtasks = parse_cases(gen, task, config.copy_exe)
+
+        for st_num, subtask in enumerate(subtasks):
+            task.subtasks[st_num] = subtask
+        return task
 
-    for st_num, subtask in enumerate(subtasks):
-        task.subtasks[st_num] = subtask
-    return task
+    return get_cached_task(config, "tm", [detect_yaml(), "gen/cases.gen"],
+                           build)
 
 
 class TMFormat(TaskFormat):
@@ -405,21 +442,51 @@ class TMFormat(TaskFormat):
         return get_task(config)
 
     @staticmethod
-    def evaluate_task(frontend: Frontend, config: Config):
+    def evaluate_task(frontend: "Frontend", config: Config):
         """
         Evaluates the task by building the structure and using the ioi-format
         interface
         """
+        from task_maker.formats.ioi_format.execution import evaluate_task
+        task = get_task(config)
+        solutions = get_task_solutions(config, task)
+
+        if not config.dry_run:
+            write_gen_GEN(task)
+
+        task = select_testcases(task, config)
+        return evaluate_task(frontend, task, solutions, config)
+
+    @staticmethod
+    def update_task(frontend: "Frontend", config: Config,
+                    interface: "IOIUIInterface", changed: List[str]) -> bool:
+        """
+        Evaluate again only the part of the task affected by the changed
+        files, reusing the rest of the previous evaluation.
+        """
+        from task_maker.formats.ioi_format.execution import update_task
+        return update_task(frontend, config, interface, changed)
+
+    @staticmethod
+    def prepare_evaluation(
+            frontend: "Frontend", config: Config,
+            shared_pool: Optional["ExecutionPool"]
+    ) -> Tuple["IOIUIInterface", Iterator["ExecutionPool"]]:
+        from task_maker.formats.ioi_format.execution import create_interface, \
+            evaluation_steps
         task = get_task(config)
         solutions = get_task_solutions(config, task)
 
         if not config.dry_run:
             write_gen_GEN(task)
 
-        return ioi_format.evaluate_task(frontend, task, solutions, config)
+        task = select_testcases(task, config)
+        interface = create_interface(task, config)
+        return interface, evaluation_steps(frontend, task, solutions, config,
+                                           interface, shared_pool)
 
     @staticmethod
-    def make_booklet(frontend: Frontend, config: Config,
+    def make_booklet(frontend: "Frontend", config: Config,
                      tasks: List[Tuple[str, IOITask]]) -> int:
         return ioi_format.IOIFormat.make_booklet(frontend, config, tasks)
 
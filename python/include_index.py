@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import json
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+INCLUDE_INDEX_VERSION = 2
+
+# the comments, and the literals that may contain what looks like a comment
+C_COMMENT = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'',
+    re.DOTALL)
+C_DIRECTIVE = re.compile(r'^\s*#\s*(\w+)(.*)$', re.MULTILINE)
+C_INCLUDE = re.compile(r'\s*["<]([^">]+)[">]')
+# condition of an #if or #elif that is always true or always false
+C_CONSTANT = re.compile(r'\(?\s*(\d+)\s*\)?')
+
+
+def _strip_comment(match) -> str:
+    text = match.group(0)
+    # a comment is a single space for the preprocessor
+    return " " if text.startswith("/") else text
+
+
+def _constant(expression: str) -> Optional[bool]:
+    constant = C_CONSTANT.fullmatch(expression.strip())
+    if constant is None:
+        return None
+    return int(constant.group(1)) != 0
+
+
+def parse_includes(source: str) -> List[str]:
+    """
+    The names in the #include directives of a C/C++ source, skipping the
+    comments and the branches of the conditionals that are never compiled,
+    like #if 0. The conditions that depend on macros are not evaluated, the
+    includes of all their branches are kept.
+    """
+    source = C_COMMENT.sub(_strip_comment, source.replace("\\\n", ""))
+    includes = []  # type: List[str]
+    # for each open conditional: (whether the enclosing code is compiled,
+    # whether a branch is always taken, whether the current branch is
+    # compiled)
+    stack = []  # type: List[Tuple[bool, bool, bool]]
+    active = True
+    for directive in C_DIRECTIVE.finditer(source):
+        name, argument = directive.groups()
+        if name in ("if", "ifdef", "ifndef"):
+            condition = _constant(argument) if name == "if" else None
+            compiled = active and condition is not False
+            stack.append((active, condition is True, compiled))
+        elif name == "elif" and stack:
+            outer, taken, _ = stack[-1]
+            condition = _constant(argument)
+            compiled = outer and not taken and condition is not False
+            stack[-1] = (outer, taken or condition is True, compiled)
+        elif name == "else" and stack:
+            outer, taken, _ = stack[-1]
+            stack[-1] = (outer, True, outer and not taken)
+        elif name == "endif" and stack:
+            stack.pop()
+        elif name == "include" and active:
+            include = C_INCLUDE.match(argument)
+            if include:
+                includes.append(include.group(1))
+        active = stack[-1][2] if stack else True
+    return includes
+
+
+class IncludeIndex:
+    """
+    Index of the #include directives of the C/C++ sources and headers. Each
+    file is parsed at most once per evaluation and the result is kept,
+    together with the modification time and the size of the file, so the next
+    runs parse only the files that changed.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        # absolute path -> (mtime, size, included names)
+        self.includes = dict()  # type: Dict[str, Tuple[int, int, List[str]]]
+        # files already checked for changes during this evaluation
+        self.fresh = set()  # type: Set[str]
+        self.dirty = False
+        self._load()
+
+    def get_includes(self, path: str) -> List[str]:
+        """
+        The names in the #include directives of the file, as written in the
+        source.
+        """
+        path = os.path.abspath(path)
+        if path in self.fresh:
+            return self.includes[path][2]
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        if path not in self.includes or \
+                tuple(self.includes[path][:2]) != key:
+            with open(path, errors="replace") as f:
+                includes = parse_includes(f.read())
+            self.includes[path] = key + (includes, )
+            self.dirty = True
+        self.fresh.add(path)
+        return self.includes[path][2]
+
+    def refresh(self):
+        """
+        Check again every file for changes on the next lookup, to be called
+        before each evaluation of the same run
+        """
+        self.fresh.clear()
+
+    def save(self):
+        """
+        Write the index back to disk if something changed, atomically
+        """
+        if not self.dirty or not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": INCLUDE_INDEX_VERSION,
+                "includes": self.includes
+            }, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") != INCLUDE_INDEX_VERSION:
+            return
+        self.includes = data.get("includes", dict())
+
+
+# the index shared by all the source files of the run
+_include_index = None  # type: Optional[IncludeIndex]
+
+
+def load_include_index(path: str):
+    """
+    Use the index persisted at path for the rest of the run
+    """
+    global _include_index
+    _include_index = IncludeIndex(path)
+
+
+def get_include_index() -> IncludeIndex:
+    """
+    Get the index shared by all the source files, an in-memory one if
+    load_include_index has not been called
+    """
+    global _include_index
+    if _include_index is None:
+        _include_index = IncludeIndex(None)
+    return _include_index
@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 
 import glob
-import importlib.util
+import importlib
 import os.path
 from abc import ABC, abstractmethod
 from enum import Enum
 from task_maker.args import Arch
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Set
 
 
 class Dependency:
@@ -131,6 +131,49 @@ class Language(ABC):
         """
         pass
 
+    def get_object_compilation_command(
+            self, source_filename: str, object_name: str, for_evaluation: bool,
+            target_arch: Arch) -> Optional[Tuple[CommandType, List[str]]]:
+        """
+        Get the command to use to compile a file into an object, to be passed
+        to get_compilation_command together with the other source files. None
+        if the language cannot compile the files separately.
+        :param source_filename: File to compile
+        :param object_name: Name of the object to produce
+        :param for_evaluation: Whether to set the EVAL variable
+        :param target_arch: Architecture to target the executable on
+        """
+        return None
+
+    @property
+    def precompiled_headers(self) -> List[str]:
+        """
+        List of the system headers included by most of the source files, they
+        are precompiled once and shared by all the compilations.
+        """
+        return []
+
+    def get_header_compilation_command(self, header_filename: str,
+                                       output: str, for_evaluation: bool,
+                                       target_arch: Arch
+                                       ) -> (CommandType, List[str]):
+        """
+        Get the command to use to precompile a header, with the same flags of
+        get_compilation_command
+        :param header_filename: Name of the file that includes the header
+        :param output: Name of the precompiled header to produce
+        :param for_evaluation: Whether to set the EVAL variable
+        :param target_arch: Architecture to target the executable on
+        """
+        pass
+
+    def get_precompiled_headers_flags(self, directory: str) -> List[str]:
+        """
+        Get the flags to add to the compilation command to use the precompiled
+        headers stored in directory
+        """
+        return []
+
     def get_dependencies(self, filename: str) -> List[Dependency]:
         """
         Read the file and recursively search for dependencies. If the language
@@ -161,34 +204,61 @@ class CompiledLanguage(Language, ABC):
 
 class LanguageManager:
     """
-    Manage all the supported languages. LanguageManager.load_languages() should
-    be called in order to support the languages.
+    Manage all the supported languages. The plugin of a language is loaded the
+    first time a file with one of its extensions is used,
+    LanguageManager.load_languages() loads all of them.
     """
+    # (extension with dot -> name of the plugin module) of the bundled plugins,
+    # it must match their source_extensions. The extensions not listed here
+    # are searched loading all the plugins.
+    PLUGINS = {
+        ".asy": "asy",
+        ".c": "c",
+        ".cpp": "cpp",
+        ".cc": "cpp",
+        ".cxx": "cpp",
+        ".c++": "cpp",
+        ".C": "cpp",
+        "": "executable",
+        ".pas": "pascal",
+        ".php": "php",
+        ".py": "python",
+        ".rs": "rust",
+        ".sh": "sh"
+    }  # type: Dict[str, str]
     # List of the known languages.
     LANGUAGES = []  # type: List[Language]
     # (extension with dot -> Language) association.
     EXT_CACHE = {}  # type: Dict[str, Language]
+    # names of the plugins already loaded
+    LOADED_PLUGINS = set()  # type: Set[str]
 
     @staticmethod
     def load_languages():
         """
-        Iterates through the files in this package, load them and register the
-        languages.
+        Load all the plugins in this package and register their languages.
         """
         languages = glob.glob(os.path.dirname(__file__) + "/*.py")
         for language in languages:
             if language.endswith("__init__.py"):
                 continue
-            lang_name = language.split("/")[-1][:-3]
-            spec = importlib.util.spec_from_file_location(
-                "task_maker.languages." + lang_name, language)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            if not hasattr(module, "register"):
-                raise ValueError(
-                    "Plugin for language {} does not have register hook".
-                    format(lang_name))
-            module.register()
+            LanguageManager.load_plugin(language.split("/")[-1][:-3])
+
+    @staticmethod
+    def load_plugin(lang_name: str):
+        """
+        Load a plugin of this package, if not loaded yet, and register its
+        languages.
+        """
+        if lang_name in LanguageManager.LOADED_PLUGINS:
+            return
+        LanguageManager.LOADED_PLUGINS.add(lang_name)
+        module = importlib.import_module("task_maker.languages." + lang_name)
+        if not hasattr(module, "register"):
+            raise ValueError(
+                "Plugin for language {} does not have register hook".format(
+                    lang_name))
+        module.register()
 
     @staticmethod
     def register_language(language: Language):
@@ -207,10 +277,15 @@ class LanguageManager:
     @staticmethod
     def from_file(path: str) -> Language:
         """
-        Given the path to a file, returns the associated language. Raises an
-        excepetion if the language is unknown.
+        Given the path to a file, returns the associated language, loading its
+        plugin if needed. Raises an excepetion if the language is unknown.
         """
         name, ext = os.path.splitext(path)
+        if ext not in LanguageManager.EXT_CACHE:
+            if ext in LanguageManager.PLUGINS:
+                LanguageManager.load_plugin(LanguageManager.PLUGINS[ext])
+            else:
+                LanguageManager.load_languages()
         if ext not in LanguageManager.EXT_CACHE:
             raise ValueError("Unknown language for file {}".format(path))
         return LanguageManager.EXT_CACHE[ext]
@@ -218,9 +293,12 @@ class LanguageManager:
     @staticmethod
     def valid_extensions() -> List[str]:
         """
-        Returns a list of all the known extensions (with the dots).
+        Returns a list of all the known extensions (with the dots), without
+        loading the plugins.
         """
-        return list(LanguageManager.EXT_CACHE.keys())
+        extensions = dict.fromkeys(LanguageManager.PLUGINS.keys())
+        extensions.update(dict.fromkeys(LanguageManager.EXT_CACHE.keys()))
+        return list(extensions.keys())
 
 
 def make_unique(deps: List[Dependency]) -> List[Dependency]:
@@ -1,84 +1,48 @@
 #!/usr/bin/env python3
 import os.path
-import re
-import subprocess
-from distutils.spawn import find_executable
 from task_maker.args import Arch
+from task_maker.include_index import get_include_index
 from task_maker.languages import CompiledLanguage, CommandType, \
     LanguageManager, Dependency, make_unique
-from typing import List
+from typing import List, Set
 
-CXX_INCLUDE = re.compile('#include *["<](.+)[">]')
-
-
-def old_find_c_dependency(filename: str, strip=None) -> List[Dependency]:
+def find_c_dependency(filename: str) -> List[Dependency]:
     """
-    Legacy method to find all the non-system dependencies of a C/C++ source
-    file. Will be used if no compiler (cc command) is found on this system.
-    Will return the list of all the headers required for the compilation.
+    Find all the non-system headers required for the compilation of a C/C++
+    source file, following the #include directives recursively. The headers are
+    looked up relative to the file that includes them, the ones not found are
+    considered system headers, the symlinks are resolved. The directives of
+    each file are read from the include index shared by all the source files.
     """
+    index = get_include_index()
     scope = os.path.dirname(filename)
-    if strip is None:
-        strip = scope + "/"
-    with open(filename) as file:
-        content = file.read()
-    includes = CXX_INCLUDE.findall(content)
     dependencies = []  # type: List[Dependency]
-    for include in includes:
-        file_path = os.path.join(scope, include)
-        if file_path.startswith(strip):
-            include = file_path[len(strip):]
-        if os.path.islink(file_path):
-            file_path = os.path.realpath(file_path)
-        if os.path.exists(file_path):
-            dependency = Dependency(include, file_path)
-            dependencies += [dependency]
-            dependencies += old_find_c_dependency(file_path, strip)
-    return dependencies
-
-
-def new_find_c_dependency(filename: str) -> List[Dependency]:
-    """
-    New method for finding the headers required for the compilation. It uses the
-    cc command (default C compiler) for fetching the list of dependencies (it
-    uses the -MM flag).
-    """
-    proc = subprocess.run(["cc", "-MM", filename], stdout=subprocess.PIPE)
-    if proc.returncode != 0:
-        return []
-    # the output of this command is something like:
-    #
-    #   filename.o: \
-    #    /abs/path/to/file1.h \
-    #    /abs/path/to/file2.h \
-    #
-    strip = os.path.dirname(filename) + "/"
-    data = proc.stdout.decode().split()
-    if len(data) < 2:
-        return []
-    # skip the output object and the current source
-    data = data[2:]
-    result = []  # type: List[Dependency]
-    for dep in data:
-        # skip the "new lines"
-        if dep == "\\":
-            continue
-        name = dep
-        if name.startswith(strip):
-            name = name[len(strip):]
-        result.append(Dependency(name, dep))
-    return result
+    names = set()  # type: Set[str]
+    visited = set()  # type: Set[str]
 
+    def visit(path: str):
+        for include in index.get_includes(path):
+            file_path = os.path.normpath(
+                os.path.join(os.path.dirname(path), include))
+            if not os.path.isfile(file_path):
+                continue
+            if os.path.isabs(include):
+                name = include
+            else:
+                name = os.path.relpath(file_path, scope or ".")
+            # the symlinked headers are read from their target, keeping the
+            # name they are included with
+            if os.path.islink(file_path):
+                file_path = os.path.realpath(file_path)
+            if name not in names:
+                names.add(name)
+                dependencies.append(Dependency(name, file_path))
+            if file_path not in visited:
+                visited.add(file_path)
+                visit(file_path)
 
-def find_c_dependency(filename: str) -> List[Dependency]:
-    """
-    Chooses which method to use for getting the list of all the compile time
-    dependencies.
-    """
-    if find_executable("cc") is not None:
-        return new_find_c_dependency(filename)
-    else:
-        return old_find_c_dependency(filename)
+    visit(filename)
+    return dependencies
 
 
 class LanguageC(CompiledLanguage):
@@ -98,15 +62,29 @@ class LanguageC(CompiledLanguage):
                                 exe_name: str, unit_name: str,
                                 for_evaluation: bool,
                                 target_arch: Arch) -> (CommandType, List[str]):
-        cmd = ["cc"]
-        if for_evaluation:
-            cmd += ["-DEVAL"]
-        if target_arch == Arch.I686:
-            cmd += ["-m32"]
-        cmd += ["-O2", "-std=c11", "-Wall", "-ggdb3", "-o", exe_name]
+        cmd = ["cc"] + self._get_flags(for_evaluation, target_arch)
+        cmd += ["-o", exe_name]
         cmd += source_filenames
         return CommandType.SYSTEM, cmd
 
+    def get_object_compilation_command(self, source_filename: str,
+                                       object_name: str, for_evaluation: bool,
+                                       target_arch: Arch
+                                       ) -> (CommandType, List[str]):
+        cmd = ["cc"] + self._get_flags(for_evaluation, target_arch)
+        cmd += ["-c", "-o", object_name, source_filename]
+        return CommandType.SYSTEM, cmd
+
+    def _get_flags(self, for_evaluation: bool,
+                   target_arch: Arch) -> List[str]:
+        flags = []
+        if for_evaluation:
+            flags += ["-DEVAL"]
+        if target_arch == Arch.I686:
+            flags += ["-m32"]
+        flags += ["-O2", "-std=c11", "-Wall", "-ggdb3"]
+        return flags
+
     def get_dependencies(self, filename: str):
         return make_unique(find_c_dependency(filename))
 
@@ -19,19 +19,55 @@ class LanguageCPP(CompiledLanguage):
     def header_extensions(self):
         return [".hpp"]
 
+    @property
+    def precompiled_headers(self):
+        return ["bits/stdc++.h"]
+
     def get_compilation_command(self, source_filenames: List[str],
                                 exe_name: str, unit_name: str,
                                 for_evaluation: bool,
                                 target_arch: Arch) -> (CommandType, List[str]):
-        cmd = ["c++"]
-        if for_evaluation:
-            cmd += ["-DEVAL"]
-        if target_arch == Arch.I686:
-            cmd += ["-m32"]
-        cmd += ["-O2", "-std=c++14", "-Wall", "-ggdb3", "-o", exe_name]
+        cmd = ["c++"] + self._get_flags(for_evaluation, target_arch)
+        cmd += ["-o", exe_name]
         cmd += source_filenames
         return CommandType.SYSTEM, cmd
 
+    def get_object_compilation_command(self, source_filename: str,
+                                       object_name: str, for_evaluation: bool,
+                                       target_arch: Arch
+                                       ) -> (CommandType, List[str]):
+        cmd = ["c++"] + self._get_flags(for_evaluation, target_arch)
+        cmd += ["-c", "-o", object_name, source_filename]
+        return CommandType.SYSTEM, cmd
+
+    def get_header_compilation_command(self, header_filename: str,
+                                       output: str, for_evaluation: bool,
+                                       target_arch: Arch
+                                       ) -> (CommandType, List[str]):
+        cmd = ["c++"] + self._get_flags(for_evaluation, target_arch)
+        cmd += ["-x", "c++-header", "-o", output, header_filename]
+        # if the header cannot be precompiled (i.e. it's missing) an empty
+        # file is produced: the compiler ignores the invalid precompiled
+        # headers and falls back to the real one
+        return CommandType.SYSTEM, [
+            "sh", "-c", " ".join(cmd) + " || : > " + output
+        ]
+
+    def get_precompiled_headers_flags(self, directory: str) -> List[str]:
+        # the directories passed with -I are searched before the system ones,
+        # and in each of them the .gch files are looked up first
+        return ["-I", directory]
+
+    def _get_flags(self, for_evaluation: bool,
+                   target_arch: Arch) -> List[str]:
+        flags = []
+        if for_evaluation:
+            flags += ["-DEVAL"]
+        if target_arch == Arch.I686:
+            flags += ["-m32"]
+        flags += ["-O2", "-std=c++14", "-Wall", "-ggdb3"]
+        return flags
+
     def get_dependencies(self, filename: str):
         return make_unique(find_c_dependency(filename))
 
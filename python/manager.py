@@ -5,13 +5,17 @@ import time
 
 import os.path
 import signal
+import socket
 import subprocess
 from task_maker.config import Config
 from task_maker.task_maker_frontend import Frontend
-from typing import List
+from typing import List, Optional
 
-SERVER_SPAWN_TIME = 1
-MAX_SPAWN_ATTEMPT = 3
+# bounds of the exponential backoff between the readiness probes, in seconds
+SPAWN_BACKOFF_MIN = 0.01
+SPAWN_BACKOFF_MAX = 0.5
+# maximum time to wait for a spawned server to accept connections, in seconds
+SPAWN_TIMEOUT = 10
 
 
 def get_task_maker_path():
@@ -23,9 +27,14 @@ def get_task_maker_path():
     return os.path.abspath(task_maker)
 
 
-def spawn_backend(type: str, args: List[str], daemonize: bool):
+def spawn_backend(type: str,
+                  args: List[str],
+                  daemonize: bool,
+                  cores: Optional[List[int]] = None) -> subprocess.Popen:
     """
-    Spawn a backend service, eventually daemonizing it
+    Spawn a backend service, eventually daemonizing it and pinning it to some
+    cores. When daemonizing the returned process exits as soon as the daemon
+    has started.
     """
     task_maker = get_task_maker_path()
     if daemonize:
@@ -33,11 +42,84 @@ def spawn_backend(type: str, args: List[str], daemonize: bool):
         streams = subprocess.DEVNULL
     else:
         streams = None
-    subprocess.run(
+    preexec_fn = None
+    if cores:
+        # the affinity is inherited by the daemon and by the sandboxes
+        def preexec_fn():
+            os.sched_setaffinity(0, cores)
+
+    return subprocess.Popen(
         [task_maker, type] + args,
         stdin=streams,
         stdout=streams,
-        stderr=streams)
+        stderr=streams,
+        preexec_fn=preexec_fn)
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """
+    Parse a list of cpus in the kernel format, like 0-3,8,10-11
+    """
+    cpus = []
+    for item in cpu_list.strip().split(","):
+        if not item:
+            continue
+        if "-" in item:
+            first, last = item.split("-")
+            cpus += range(int(first), int(last) + 1)
+        else:
+            cpus.append(int(item))
+    return cpus
+
+
+def get_numa_nodes() -> List[List[int]]:
+    """
+    Get the cpus of each NUMA node, a single node with all the cpus if the
+    information is not available
+    """
+    root = "/sys/devices/system/node"
+    nodes = []
+    try:
+        names = sorted(
+            (name for name in os.listdir(root)
+             if name.startswith("node") and name[4:].isdigit()),
+            key=lambda name: int(name[4:]))
+        for name in names:
+            with open(os.path.join(root, name, "cpulist")) as f:
+                nodes.append(parse_cpu_list(f.read()))
+    except OSError:
+        nodes = []
+    if not nodes:
+        nodes = [sorted(range(os.cpu_count() or 1))]
+    return nodes
+
+
+def split_cores(num_workers: int, per_numa_node: bool) -> List[List[int]]:
+    """
+    Split the cores available to task-maker in num_workers disjoint sets. If
+    per_numa_node is set each set is contained in a single NUMA node.
+    """
+    available = os.sched_getaffinity(0)
+    if per_numa_node:
+        groups = [[cpu for cpu in node if cpu in available]
+                  for node in get_numa_nodes()]
+        groups = [group for group in groups if group]
+    else:
+        groups = [sorted(available)]
+    # the workers are assigned to the groups in round robin
+    workers_per_group = [
+        num_workers // len(groups) + (i < num_workers % len(groups))
+        for i in range(len(groups))
+    ]
+    cores = []  # type: List[List[int]]
+    for group, num in zip(groups, workers_per_group):
+        if num > len(group):
+            raise ValueError("Cannot pin %d workers to %d cores" %
+                             (num, len(group)))
+        for i in range(num):
+            cores.append(group[i * len(group) // num:(i + 1) * len(group) //
+                               num])
+    return cores
 
 
 def spawn_server(config: Config):
@@ -61,39 +143,94 @@ def spawn_server(config: Config):
         args += ["--port", str(config.server_port)]
     if config.server_verbose:
         args += ["--verbose"]
-    spawn_backend("server", args, not config.run_server)
+    spawn_backend("server", args, not config.run_server).wait()
 
 
 def spawn_worker(config: Config):
     """
-    Spawn the worker, passing its arguments from the config
+    Spawn the workers, passing their arguments from the config. With more than
+    one instance each worker gets its own name, temp dir, logfile and pidfile.
     """
-    args = []
-    if config.worker_logfile is not None:
-        args += ["--logfile", config.worker_logfile]
-    if config.worker_pidfile is not None:
-        args += ["--pidfile", config.worker_pidfile]
-    if config.storedir is not None:
-        args += ["--store-dir", config.storedir]
-    if config.tempdir is not None:
-        args += ["--temp-dir", config.tempdir]
-    if config.cache_size is not None:
-        args += ["--cache-size", str(config.cache_size)]
-    if config.worker_keep_sandboxes:
-        args += ["--keep_sandboxes"]
-    if config.worker_name is not None:
-        args += ["--name", config.worker_name]
-    if config.worker_num_cores is not None:
-        args += ["--num-cores", str(config.worker_num_cores)]
-    if config.worker_port is not None:
-        args += ["--port", str(config.worker_port)]
-    if config.worker_address is not None:
-        args += ["--server", config.worker_address]
-    if config.worker_pending_requests is not None:
-        args += ["--pending-requests", str(config.worker_pending_requests)]
-    if config.worker_verbose:
-        args += ["--verbose"]
-    spawn_backend("worker", args, not config.run_worker)
+    num_workers = max(config.worker_instances, 1)
+    cores = [None] * num_workers  # type: List[Optional[List[int]]]
+    if config.worker_pin or config.worker_numa:
+        cores = split_cores(num_workers, config.worker_numa)
+
+    def instance_path(path: str, i: int) -> str:
+        if num_workers == 1:
+            return path
+        root, ext = os.path.splitext(path)
+        return "%s-%d%s" % (root, i, ext)
+
+    processes = []
+    for i, worker_cores in enumerate(cores):
+        args = []
+        if config.worker_logfile is not None:
+            args += ["--logfile", instance_path(config.worker_logfile, i)]
+        if config.worker_pidfile is not None:
+            args += ["--pidfile", instance_path(config.worker_pidfile, i)]
+        elif num_workers > 1:
+            args += [
+                "--pidfile",
+                "/tmp/task-maker-worker-%d-%d.pid" % (os.getuid(), i)
+            ]
+        if config.storedir is not None:
+            args += ["--store-dir", config.storedir]
+        if config.tempdir is not None:
+            tempdir = config.tempdir
+            if num_workers > 1:
+                tempdir = os.path.join(tempdir, "worker-%d" % i)
+            args += ["--temp-dir", tempdir]
+        if config.cache_size is not None:
+            args += ["--cache-size", str(config.cache_size)]
+        if config.worker_keep_sandboxes:
+            args += ["--keep_sandboxes"]
+        if config.worker_name is not None:
+            name = config.worker_name
+            if num_workers > 1:
+                name = "%s-%d" % (name, i)
+            args += ["--name", name]
+        if config.worker_num_cores is not None:
+            args += ["--num-cores", str(config.worker_num_cores)]
+        elif worker_cores:
+            args += ["--num-cores", str(len(worker_cores))]
+        elif num_workers > 1:
+            # do not let every worker use all the cores
+            num_cores = max((os.cpu_count() or 1) // num_workers, 1)
+            args += ["--num-cores", str(num_cores)]
+        if config.worker_port is not None:
+            args += ["--port", str(config.worker_port)]
+        if config.worker_address is not None:
+            args += ["--server", config.worker_address]
+        if config.worker_pending_requests is not None:
+            args += ["--pending-requests", str(config.worker_pending_requests)]
+        if config.worker_verbose:
+            args += ["--verbose"]
+        processes.append(
+            spawn_backend("worker", args, not config.run_worker,
+                          worker_cores))
+    for process in processes:
+        process.wait()
+
+
+def wait_for_server(host: str, port: int, timeout: float) -> bool:
+    """
+    Wait until the server accepts connections, probing it with an exponential
+    backoff. Returns False if the server is not ready before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    delay = SPAWN_BACKOFF_MIN
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=delay):
+                return True
+        except OSError:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, SPAWN_BACKOFF_MAX)
 
 
 def get_frontend(config: Config) -> Frontend:
@@ -107,21 +244,20 @@ def get_frontend(config: Config) -> Frontend:
         if config.no_spawn:
             raise RuntimeError(
                 "Cannot connect to the server and spawning is forbidden")
+        print("Spawning server and workers... ", end="", flush=True,
+              file=sys.stderr)
+        start = time.monotonic()
         spawn_server(config)
-        print(
-            "Spawning server and workers", end="", flush=True, file=sys.stderr)
-        for _ in range(3):
-            print(".", end="", flush=True, file=sys.stderr)
-            time.sleep(SERVER_SPAWN_TIME / 3)
-        print(file=sys.stderr)
+        # the worker retries the connection to the server by itself
         spawn_worker(config)
-        for t in range(MAX_SPAWN_ATTEMPT):
-            try:
-                return Frontend(config.host, config.port)
-            except:
-                print("Attempt {} failed".format(t + 1), file=sys.stderr)
-                time.sleep(1)
-        raise RuntimeError("Failed to spawn the server")
+        if not wait_for_server(config.host, config.port, SPAWN_TIMEOUT):
+            print("failed", file=sys.stderr)
+            raise RuntimeError(
+                "The server didn't start in %d seconds, check %s" %
+                (SPAWN_TIMEOUT, config.server_logfile))
+        frontend = Frontend(config.host, config.port)
+        print("ready in %.3fs" % (time.monotonic() - start), file=sys.stderr)
+        return frontend
 
 
 def stop():
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+import json
+import os
+from task_maker.printer import StdoutPrinter
+from task_maker.task_maker_frontend import Result
+from typing import Dict, List, Optional, Set
+
+HISTORY_VERSION = 1
+# maximum number of entries kept in the history file
+HISTORY_MAX_SIZE = 100000
+
+# the executions with these tags are dispatched before the others: almost
+# everything depends on the compilations and on the official solution
+HIGH_PRIORITY_TAGS = {
+    "compilation", "header-compilation", "grader-compilation", "solution"
+}
+# duration assumed for the executions that never ran before
+DEFAULT_DURATION = 1.0
+
+# ui_print_tag of the executions -> category shown in the plan
+PLAN_CATEGORIES = {
+    "compilation": "compilations",
+    "header-compilation": "compilations",
+    "grader-compilation": "compilations",
+    "statement-compilation": "compilations",
+    "generation": "generations",
+    "terry-generation": "generations",
+    "validation": "validations",
+    "terry-validation": "validations",
+    "sanity-check-validation": "validations",
+    "solution": "evaluations",
+    "evaluation": "evaluations",
+    "terry-evaluation": "evaluations",
+    "sanity-check-solution": "evaluations",
+    "checking": "checks",
+    "terry-checking": "checks",
+}
+
+
+class ExecutionHistory:
+    """
+    Persistent record of the previous executions of this machine, used to
+    estimate the duration of the next ones and to tell which ones were already
+    seen. The cache of the server is not queried.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # fingerprint -> wall time
+        self.fingerprints = dict()  # type: Dict[str, float]
+        # task_dir + name -> wall time
+        self.names = dict()  # type: Dict[str, float]
+        self.dirty = False
+        self._load()
+
+    def duration(self, execution: "Execution") -> Optional[float]:
+        """
+        The wall time of the last run of the execution, None if it never ran
+        """
+        if execution.fingerprint in self.fingerprints:
+            return self.fingerprints[execution.fingerprint]
+        return self.names.get(self._name_key(execution))
+
+    def seen_before(self, execution: "Execution") -> bool:
+        """
+        Whether an execution with the same command and inputs already ran from
+        this machine. Its result may still be in the cache of the server, but
+        the server may have evicted it or may be a different one.
+        """
+        return execution.fingerprint in self.fingerprints
+
+    def record(self, execution: "Execution", result: Result):
+        """
+        Store the duration of an execution that has just completed
+        """
+        wall_time = result.resources.wall_time
+        if execution.fingerprint is not None:
+            self.fingerprints.pop(execution.fingerprint, None)
+            self.fingerprints[execution.fingerprint] = wall_time
+        key = self._name_key(execution)
+        self.names.pop(key, None)
+        self.names[key] = wall_time
+        self.dirty = True
+
+    def save(self):
+        """
+        Write the history back to disk, dropping the oldest entries
+        """
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": HISTORY_VERSION,
+                "fingerprints": _trim(self.fingerprints),
+                "names": _trim(self.names)
+            }, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _name_key(self, execution: "Execution") -> str:
+        return execution.pool.task_dir + "\0" + execution.name
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") != HISTORY_VERSION:
+            return
+        self.fingerprints = data.get("fingerprints", dict())
+        self.names = data.get("names", dict())
+
+
+class ExecutionPlan:
+    """
+    Summary of the DAG built inside an ExecutionPool, computed without
+    running it.
+    """
+
+    def __init__(self, pool: "ExecutionPool"):
+        self.counts = dict(
+            (category, 0)
+            for category in sorted(set(PLAN_CATEGORIES.values())))
+        self.counts["other"] = 0
+        # the pool may share the executions with the pools of other tasks
+        executions = [e for e in pool.executions if e.pool is pool]
+        self.num_executions = len(executions)
+        # in the local history, not necessarily in the cache of the server
+        self.num_seen = 0
+        # answered by the cache of the server, unknown for the tasks evaluated
+        # together since the server counts all of them
+        self.num_cached = None  # type: Optional[int]
+        if len(pool.group) == 1:
+            self.num_cached, _ = pool.frontend.countCached()
+        self.num_unknown_duration = 0
+        self.total_time = 0.0
+        self.critical_path_time = 0.0
+        self.critical_path = []  # type: List[str]
+
+        # the executions are created after the ones they depend on, so the
+        # creation order is a topological order of the DAG
+        finish = dict()  # type: Dict[Execution, float]
+        previous = dict()  # type: Dict[Execution, Optional[Execution]]
+        last = None
+        for execution in executions:
+            category = PLAN_CATEGORIES.get(execution.ui_print_tag, "other")
+            self.counts[category] += 1
+            seen = execution.cache_enabled and \
+                pool.history.seen_before(execution)
+            if seen:
+                self.num_seen += 1
+                duration = 0.0
+            else:
+                duration = pool.history.duration(execution)
+                if duration is None:
+                    self.num_unknown_duration += 1
+                    duration = 0.0
+            self.total_time += duration
+            start = 0.0
+            previous[execution] = None
+            for dep in execution.dependencies:
+                if finish[dep] > start:
+                    start = finish[dep]
+                    previous[execution] = dep
+            finish[execution] = start + duration
+            if last is None or finish[execution] > finish[last]:
+                last = execution
+        if last is not None:
+            self.critical_path_time = finish[last]
+            while last is not None:
+                self.critical_path.append(last.name)
+                last = previous[last]
+            self.critical_path.reverse()
+
+    def to_dict(self) -> dict:
+        return {
+            "executions": self.num_executions,
+            "counts": self.counts,
+            "previously_seen": self.num_seen,
+            "cached": self.num_cached,
+            "unknown_duration": self.num_unknown_duration,
+            "total_time": self.total_time,
+            "critical_path_time": self.critical_path_time,
+            "critical_path": self.critical_path
+        }
+
+
+def compute_priorities(pool: "ExecutionPool") -> Dict["Execution", int]:
+    """
+    Compute the priorities of the executions of the pool: the ones on the
+    longest remaining path of the DAG, weighted by the historical durations,
+    have the highest priority. The executions seen before in the local
+    history are likely served by the cache and don't weight anything, the
+    server is not asked. The sampled executions and the ones they depend on
+    come before all the others. An execution that follows another one gets
+    the priority right below it.
+    """
+    children = dict((execution, [])
+                    for execution in pool.executions)  # type: Dict
+    for execution in pool.executions:
+        for dep in execution.dependencies:
+            children[dep].append(execution)
+    remaining = dict()  # type: Dict[Execution, float]
+    sampled = set()  # type: Set[Execution]
+    for execution in reversed(pool.executions):
+        if execution.sample or any(child in sampled
+                                   for child in children[execution]):
+            sampled.add(execution)
+        if execution.cache_enabled and pool.history.seen_before(execution):
+            duration = 0.0
+        else:
+            duration = pool.history.duration(execution)
+            if duration is None:
+                duration = DEFAULT_DURATION
+        remaining[execution] = duration + max(
+            (remaining[child] for child in children[execution]), default=0.0)
+    followers = dict()  # type: Dict[Execution, Execution]
+    for execution in pool.executions:
+        if execution.follows is not None:
+            followers[execution.follows] = execution
+    order = sorted(
+        (e for e in pool.executions if e.follows is None),
+        key=lambda e: (e.ui_print_tag in HIGH_PRIORITY_TAGS, e in sampled,
+                       remaining[e]))
+    # the higher priorities are dispatched first, so a chain is listed from
+    # its last execution
+    chained = []  # type: List[Execution]
+    for execution in order:
+        chain = [execution]
+        while chain[-1] in followers:
+            chain.append(followers[chain[-1]])
+        chained.extend(reversed(chain))
+    return dict((execution, priority)
+                for priority, execution in enumerate(chained))
+
+
+def print_plan(plan: ExecutionPlan, json_output: bool):
+    """
+    Print the plan to stdout, as text or as a json line
+    """
+    if json_output:
+        print(
+            json.dumps({
+                "action": "plan",
+                "state": "SUCCESS",
+                "data": plan.to_dict()
+            }),
+            flush=True)
+        return
+    printer = StdoutPrinter()
+    printer.bold("Execution plan\n")
+    for category, count in plan.counts.items():
+        printer.text("%-20s %d\n" % (category.capitalize(), count))
+    printer.text("%-20s %d\n" % ("Total", plan.num_executions))
+    printer.text("\n")
+    printer.text("%-20s %d/%d\n" % ("Previously seen", plan.num_seen,
+                                    plan.num_executions))
+    if plan.num_cached is not None:
+        printer.text("%-20s %d/%d\n" % ("In server cache", plan.num_cached,
+                                        plan.num_executions))
+    else:
+        printer.text("%-20s unknown\n" % "In server cache")
+    printer.text("%-20s %d\n" % ("Never run before",
+                                 plan.num_unknown_duration))
+    printer.text("%-20s %.3fs\n" % ("Total time", plan.total_time))
+    printer.text("%-20s %.3fs\n" % ("Critical path", plan.critical_path_time))
+    for name in plan.critical_path:
+        printer.text("    %s\n" % name)
+
+
+def _trim(entries: Dict[str, float]) -> Dict[str, float]:
+    if len(entries) <= HISTORY_MAX_SIZE:
+        return entries
+    keys = list(entries.keys())[-HISTORY_MAX_SIZE:]
+    return dict((key, entries[key]) for key in keys)
@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-import curses
+from typing import TYPE_CHECKING
+
+# curses is needed only by the curses UIs, the other commands start faster
+# without it
+if TYPE_CHECKING:
+    import curses
 
 
 class Printer:
@@ -113,6 +118,7 @@ class CursesPrinter(Printer):
     """
 
     def __init__(self, stdscr: 'curses._CursesWindow') -> None:
+        import curses
         self.stdscr = stdscr
         self.bold_fmt = curses.A_BOLD
         if hasattr(curses, "COLORS") and curses.COLORS >= 256:
@@ -1,30 +1,176 @@
 #!/usr/bin/env python3
 
+import hashlib
+import json
+import os
 import time
 
 import signal
-from task_maker.args import CacheMode
+from task_maker.args import CacheMode, ExportMode
+from task_maker.capture import StreamCapture
 from task_maker.config import Config
+from task_maker.file_cache import FileRegistry, get_hash_cache
+from task_maker.include_index import get_include_index
+from task_maker.plan import ExecutionHistory, compute_priorities
+from task_maker.tracer import ExecutionTracer
 from task_maker.languages import CommandType
 from task_maker.task_maker_frontend import Frontend, File, Resources, Fifo, \
     Result, ResultStatus, ExecutionGroup
-from task_maker.utils import result_to_dict
-from typing import Union, List, Callable, Optional, Dict, Iterable, Tuple, Any
+from task_maker.utils import result_to_dict, resources_to_dict
+from typing import Union, List, Callable, Optional, Dict, Iterable, Tuple, \
+    Any, Set
 
 
 class ExecutionPool:
     """
     Pool of execution, it will manage the starting and stopping of the frontend
     and the list of running executions.
+
+    When shared_with is set the pool joins the evaluation of that pool: the
+    executions of all the pools of the group are sent to the same frontend and
+    are run together when one of them is started. Each pool keeps its own
+    task directory and UI printer.
     """
 
-    def __init__(self, config: Config, frontend: Frontend,
-                 ui_printer: "UIPrinter"):
+    def __init__(self,
+                 config: Config,
+                 frontend: Frontend,
+                 ui_printer: "UIPrinter",
+                 shared_with: Optional["ExecutionPool"] = None):
         self.config = config
         self.frontend = frontend
         self.ui_printer = ui_printer
-        self.running = dict()  # type: Dict[Execution, float]
+        self.task_dir = config.task_dir
         self.stopped = False
+        if shared_with is not None:
+            if shared_with.frontend is not frontend:
+                raise ValueError("Shared pools must use the same frontend")
+            self.group = shared_with.group
+            self.group.append(self)
+            self.running = shared_with.running
+            self.hash_cache = shared_with.hash_cache
+            self.files = shared_with.files
+            self.history = shared_with.history
+            self.executions = shared_with.executions
+            self.file_producers = shared_with.file_producers
+            self.file_fingerprints = shared_with.file_fingerprints
+            self.tracer = shared_with.tracer
+            self.precompiled_headers = shared_with.precompiled_headers
+            self.compiled_graders = shared_with.compiled_graders
+            self.written_files = shared_with.written_files
+            return
+        # all the pools that are evaluated together
+        self.group = [self]  # type: List[ExecutionPool]
+        self.running = dict()  # type: Dict[Execution, float]
+        self.hash_cache = get_hash_cache(self._cache_path("hashes.json"))
+        self.files = FileRegistry(frontend, self.hash_cache)
+        self.history = ExecutionHistory(self._cache_path("history.json"))
+        # all the executions, in creation order
+        self.executions = []  # type: List[Execution]
+        self.file_producers = dict()  # type: Dict[File, Execution]
+        self.file_fingerprints = dict()  # type: Dict[File, str]
+        self.tracer = None  # type: Optional[ExecutionTracer]
+        # (language, header, arch) -> precompiled header
+        self.precompiled_headers = dict()  # type: Dict[Tuple, File]
+        # (language, grader, arch) -> (object name, compilation)
+        self.compiled_graders = dict()  # type: Dict[Tuple, Optional[Tuple]]
+        # absolute paths of the files written in the task directory
+        self.written_files = set()  # type: Set[str]
+        if config.trace:
+            self.tracer = ExecutionTracer(config.trace)
+
+    def provide_file(self, path: str, description: str,
+                     is_executable: bool = False) -> File:
+        """
+        Provide a file to the frontend, the same path is sent only once per
+        evaluation and its hash is cached across runs.
+        """
+        file = self.files.provide_file(path, description, is_executable)
+        self.file_fingerprints[file] = self.files.digests[file]
+        return file
+
+    def provide_file_content(self, content: str, description: str,
+                             is_executable: bool = False) -> File:
+        """
+        Provide a file to the frontend given its content.
+        """
+        file = self.frontend.provideFileContent(content, description,
+                                                is_executable)
+        self.file_fingerprints[file] = hashlib.sha256(
+            content.encode()).hexdigest()
+        return file
+
+    def provide_stored_file(self, file: File, description: str,
+                            is_executable: bool = False) -> File:
+        """
+        Provide a file of a previous evaluation on the same server, the server
+        takes it from its store without receiving it again. If the server no
+        longer has the file the executions that use it fail, see
+        Frontend.missingFiles.
+        """
+        stored = self.frontend.provideStoredFile(file.hash(), description,
+                                                 is_executable)
+        self.file_fingerprints[stored] = file.hash()
+        return stored
+
+    def write_file(self, file: File, path: str, overwrite: bool = True,
+                   exist_ok: bool = True):
+        """
+        Write the file to path when it is ready. If path already has the same
+        content it is left untouched, otherwise the file is linked from the
+        store of the server when possible, according to --export-mode.
+        """
+        path = os.path.abspath(path)
+        self.written_files.add(path)
+        current_hash = ""
+        if overwrite and os.path.isfile(path):
+            current_hash = self.hash_cache.get_hash(path)
+        store_dir = ""
+        if self.config.export_mode != ExportMode.COPY:
+            # the store is content addressed, a file found there is valid even
+            # if the server is on another machine sharing the same path
+            store_dir = self.config.storedir
+        file.getContentsToFile(
+            path, overwrite, exist_ok, current_hash, store_dir,
+            self.config.export_mode == ExportMode.HARDLINK)
+
+    def register_execution(self, execution: "Execution", command: str,
+                           inputs: Dict[str, Union[File, Fifo]]):
+        """
+        Add the execution to the DAG, computing its dependencies and its
+        fingerprint from the command and the inputs. The fingerprint is None if
+        some of the inputs are unknown.
+        """
+        self.executions.append(execution)
+        if self.tracer:
+            self.tracer.declared(execution)
+        dependencies = set()
+        files = []
+        fingerprint_known = True
+        for path, file in sorted(inputs.items()):
+            if not isinstance(file, File):
+                continue
+            if file in self.file_producers:
+                dependencies.add(self.file_producers[file])
+            if file not in self.file_fingerprints:
+                fingerprint_known = False
+            files.append((path, self.file_fingerprints.get(file)))
+        execution.dependencies = list(dependencies)
+        if fingerprint_known:
+            data = json.dumps([
+                command, execution.args, files,
+                resources_to_dict(execution.limits), execution.extra_time
+            ])
+            execution.fingerprint = hashlib.sha256(data.encode()).hexdigest()
+
+    def register_output(self, execution: "Execution", name: str, file: File):
+        """
+        Mark the file as produced by the execution.
+        """
+        self.file_producers[file] = execution
+        if execution.fingerprint is not None:
+            self.file_fingerprints[file] = hashlib.sha256(
+                (execution.fingerprint + name).encode()).hexdigest()
 
     def execution_start(self, execution: "Execution"):
         """
@@ -41,25 +187,41 @@ class ExecutionPool:
 
     def start(self):
         """
-        Start the evaluation of all the registered executions, registering a
-        signal handler for SIGINT and SIGTERM, stopping the executions on those
-        signals.
+        Start the evaluation of all the registered executions, including the
+        ones of the pools sharing this one, registering a signal handler for
+        SIGINT and SIGTERM, stopping the executions on those signals.
         """
 
         def stop_server(_1: int, _2: Any) -> None:
             self.stop()
 
-        signal.signal(signal.SIGINT, stop_server)
-        signal.signal(signal.SIGTERM, stop_server)
-
-        self.frontend.evaluate()
+        previous_sigint = signal.signal(signal.SIGINT, stop_server)
+        previous_sigterm = signal.signal(signal.SIGTERM, stop_server)
+        try:
+            for execution, priority in compute_priorities(self).items():
+                execution.set_priority(priority)
+            self.frontend.flushExecutions()
+            self.hash_cache.save()
+            get_include_index().save()
+            self.frontend.evaluate()
+        finally:
+            # after the evaluation Ctrl-C has to reach the caller again
+            signal.signal(signal.SIGINT, previous_sigint)
+            signal.signal(signal.SIGTERM, previous_sigterm)
+        self.history.save()
+        if self.tracer:
+            self.tracer.save()
 
     def stop(self):
         """
         Stop the current evaluation
         """
         self.frontend.stopEvaluation()
-        self.stopped = True
+        for pool in self.group:
+            pool.stopped = True
+
+    def _cache_path(self, name: str) -> str:
+        return os.path.join(os.path.dirname(self.config.storedir), name)
 
 
 class Execution:
@@ -68,6 +230,19 @@ class Execution:
     frontend one, it's much more safe because all the setup is done in the
     correct order.
     """
+    # big tasks create hundreds of thousands of executions, avoid having an
+    # instance dict for each of them
+    __slots__ = ("name", "pool", "cmd", "args", "ui_print_tag",
+                 "ui_print_data", "cache_on", "extra_time", "limits",
+                 "can_exclusive", "follows", "stdin", "stdout_fifo",
+                 "stderr_fifo",
+                 "store_stdout", "store_stderr", "store_stdout_bytes",
+                 "store_stderr_bytes", "stdout_capture", "stderr_capture",
+                 "lazy_stderr", "_stderr_requested", "stdout", "stderr",
+                 "_stdout", "_stderr", "_stdout_bytes", "_stderr_bytes",
+                 "_outputs", "dependencies", "fingerprint", "cache_enabled",
+                 "sample", "_on_start_cb", "_on_done_cb", "_on_skip_cb",
+                 "_execution", "_result")
 
     def __init__(self,
                  name: str,
@@ -83,6 +258,7 @@ class Execution:
                  extra_time: float = 0.0,
                  limits: Optional[Resources] = None,
                  can_exclusive: bool = False,
+                 follows: Optional["Execution"] = None,
                  stdin: Union[File, Fifo, str, None] = None,
                  stdout_fifo: Union[Fifo, None] = None,
                  stderr_fifo: Union[Fifo, None] = None,
@@ -92,6 +268,9 @@ class Execution:
                  store_stderr_bytes: bool = False,
                  stdout_limit: int = 0xffffffffffffffff,
                  stderr_limit: int = 0xffffffffffffffff,
+                 stdout_capture: Optional[StreamCapture] = None,
+                 stderr_capture: Optional[StreamCapture] = None,
+                 lazy_stderr: bool = False,
                  inputs: Dict[str, File] = None,
                  outputs: Iterable[Union[str, Tuple[str, bool]]] = ()):
         """
@@ -108,6 +287,8 @@ class Execution:
         execution
         :param limits: Limitations given to the execution
         :param can_exclusive: Whether --exclusive should be considered
+        :param follows: Execution to be dispatched right before this one, the
+        two are kept next to each other in the priorities
         :param stdin: What to pass to stdin to the execution, it can be Fifo, a
         File or the content of a file
         :param stdout_fifo: The Fifo to pipe in the data from stdout.
@@ -118,6 +299,12 @@ class Execution:
         class
         :param store_stderr: Whether to store the content of stderr inside this
         class
+        :param stdout_capture: Receive stdout chunk by chunk, keeping only a
+        bounded part of it in memory. store_stdout must be False
+        :param stderr_capture: Receive stderr chunk by chunk, keeping only a
+        bounded part of it in memory. store_stderr must be False
+        :param lazy_stderr: Fetch stderr into stderr_capture only if the
+        execution fails or if fetch_stderr is called
         :param inputs: A dictionary with the mapping path -> File to put inside
         the sandbox
         :param outputs: A list with the path to the files that should be
@@ -133,6 +320,7 @@ class Execution:
         self.extra_time = extra_time
         self.limits = limits
         self.can_exclusive = can_exclusive
+        self.follows = follows
         self.stdin = stdin
         self.stdout_fifo = stdout_fifo
         self.stderr_fifo = stderr_fifo
@@ -140,6 +328,10 @@ class Execution:
         self.store_stderr = store_stderr
         self.store_stdout_bytes = store_stdout_bytes
         self.store_stderr_bytes = store_stderr_bytes
+        self.stdout_capture = stdout_capture
+        self.stderr_capture = stderr_capture
+        self.lazy_stderr = lazy_stderr
+        self._stderr_requested = False
 
         self.stdout = None  # type: Optional[File]
         self.stderr = None  # type: Optional[File]
@@ -151,6 +343,13 @@ class Execution:
         if not inputs:
             inputs = dict()
 
+        # filled by ExecutionPool.register_execution
+        self.dependencies = []  # type: List[Execution]
+        self.fingerprint = None  # type: Optional[str]
+        self.cache_enabled = self.pool.config.cache in self.cache_on
+        # part of the sample evaluated first with --quick-feedback
+        self.sample = False
+
         self._on_start_cb = None  # type: Optional[Callable]
         self._on_done_cb = None  # type: Optional[Callable]
         self._on_skip_cb = None  # type: Optional[Callable]
@@ -158,11 +357,13 @@ class Execution:
         if group:
             self._execution = group.addExecution(name)
         else:
-            self._execution = self.pool.frontend.addExecution(name)
+            # the declaration is sent together with the other executions when
+            # the pool starts
+            self._execution = self.pool.frontend.addBatchedExecution(name)
         self._result = None  # type: Optional[Result]
 
         # execution generic settings
-        if self.pool.config.cache not in self.cache_on:
+        if not self.cache_enabled:
             self._execution.disableCache()
         if self.can_exclusive and self.pool.config.exclusive:
             self._execution.makeExclusive()
@@ -171,10 +372,14 @@ class Execution:
         if self.extra_time:
             self._execution.setExtraTime(self.extra_time)
 
-        # setup the command to execute
+        # setup the command to execute, the files it depends on are collected
+        # in dag_inputs
+        dag_inputs = dict()  # type: Dict[str, Union[File, Fifo]]
         if isinstance(self.cmd, tuple):
             name, file = self.cmd
             self._execution.setExecutable(name, self.cmd)
+            command = name
+            dag_inputs[name] = file
         # this is an hack because we cannot import SourceFile in here because of
         # a circular dependency
         elif str(type(
@@ -185,17 +390,20 @@ class Execution:
             cmd_type, (cmd, *self.args) = \
                 source_file.language.get_execution_command(
                     source_file.exe_name, self.args, source_file.unit_name)
+            command = cmd
             if cmd_type == CommandType.LOCAL_FILE:
                 self._execution.setExecutable(cmd, source_file.executable)
+                dag_inputs[cmd] = source_file.executable
             else:
                 self._execution.setExecutablePath(cmd)
                 inputs[source_file.exe_name] = source_file.executable
             if not source_file.language.need_compilation:
                 for dep in source_file.dependencies:
-                    inputs[dep.name] = self.pool.frontend.provideFile(
+                    inputs[dep.name] = self.pool.provide_file(
                         dep.path, dep.path, False)
         elif isinstance(self.cmd, str):
             self._execution.setExecutablePath(self.cmd)
+            command = self.cmd
         else:
             raise ValueError(
                 "cmd can be either a File or a str, not a %s" % type(self.cmd))
@@ -204,12 +412,14 @@ class Execution:
         # setup stdin
         if isinstance(self.stdin, File):
             self._execution.setStdin(self.stdin)
+            dag_inputs["<stdin>"] = self.stdin
         elif isinstance(self.stdin, Fifo):
             self._execution.setStdinFifo(self.stdin)
         elif isinstance(self.stdin, str):
-            file = self.pool.frontend.provideFileContent(
+            file = self.pool.provide_file_content(
                 self.stdin, "Stdin of %s" % self.name)
             self._execution.setStdin(file)
+            dag_inputs["<stdin>"] = file
         elif self.stdin is not None:
             raise ValueError(
                 "stdin can be either File, Fifo, str or None, not %s" % type(
@@ -220,6 +430,14 @@ class Execution:
             raise ValueError("Cannot store stdout and use a Fifo")
         if self.store_stderr and self.stderr_fifo is not None:
             raise ValueError("Cannot store stderr and use a Fifo")
+        if self.stdout_capture and (self.store_stdout or self.stdout_fifo):
+            raise ValueError(
+                "Cannot capture stdout and store it or use a Fifo")
+        if self.stderr_capture and (self.store_stderr or self.stderr_fifo):
+            raise ValueError(
+                "Cannot capture stderr and store it or use a Fifo")
+        if self.lazy_stderr and not self.stderr_capture:
+            raise ValueError("Only a captured stderr can be fetched lazily")
         if self.stdout_fifo is not None:
             self._execution.setStdoutFifo(self.stdout_fifo)
         else:
@@ -237,11 +455,18 @@ class Execution:
                 self._execution.addFifo(path, file)
             else:
                 raise ValueError("Unsupported input type %s" % type(file))
+        dag_inputs.update(inputs)
+        self.pool.register_execution(self, command, dag_inputs)
         for path in outputs:
             executable = False
             if isinstance(path, tuple):
                 path, executable = path
             self._outputs[path] = self._execution.output(path, executable)
+            self.pool.register_output(self, path, self._outputs[path])
+        if self.stdout is not None:
+            self.pool.register_output(self, "<stdout>", self.stdout)
+        if self.stderr is not None:
+            self.pool.register_output(self, "<stderr>", self.stderr)
 
         if self.store_stdout:
             self.stdout.getContentsAsString(self._get_stdout_internal,
@@ -255,6 +480,13 @@ class Execution:
         if self.store_stderr_bytes:
             self.stderr.getContentsAsBytes(self._get_stderr_bytes_internal,
                                            stderr_limit)
+        if self.stdout_capture:
+            self.stdout.getContentsAsChunks(self._get_stdout_chunk_internal,
+                                            stdout_limit)
+        if self.stderr_capture and not self.lazy_stderr:
+            self._stderr_requested = True
+            self.stderr.getContentsAsChunks(self._get_stderr_chunk_internal,
+                                            stderr_limit)
 
         self._execution.notifyStart(self._notify_start_internal)
         # getResult should be the last thing done on _execution
@@ -267,6 +499,8 @@ class Execution:
         self.pool.ui_printer.print(self.name, self.ui_print_tag, "START",
                                    self.ui_print_data)
         self.pool.execution_start(self)
+        if self.pool.tracer:
+            self.pool.tracer.started(self)
         if self._on_start_cb:
             self._on_start_cb()
 
@@ -280,29 +514,60 @@ class Execution:
             **self.ui_print_data
         })
         self.pool.execution_done(self)
+        self.pool.history.record(self, result)
+        if self.pool.tracer:
+            self.pool.tracer.finished(self, result)
         self._result = result
+        if result.status != ResultStatus.SUCCESS:
+            self.fetch_stderr()
         self._on_done_internal()
 
     def _skipped_internal(self):
         self.pool.ui_printer.print(self.name, self.ui_print_tag, "SKIPPED",
                                    self.ui_print_data)
+        if self.pool.tracer:
+            self.pool.tracer.skipped(self)
         if self._on_skip_cb:
             self._on_skip_cb()
 
     def _get_stdout_internal(self, stdout: str):
         self._stdout = stdout
+        if self.pool.tracer:
+            self.pool.tracer.stdout_fetched(self)
         self._on_done_internal()
 
     def _get_stderr_internal(self, stderr: str):
         self._stderr = stderr
+        if self.pool.tracer:
+            self.pool.tracer.stderr_fetched(self)
         self._on_done_internal()
 
     def _get_stdout_bytes_internal(self, stdout: bytes):
         self._stdout_bytes = stdout
+        if self.pool.tracer:
+            self.pool.tracer.stdout_fetched(self)
         self._on_done_internal()
 
     def _get_stderr_bytes_internal(self, stderr: bytes):
         self._stderr_bytes = stderr
+        if self.pool.tracer:
+            self.pool.tracer.stderr_fetched(self)
+        self._on_done_internal()
+
+    def _get_stdout_chunk_internal(self, chunk: bytes):
+        self.stdout_capture.feed(chunk)
+        if chunk:
+            return
+        if self.pool.tracer:
+            self.pool.tracer.stdout_fetched(self)
+        self._on_done_internal()
+
+    def _get_stderr_chunk_internal(self, chunk: bytes):
+        self.stderr_capture.feed(chunk)
+        if chunk:
+            return
+        if self.pool.tracer:
+            self.pool.tracer.stderr_fetched(self)
         self._on_done_internal()
 
     def _on_done_internal(self):
@@ -316,6 +581,10 @@ class Execution:
             return
         if self.store_stderr_bytes and self._stderr_bytes is None:
             return
+        if self.stdout_capture and not self.stdout_capture.done:
+            return
+        if self._stderr_requested and not self.stderr_capture.done:
+            return
         if self.result is None:
             return
         self._on_done_cb(self.result)
@@ -324,8 +593,11 @@ class Execution:
     def stdout_content(self) -> str:
         """
         The content of stdout, must be called only if store_stdout has been set
-        to True
+        to True or stdout_capture is set, in that case only the captured part
+        is returned
         """
+        if self.stdout_capture:
+            return self.stdout_capture.content
         if not self.store_stdout:
             raise ValueError("Stdout was not captured")
         return self._stdout
@@ -334,8 +606,13 @@ class Execution:
     def stderr_content(self) -> str:
         """
         The content of stderr, must be called only if store_stderr has been set
-        to True
+        to True or stderr_capture is set, in that case only the captured part
+        is returned. With lazy_stderr it's None if stderr was not fetched
         """
+        if self.stderr_capture:
+            if not self._stderr_requested:
+                return None
+            return self.stderr_capture.content
         if not self.store_stderr:
             raise ValueError("Stderr was not captured")
         return self._stderr
@@ -360,6 +637,34 @@ class Execution:
             raise ValueError("Stderr was not captured as bytes")
         return self._stderr_bytes
 
+    def fetch_stderr(self):
+        """
+        Fetch the stderr of a lazy_stderr execution, the on_done callback is
+        called after it's received. Must be called before the end of the
+        evaluation: before starting the pool by the UIs that show it, or from
+        the callbacks of the execution.
+        """
+        if not self.lazy_stderr or self._stderr_requested:
+            return
+        self._stderr_requested = True
+        self.stderr.fetchContentsAsChunks(self._get_stderr_chunk_internal)
+
+    def set_priority(self, priority: int):
+        """
+        Set the priority of the execution, the ones with higher priority are
+        dispatched first. Must be called before starting the pool.
+        """
+        self._execution.setPriority(priority)
+
+    def cancel(self):
+        """
+        Ask the server not to run the execution, if it has not started yet.
+        The execution and the ones that depend on it will be skipped. Must be
+        called during the evaluation.
+        """
+        if self._result is None:
+            self._execution.cancel()
+
     def output(self, path: str) -> File:
         """
         The file generated by the execution on that path.
@@ -2,19 +2,28 @@
 import os.path
 import string
 from task_maker.languages import Dependency
-from typing import List
+from typing import Dict, List, Optional
 
 
-def sanitize_command(args: List[str]) -> List[Dependency]:
+def sanitize_command(args: List[str],
+                     exists: Optional[Dict[str, bool]] = None
+                     ) -> List[Dependency]:
     """
     Look at the arguments list, the ones that matches an existing filename is
     considered a dependency and it will be copied inside the sandbox. The args
     parameter's content will be modified and the list of dependencies is
-    returned.
+    returned. If exists is provided it's used to remember which arguments are
+    files, avoiding to check again the ones repeated in many commands.
     """
     dependencies = []  # type: List[Dependency]
     for i, arg in enumerate(args):
-        if os.path.exists(arg):
+        if exists is None:
+            is_file = os.path.exists(arg)
+        elif arg in exists:
+            is_file = exists[arg]
+        else:
+            is_file = exists[arg] = os.path.exists(arg)
+        if is_file:
             name = sanitize_filename(arg)
             args[i] = name
             dependencies += [Dependency(name=name, path=arg)]
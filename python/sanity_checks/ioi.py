@@ -2,8 +2,8 @@
 
 import os.path
 import re
+import shutil
 import subprocess
-from distutils.spawn import find_executable
 from task_maker.formats import IOITask, list_files, VALIDATION_INPUT_NAME, \
     TaskType
 from task_maker.languages import Language
@@ -13,6 +13,10 @@ from task_maker.task_maker_frontend import File, Result, ResultStatus
 from task_maker.uis.ioi import IOIUIInterface
 from typing import List, Set, Optional, Dict
 
+# origins of the messages of the checks, see UIInterface.forget_messages
+PRE_CHECKS = ("sanity", )
+POST_CHECKS = ("sanity-post", )
+
 
 def _get_languages(solutions: List[Solution]):
     languages = set()
@@ -50,7 +54,7 @@ def _get_statement_tex():
 
 def _check_git_has_file(path: str) -> Optional[bool]:
     # git is not installed
-    if not find_executable("git"):
+    if not shutil.which("git"):
         return None
     proc = subprocess.run(["git", "ls-files", "--", path],
                           stderr=subprocess.DEVNULL,
@@ -138,7 +142,7 @@ def _setup_execution_callback(interface: IOIUIInterface, execution: Execution,
                               error_message: str):
     def on_done(result: Result):
         if result.status != ResultStatus.SUCCESS:
-            interface.add_error(error_message)
+            interface.add_error(error_message, PRE_CHECKS)
 
     execution.bind(on_done)
 
@@ -147,19 +151,21 @@ def _setup_checker_callback(interface: IOIUIInterface, checking: Execution,
                             error_message: str, custom_checker: bool):
     def on_done(result: Result):
         if result.status != ResultStatus.SUCCESS:
-            interface.add_error(error_message)
+            interface.add_error(error_message, PRE_CHECKS)
         if not custom_checker:
             return
         stdout = checking.stdout_content
         try:
             score = float(stdout)
         except ValueError:
-            interface.add_error(error_message +
-                                ": invalid score: {}".format(stdout))
+            interface.add_error(
+                error_message + ": invalid score: {}".format(stdout),
+                PRE_CHECKS)
             return
         if not 0.0 <= score <= 1.0:
-            interface.add_error(error_message +
-                                ": invalid score: {}".format(stdout))
+            interface.add_error(
+                error_message + ": invalid score: {}".format(stdout),
+                PRE_CHECKS)
             return
 
     checking.bind(on_done)
@@ -262,7 +268,7 @@ def check_sample_cases(task: IOITask, pool: ExecutionPool,
             continue
         sample_num = int(match.group(1))
         num_to_input[sample_num] = infile
-        num_to_input_file[sample_num] = pool.frontend.provideFile(
+        num_to_input_file[sample_num] = pool.provide_file(
             infile, "Sample input {}".format(infile), False)
         # skip the validation if there is no default validator
         if not task.default_val:
@@ -295,7 +301,7 @@ def check_sample_cases(task: IOITask, pool: ExecutionPool,
         if sample_num not in num_to_input:
             continue
         num_to_output[sample_num] = outfile
-        num_to_output_file[sample_num] = pool.frontend.provideFile(
+        num_to_output_file[sample_num] = pool.provide_file(
             outfile, "Sample output {}".format(outfile), False)
         in_files = dict()
         # if the validator is not present we don't wait for it
@@ -388,10 +394,11 @@ def sanity_pre_checks(task: IOITask, solutions: List[Solution],
     """
     Runs all the checks that should be run before the execution of the task.
     """
-    check_subtask_score_sum(task, interface)
-    check_att_folder(task, solutions, interface)
-    check_sol_folder(solutions, interface)
-    check_sample_cases(task, pool, interface)
+    with interface.messages_from(PRE_CHECKS):
+        check_subtask_score_sum(task, interface)
+        check_att_folder(task, solutions, interface)
+        check_sol_folder(solutions, interface)
+        check_sample_cases(task, pool, interface)
 
 
 def sanity_post_checks(task: IOITask, solutions: List[Solution],
@@ -399,6 +406,7 @@ def sanity_post_checks(task: IOITask, solutions: List[Solution],
     """
     Runs all the checks that should be run after the execution of the task.
     """
-    check_solution_score(task, interface)
-    check_statement(task, interface)
-    check_symlinks(interface)
+    with interface.messages_from(POST_CHECKS):
+        check_solution_score(task, interface)
+        check_statement(task, interface)
+        check_symlinks(interface)
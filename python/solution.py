@@ -2,12 +2,13 @@
 
 from abc import ABC, abstractmethod
 from task_maker.args import CacheMode
+from task_maker.capture import StreamCapture
 from task_maker.config import Config
 from task_maker.formats import IOITask
 from task_maker.remote import Execution, ExecutionPool
 from task_maker.source_file import SourceFile
 from task_maker.task_maker_frontend import File, Resources, Fifo
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 
 
 def get_checker_execution(pool: ExecutionPool,
@@ -57,7 +58,7 @@ def get_checker_execution(pool: ExecutionPool,
         limits=limits,
         inputs=inputs,
         store_stdout=True,
-        store_stderr=True)
+        stderr_capture=StreamCapture())
 
 
 class Solution(ABC):
@@ -69,6 +70,9 @@ class Solution(ABC):
         self.solution = solution
         self.task = task
         self.config = config
+        # (subtask, testcase) -> (warm-up, timed runs, their checks) with
+        # --repeat
+        self.timed_runs = dict()  # type: Dict[Tuple[int, int], Tuple]
 
     @abstractmethod
     def evaluate(self, testcase: int, subtask: int, input: File,
@@ -118,35 +122,73 @@ class BatchSolution(Solution):
         outputs = []
         if self.task.output_file:
             outputs.append(self.task.output_file)
-        eval = Execution(
-            "Evaluation of %s on testcase %d" % (self.solution.name, testcase),
-            self.solution.pool,
-            self.solution, [],
-            "evaluation", {
-                "name": self.solution.name,
-                "subtask": subtask,
-                "testcase": testcase
-            },
-            cache_on=[CacheMode.ALL],
-            extra_time=self.config.extra_time,
-            limits=limits,
-            can_exclusive=True,
-            stdin=stdin,
-            inputs=inputs,
-            outputs=outputs)
+
+        def run(description: str, timed: bool,
+                follows: Optional[Execution] = None) -> Execution:
+            # the timings of a cached result are meaningless, the timed runs
+            # are dispatched one after the other and with --exclusive they are
+            # alone on their worker
+            return Execution(
+                description,
+                self.solution.pool,
+                self.solution, [],
+                "evaluation", {
+                    "name": self.solution.name,
+                    "subtask": subtask,
+                    "testcase": testcase
+                },
+                cache_on=[] if timed else [CacheMode.ALL],
+                extra_time=self.config.extra_time,
+                limits=limits,
+                can_exclusive=True,
+                follows=follows,
+                stdin=stdin,
+                inputs=inputs,
+                outputs=outputs)
+
+        def check(eval: Execution) -> Execution:
+            return self.check(testcase, subtask, input, self.get_output(eval),
+                              correct_output)
+
+        description = "Evaluation of %s on testcase %d" % (self.solution.name,
+                                                          testcase)
+        if self.config.repeat > 1:
+            warmup = None
+            if self.config.warmup:
+                warmup = run("Warm-up of " + description, True)
+            runs = []  # type: List[Execution]
+            for num in range(self.config.repeat):
+                runs.append(
+                    run("%s (run %d)" % (description, num + 1), True,
+                        runs[-1] if runs else warmup))
+            # every run is checked, the verdict is the one of the run chosen
+            # by --repeat-statistic
+            checks = [check(eval) for eval in runs]
+            self.timed_runs[(subtask, testcase)] = (warmup, runs, checks)
+            return runs[:1], checks[0]
+        eval = run(description, False)
+        return [eval], check(eval)
+
+    def get_output(self, evaluation: Execution) -> File:
+        """
+        The output file written by the solution in one of its evaluations
+        """
         if self.task.output_file:
-            output = eval.output(self.task.output_file)
-        else:
-            output = eval.stdout
+            return evaluation.output(self.task.output_file)
+        return evaluation.stdout
 
-        check = get_checker_execution(
+    def check(self, testcase: int, subtask: int, input: File, output: File,
+              correct_output: File) -> Execution:
+        """
+        Check an output of the solution on the testcase, it can be one from a
+        previous evaluation when only the checker has changed.
+        """
+        return get_checker_execution(
             self.solution.pool, self.task, self.solution.name, subtask,
             testcase, self.checker, input, output, correct_output,
             "Checking solution %s for testcase %d" % (self.solution.name,
                                                       testcase))
 
-        return [eval], check
-
 
 class CommunicationSolution(Solution):
     """
@@ -252,6 +294,6 @@ class CommunicationSolution(Solution):
             can_exclusive=True,
             cache_on=[CacheMode.ALL],
             store_stdout=True,
-            store_stderr=True)
+            stderr_capture=StreamCapture())
 
         return executions, manager
@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
 import os.path
-from distutils.spawn import find_executable
+import shutil
 from task_maker.args import Arch
+from task_maker.capture import StreamCapture
 from task_maker.detect_exe import get_exeflags, EXEFLAG_NONE
 from task_maker.languages import LanguageManager, Language, CommandType, \
     GraderInfo, Dependency
-from task_maker.remote import ExecutionPool, Execution
-from task_maker.task_maker_frontend import File
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple, TYPE_CHECKING
 
-COMPILATION_STDERR_LIMIT = 2**64-1
+# the frontend is needed only to compile the sources, the task can be parsed
+# without it
+if TYPE_CHECKING:
+    from task_maker.remote import ExecutionPool, Execution
+    from task_maker.task_maker_frontend import File
+
+# directory of the compilation sandboxes with the precompiled headers
+PRECOMPILED_HEADERS_DIR = "tm_pch"
 
 
 def is_executable(path: str) -> bool:
@@ -24,6 +30,99 @@ def is_executable(path: str) -> bool:
     return False
 
 
+def get_precompiled_header(pool: "ExecutionPool", language: Language,
+                           header: str, target_arch: Arch) -> "File":
+    """
+    Get the precompiled version of a system header, the header is compiled at
+    most once per pool for each language and architecture.
+    """
+    from task_maker.remote import Execution
+    key = (language.name, header, target_arch)
+    if key in pool.precompiled_headers:
+        return pool.precompiled_headers[key]
+    source_name = os.path.basename(header)
+    output = source_name + ".gch"
+    cmd_type, cmd = language.get_header_compilation_command(
+        source_name, output, True, target_arch)
+    if cmd_type != CommandType.SYSTEM:
+        raise ValueError("Local file compilers are not supported yet")
+    source = pool.provide_file_content("#include <%s>\n" % header,
+                                       "Source of the header " + header)
+    compilation = Execution(
+        "Precompilation of %s" % header,
+        pool,
+        cmd[0],
+        cmd[1:],
+        "header-compilation", {
+            "header": header,
+            "language": language.name
+        },
+        inputs={source_name: source},
+        outputs=[output])
+    pool.precompiled_headers[key] = compilation.output(output)
+    return pool.precompiled_headers[key]
+
+
+def add_precompiled_headers(pool: "ExecutionPool", language: Language,
+                            target_arch: Arch, cmd: List[str],
+                            inputs: Dict[str, "File"]) -> List[str]:
+    """
+    Add the precompiled headers of the language to the inputs of a compilation,
+    returning the compilation command that uses them
+    """
+    if not language.precompiled_headers:
+        return cmd
+    for header in language.precompiled_headers:
+        path = os.path.join(PRECOMPILED_HEADERS_DIR, header + ".gch")
+        inputs[path] = get_precompiled_header(pool, language, header,
+                                              target_arch)
+    return cmd[:1] + language.get_precompiled_headers_flags(
+        PRECOMPILED_HEADERS_DIR) + cmd[1:]
+
+
+def get_compiled_grader(pool: "ExecutionPool", grader: GraderInfo,
+                        target_arch: Arch
+                        ) -> Optional[Tuple[str, "Execution"]]:
+    """
+    Get the name of the object of the grader and the execution that compiles
+    it, the grader is compiled at most once per pool for each architecture.
+    None if the language cannot compile the grader separately.
+    """
+    from task_maker.remote import Execution
+    source = grader.files[0]
+    key = (grader.for_language.name, source.path, target_arch)
+    if key in pool.compiled_graders:
+        return pool.compiled_graders[key]
+    object_name = os.path.splitext(source.name)[0] + ".o"
+    command = grader.for_language.get_object_compilation_command(
+        source.name, object_name, True, target_arch)
+    if command is None:
+        pool.compiled_graders[key] = None
+        return None
+    cmd_type, cmd = command
+    if cmd_type != CommandType.SYSTEM:
+        raise ValueError("Local file compilers are not supported yet")
+    inputs = dict()
+    for dep in grader.files:
+        inputs[dep.name] = pool.provide_file(dep.path, dep.path, False)
+    cmd = add_precompiled_headers(pool, grader.for_language, target_arch, cmd,
+                                  inputs)
+    compilation = Execution(
+        "Compilation of %s" % source.name,
+        pool,
+        cmd[0],
+        cmd[1:],
+        "grader-compilation", {
+            "file": source.name,
+            "path": source.path
+        },
+        inputs=inputs,
+        outputs=[object_name],
+        stderr_capture=StreamCapture())
+    pool.compiled_graders[key] = (object_name, compilation)
+    return pool.compiled_graders[key]
+
+
 class SourceFile:
     """
     A SourceFile contains a ref to a source file, this class will manage it's
@@ -49,7 +148,7 @@ class SourceFile:
                 "Asked to copy the executable but not specified where")
         old_path = path
         if not os.path.exists(path):
-            path = find_executable(path)
+            path = shutil.which(path)
         if not path:
             raise ValueError("Cannot find %s" % old_path)
 
@@ -85,23 +184,32 @@ class SourceFile:
         self.compilation = None  # type: Optional[Execution]
         self.compilation_stderr = None  # type: Optional[File]
         self.compilation_stdout = None  # type: Optional[File]
+        # the compilation of the grader, if it's compiled separately
+        self.grader_compilation = None  # type: Optional[Execution]
 
     @property
     def prepared(self) -> bool:
         return self.pool is not None
 
-    def unprepare(self):
+    def unprepare(self, keep_executable: bool = False):
         """
         Unprepare the source file. Useful for recompiling it in a different
-        execution pool.
+        execution pool. With keep_executable a successfully built executable is
+        kept: the next `prepare` provides it from the store of the server
+        instead of compiling the source again, the compilation stays the one
+        that built it.
         """
         self.pool = None
+        if keep_executable and self.executable is not None and \
+                self.executable.hash():
+            return
         self.executable = None
         self.compilation = None
         self.compilation_stderr = None
         self.compilation_stdout = None
+        self.grader_compilation = None
 
-    def prepare(self, pool: ExecutionPool):
+    def prepare(self, pool: "ExecutionPool"):
         """
         Prepare the source file for execution, compile the source if needed.
         After this call self.executable will be available. If the source file
@@ -111,16 +219,30 @@ class SourceFile:
         if self.prepared:
             return
         self.pool = pool
+        if self.executable is not None:
+            # kept by unprepare, it is already written in write_bin_to
+            self.executable = pool.provide_stored_file(
+                self.executable, "Executable of " + self.name, True)
+            return
         if self.language.need_compilation:
             self._compile()
         else:
             self._not_compile()
         if self.write_bin_to and not self.pool.config.dry_run:
-            self.executable.getContentsToFile(self.write_bin_to, True, True)
+            self.pool.write_file(self.executable, self.write_bin_to)
 
     def _compile(self):
+        from task_maker.remote import Execution
         compilation_files = [self.name]
+        grader_object = None
         if self.grader:
+            grader_object = get_compiled_grader(self.pool, self.grader,
+                                                self.target_arch)
+        if grader_object:
+            # the grader is linked, not compiled again
+            object_name, self.grader_compilation = grader_object
+            compilation_files.append(object_name)
+        elif self.grader:
             compilation_files += [d.name for d in self.grader.files]
 
         cmd_type, cmd = self.language.get_compilation_command(
@@ -138,16 +260,20 @@ class SourceFile:
             source_name = self.name
         inputs = {
             source_name:
-                self.pool.frontend.provideFile(
+                self.pool.provide_file(
                     self.path, "Source file for " + self.name, False)
         }
         for dep in self.dependencies:
-            inputs[dep.name] = self.pool.frontend.provideFile(
+            inputs[dep.name] = self.pool.provide_file(
                 dep.path, dep.path, False)
         if self.grader:
             for dep in self.grader.files:
-                inputs[dep.name] = self.pool.frontend.provideFile(
+                inputs[dep.name] = self.pool.provide_file(
                     dep.path, dep.path, False)
+        if self.grader_compilation:
+            inputs[object_name] = self.grader_compilation.output(object_name)
+        cmd = add_precompiled_headers(self.pool, self.language,
+                                      self.target_arch, cmd, inputs)
         self.compilation = Execution(
             "Compilation of %s" % self.name,
             self.pool,
@@ -159,14 +285,12 @@ class SourceFile:
             },
             inputs=inputs,
             outputs=[(self.exe_name, True)],
-            stdout_limit=COMPILATION_STDERR_LIMIT,
-            stderr_limit=COMPILATION_STDERR_LIMIT,
-            store_stderr=True,
-            store_stdout=True)
+            stdout_capture=StreamCapture(),
+            stderr_capture=StreamCapture())
         self.executable = self.compilation.output(self.exe_name)
 
     def _not_compile(self):
-        self.executable = self.pool.frontend.provideFile(
+        self.executable = self.pool.provide_file(
             self.path, "Source file for " + self.name, True)
 
     def __repr__(self):
@@ -215,7 +215,7 @@ class OIITexStatement(Statement):
                 os.path.dirname(statement.path), task_tex_file,
                 params.get("logo"))
 
-            file = pool.frontend.provideFileContent(
+            file = pool.provide_file_content(
                 task_tex_file, "Statement file %s" % statement.name)
 
             inputs[os.path.join(task_name, statement.name)] = file
@@ -228,7 +228,7 @@ class OIITexStatement(Statement):
                 # non asy files, like images or other tex files, they are just
                 # copied inside the sandbox
                 if os.path.splitext(dep.path)[1] != ".asy":
-                    file = pool.frontend.provideFile(
+                    file = pool.provide_file(
                         dep.path, "Statement dependency %s" % dep.name)
                     if os.path.join(task_name, dep.name) not in inputs:
                         inputs[os.path.join(task_name, dep.name)] = file
@@ -257,14 +257,14 @@ class OIITexStatement(Statement):
 
         booklet_tex = build_contest_tex_file(pool.config, packages,
                                              statement_files, language)
-        booklet = pool.frontend.provideFileContent(booklet_tex,
-                                                   "Booklet source file")
+        booklet = pool.provide_file_content(booklet_tex,
+                                            "Booklet source file")
         inputs["booklet.tex"] = booklet
 
         # add the template files to the sandbox
         for path in template_files:
             name = path[len(data_dir) + 1:]
-            file = pool.frontend.provideFile(path, "Template file %s" % name)
+            file = pool.provide_file(path, "Template file %s" % name)
             inputs[name] = file
 
         # TODO eventually use directly latexmk when setting env vars will be
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import pickle
+from task_maker.args import TASK_MAKER_VERSION
+from task_maker.config import Config
+from task_maker.file_cache import FileHashCache, get_hash_cache
+from task_maker.formats import IOITask
+from task_maker.source_file import SourceFile
+from typing import Callable, Dict, List, Optional, Set
+
+# directories of the task whose content decides which files are used, like the
+# solutions, the checker or the static input files
+TASK_DIRS = [".", "sol", "gen", "check", "cor", "input", "output"]
+
+
+def get_cached_task(config: Config, kind: str, files: List[str],
+                    build: Callable[[], IOITask]) -> IOITask:
+    """
+    Get the task parsed by build(), reusing the snapshot of the previous run
+    if none of the files it was built from changed. The files are the ones
+    explicitly passed, the sources referenced by the task, their dependencies
+    and the directories of the task. They are compared by content, using the
+    hash cache of the files, and the snapshots of other versions of
+    task-maker are ignored.
+    """
+    hash_cache = get_hash_cache(
+        os.path.join(os.path.dirname(config.storedir), "hashes.json"))
+    path = _snapshot_path(config, kind)
+    task = _load(path, config, hash_cache)
+    if task is not None:
+        hash_cache.save()
+        return task
+    task = build()
+    paths = set(os.path.abspath(f) for f in files) | _task_files(task)
+    snapshot = {
+        "version": TASK_MAKER_VERSION,
+        "copy_exe": config.copy_exe,
+        "hashes": dict((path, _hash(path, hash_cache)) for path in paths),
+        "task": task
+    }
+    hash_cache.save()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return task
+
+
+def _snapshot_path(config: Config, kind: str) -> str:
+    # the task is always parsed from inside its directory
+    key = hashlib.sha256((os.getcwd() + "\0" + kind).encode()).hexdigest()
+    return os.path.join(
+        os.path.dirname(config.storedir), "tasks", key[:32] + ".pickle")
+
+
+def _hash(path: str, hash_cache: FileHashCache) -> Optional[str]:
+    # the content of a directory is the list of its entries
+    try:
+        if os.path.isdir(path):
+            names = "\0".join(sorted(os.listdir(path)))
+            return hashlib.sha256(names.encode()).hexdigest()
+        return hash_cache.get_hash(path)
+    except OSError:
+        return None
+
+
+def _load(path: str, config: Config,
+          hash_cache: FileHashCache) -> Optional[IOITask]:
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError,
+            ImportError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or \
+            snapshot.get("version") != TASK_MAKER_VERSION:
+        return None
+    if snapshot["copy_exe"] != config.copy_exe:
+        return None
+    hashes = snapshot["hashes"]  # type: Dict[str, Optional[str]]
+    if any(_hash(path, hash_cache) != digest
+           for path, digest in hashes.items()):
+        return None
+    return snapshot["task"]
+
+
+def _task_files(task: IOITask) -> Set[str]:
+    files = set(os.path.abspath(d) for d in TASK_DIRS)
+    sources = [task.official_solution, task.checker]
+    if task.default_gen:
+        sources.append(task.default_gen.source_file)
+    if task.default_val:
+        sources.append(task.default_val.source_file)
+    for subtask in task.subtasks.values():
+        for testcase in subtask.testcases.values():
+            if testcase.generator:
+                sources.append(testcase.generator.source_file)
+            if testcase.validator:
+                sources.append(testcase.validator.source_file)
+            for dep in testcase.extra_deps:
+                files.add(os.path.abspath(dep.path))
+            if testcase.input_file:
+                files.add(os.path.abspath(testcase.input_file))
+            if testcase.output_file:
+                files.add(os.path.abspath(testcase.output_file))
+    for grader in task.grader_map.values():
+        for dep in grader.files:
+            files.add(os.path.abspath(dep.path))
+    for source in sources:  # type: Optional[SourceFile]
+        if source is None:
+            continue
+        files.add(os.path.abspath(source.path))
+        for dep in source.dependencies:
+            files.add(os.path.abspath(dep.path))
+    return files
@@ -7,10 +7,17 @@ import os.path
 from task_maker.args import get_parser, TaskFormat
 from task_maker.config import Config
 from task_maker.detect_format import find_task_dir
-from task_maker.formats import ioi_format, tm_format, terry_format
 from task_maker.help import check_help
-from task_maker.languages import LanguageManager
-from task_maker.manager import get_frontend, spawn_server, spawn_worker, stop
+from task_maker.include_index import get_include_index, \
+    load_include_index
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from task_maker.task_maker_frontend import Frontend
+    from task_maker.uis import UIInterface
+
+# the formats, the frontend and the UIs are imported only when needed, so the
+# commands that don't evaluate anything start quickly
 
 MainRet = namedtuple("MainRet", ["exitcode", "interface", "stopped"])
 
@@ -20,11 +27,14 @@ def get_task_format(fmt: TaskFormat):
     Get the format class based on the format of the task.
     """
     if fmt == TaskFormat.IOI:
-        return ioi_format.IOIFormat
+        from task_maker.formats.ioi_format import IOIFormat
+        return IOIFormat
     elif fmt == TaskFormat.TM:
-        return tm_format.TMFormat
+        from task_maker.formats.tm_format import TMFormat
+        return TMFormat
     elif fmt == TaskFormat.TERRY:
-        return terry_format.TerryFormat
+        from task_maker.formats.terry_format import TerryFormat
+        return TerryFormat
     raise ValueError("Format %s not supported" % fmt)
 
 
@@ -35,11 +45,15 @@ def setup(config: Config):
     """
     check_help(config)
     if config.run_server:
+        from task_maker.manager import spawn_server
         return spawn_server(config)
     if config.run_worker:
+        from task_maker.manager import spawn_worker
         return spawn_worker(config)
 
-    LanguageManager.load_languages()
+    # the languages are loaded on first use
+    load_include_index(
+        os.path.join(os.path.dirname(config.storedir), "includes.json"))
 
 
 def run(config: Config) -> MainRet:
@@ -47,6 +61,7 @@ def run(config: Config) -> MainRet:
     Execute task-maker on the given configuration.
     """
     if config.stop:
+        from task_maker.manager import stop
         stop()
         return MainRet(exitcode=0, interface=None, stopped=True)
     task_dir, fmt = find_task_dir(config.task_dir, config.max_depth,
@@ -69,15 +84,67 @@ def run(config: Config) -> MainRet:
         ret = task_format.fuzz_checker(config)
         return MainRet(exitcode=ret, interface=None, stopped=True)
 
-    frontend = get_frontend(config)
-
-    interface = task_format.evaluate_task(frontend, config)
+    from task_maker.manager import get_frontend
+    watcher = None
+    if config.watch:
+        from task_maker.watcher import TaskWatcher
+        watcher = TaskWatcher(task_dir)
+        # the edits saved during an evaluation trigger the next one
+        watcher.start()
+    # each evaluation has its own frontend on this connection
+    connection = get_frontend(config)
+    interface = None
+    changed = []
+    try:
+        while True:
+            # the sources may have changed since the previous round
+            get_include_index().refresh()
+            try:
+                interface = evaluate(task_format, connection, config,
+                                     interface, changed)
+            except Exception as ex:
+                if not watcher:
+                    raise
+                # e.g. a half saved task.yaml, wait for the next save
+                print("Cannot evaluate the task: %s" % ex, file=sys.stderr)
+                interface = None
+            if not watcher or (interface and interface.pool.stopped):
+                break
+            if interface:
+                watcher.ignored |= interface.pool.written_files
+            print("Watching for changes, press Ctrl-C to exit",
+                  file=sys.stderr)
+            try:
+                changed = watcher.wait_for_changes()
+            except KeyboardInterrupt:
+                break
+            print("Changed: " + ", ".join(changed), file=sys.stderr)
+    finally:
+        if watcher:
+            watcher.close()
+    if not interface:
+        return MainRet(exitcode=1, interface=None, stopped=False)
     return MainRet(
         exitcode=len(interface.errors),
         interface=interface,
         stopped=interface.pool.stopped)
 
 
+def evaluate(task_format, connection: "Frontend", config: Config,
+             interface: Optional["UIInterface"],
+             changed: List[str]) -> "UIInterface":
+    """
+    Evaluate the task with a new frontend on the connection. With --watch,
+    after a completed evaluation whose interface is given, only the part of
+    the task affected by the changed files is evaluated again, if the format
+    supports it.
+    """
+    if interface and task_format.update_task(connection.nextEvaluation(),
+                                             config, interface, changed):
+        return interface
+    return task_format.evaluate_task(connection.nextEvaluation(), config)
+
+
 def main():
     config = Config()
     args = get_parser(False).parse_args()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import os.path
+import sys
+import tempfile
+import tracemalloc
+
+import pytest
+import task_maker.uis.ioi as ioi
+from task_maker.args import CacheMode
+from task_maker.config import Config
+from task_maker.manager import get_frontend
+from task_maker.printer import Printer
+from task_maker.remote import Execution, ExecutionPool
+from task_maker.task_maker_frontend import Resources
+from task_maker.uis import UIPrinter
+
+NUM_TESTCASES = 20000
+# upper bound of the memory used for the state of a solution in a testcase
+MAX_BYTES_PER_SOLUTION_TESTCASE = 384
+# upper bound of the memory used for the generation state of a testcase
+MAX_BYTES_PER_TESTCASE = 160
+# upper bound of the memory used by the evaluation of a solution in a testcase,
+# including what the pool keeps for its outputs
+MAX_BYTES_PER_EXECUTION = 2560
+# what the checkers print, one copy is read for each testcase
+CHECKER_MESSAGES = ["Output is correct", "Wrong answer on line 1"]
+
+
+def measure(build) -> float:
+    """
+    Memory allocated by build() and still alive, in bytes per testcase
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        state = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del state
+    return (after - before) / NUM_TESTCASES
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = Config()
+        config.task_dir = temp_dir
+        config.cache = CacheMode.NOTHING
+        config.dry_run = True
+        config.storedir = os.path.join(temp_dir, "files")
+        config.tempdir = os.path.join(temp_dir, "temp")
+        config.server_pidfile = os.path.join(temp_dir, "server.pid")
+        config.server_logfile = os.path.join(temp_dir, "server.log")
+        config.worker_pidfile = os.path.join(temp_dir, "worker.pid")
+        config.worker_logfile = os.path.join(temp_dir, "worker.log")
+        frontend = get_frontend(config)
+        yield ExecutionPool(config, frontend, UIPrinter(Printer(), False))
+
+
+def test_solution_status_memory():
+    subtasks = {0: list(range(NUM_TESTCASES))}
+
+    def build():
+        status = ioi.SolutionStatus(None, None, None, subtasks)
+        # a single evaluation per testcase, like a batch task. The Results are
+        # created by the frontend, a Resources is the same pybind11 wrapper
+        # around a C++ struct
+        for testcase in status.testcase_results[0].values():
+            testcase.result = [Resources()]
+            testcase.checker_result = Resources()
+            testcase.checked = True
+            testcase.score = 1.0
+            testcase.status = ioi.TestcaseSolutionStatus.ACCEPTED
+        for tc_num, testcase in status.testcase_results[0].items():
+            # a new string for each testcase, like the stderr of the checker
+            stderr = CHECKER_MESSAGES[tc_num % 2].encode() + b"\n"
+            testcase.checker_outcome = sys.intern(stderr.decode().strip())
+        return status
+
+    per_testcase = measure(build)
+    print("%.1f bytes per solution per testcase" % per_testcase)
+    assert per_testcase <= MAX_BYTES_PER_SOLUTION_TESTCASE
+
+
+def test_generation_status_memory():
+    def build():
+        return dict((tc_num, ioi.TestcaseGenerationResult())
+                    for tc_num in range(NUM_TESTCASES))
+
+    per_testcase = measure(build)
+    print("%.1f bytes per testcase" % per_testcase)
+    assert per_testcase <= MAX_BYTES_PER_TESTCASE
+
+
+def test_execution_memory(pool: ExecutionPool):
+    input = pool.provide_file_content("1 2\n", "Input file")
+    validation = pool.provide_file_content("", "Validation")
+
+    def build():
+        executions = []
+        for tc_num in range(NUM_TESTCASES):
+            # like the evaluation of a batch solution
+            limits = Resources()
+            limits.cpu_time = 1.0
+            limits.memory = 262144
+            executions.append(
+                Execution(
+                    "Evaluation of sol.cpp on testcase %d" % tc_num,
+                    pool,
+                    "true", [],
+                    "evaluation", {
+                        "name": "sol.cpp",
+                        "subtask": 0,
+                        "testcase": tc_num
+                    },
+                    cache_on=[CacheMode.ALL],
+                    limits=limits,
+                    can_exclusive=True,
+                    stdin=input,
+                    inputs={"tm_wait_validation": validation},
+                    outputs=["output.txt"]))
+        return executions
+
+    per_testcase = measure(build)
+    print("%.1f bytes per execution" % per_testcase)
+    assert per_testcase <= MAX_BYTES_PER_EXECUTION
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "--verbose", "-s"]))
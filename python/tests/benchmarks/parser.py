@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import gc
+import os
+import tempfile
+import time
+
+import pytest
+from task_maker.formats import IOITask, TaskType
+from task_maker.formats.ioi_format.parsing import gen_testcases
+from task_maker.formats.tm_format import parse_cases
+
+SIZES = [10000, 100000]
+# number of times each file is parsed, the fastest one is considered
+NUM_RUNS = 3
+# upper bound of the ratio between the time per testcase of the biggest and
+# of the smallest file, the parsing should scale linearly
+MAX_SLOWDOWN = 2.0
+
+
+@pytest.fixture
+def task_dir():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.mkdir("gen")
+        for name in ["generator.py", "validator.py"]:
+            with open(os.path.join("gen", name), "w") as f:
+                f.write("#!/usr/bin/env python3\n")
+        try:
+            yield tmp
+        finally:
+            os.chdir(cwd)
+
+
+def make_task() -> IOITask:
+    return IOITask("task", "Task", {}, None, dict(), None, 1, 1, "", "",
+                   TaskType.Batch, {})
+
+
+def write_cases_gen(num_testcases: int):
+    with open("gen/cases.gen", "w") as f:
+        f.write(": GEN default gen/generator.py N M SEED\n")
+        f.write(": VAL default gen/validator.py $INPUT\n")
+        f.write(": CONSTRAINT 1 <= $N <= 1000000\n")
+        for st_num in range(10):
+            f.write(": SUBTASK 10 subtask %d\n" % st_num)
+            f.write(": CONSTRAINT $M <= %d\n" % (1000 * (st_num + 1)))
+            for tc_num in range(num_testcases // 10):
+                if tc_num % 2:
+                    f.write("$MAX_N %d %d\n" % (tc_num % 1000, tc_num))
+                else:
+                    f.write("%d 'quoted %d' %d\n" % (tc_num + 1, tc_num,
+                                                      tc_num))
+
+
+def write_gen_GEN(num_testcases: int):
+    with open("gen/GEN", "w") as f:
+        for st_num in range(10):
+            f.write("#ST: 10\n")
+            for tc_num in range(num_testcases // 10):
+                f.write("%d %d  # testcase %d\n" % (tc_num, tc_num * 7,
+                                                   tc_num))
+
+
+def time_per_testcase(parse, num_testcases: int) -> float:
+    times = []
+    for _ in range(NUM_RUNS):
+        gc.collect()
+        # the full collections of the cyclic gc are triggered only with many
+        # objects alive and would hide the scaling of the parser itself
+        gc.disable()
+        try:
+            start = time.monotonic()
+            parse()
+            times.append(time.monotonic() - start)
+        finally:
+            gc.enable()
+    return min(times) / num_testcases
+
+
+def check_scaling(write, parse, num_testcases):
+    times = []
+    for size in SIZES:
+        write(size)
+        times.append(time_per_testcase(parse, size))
+        print("%d testcases: %.2fus per testcase" % (size, times[-1] * 10**6))
+    assert times[-1] <= times[0] * MAX_SLOWDOWN
+    assert num_testcases() == SIZES[-1]
+
+
+def test_cases_gen_scaling(task_dir):
+    subtasks = []
+
+    def parse():
+        with open("gen/cases.gen") as gen:
+            subtasks[:] = parse_cases(gen, make_task(), False)
+
+    check_scaling(write_cases_gen, parse,
+                  lambda: sum(len(st.testcases) for st in subtasks))
+
+
+def test_gen_GEN_scaling(task_dir):
+    subtasks = dict()
+
+    def parse():
+        subtasks.clear()
+        subtasks.update(gen_testcases(False, make_task()))
+
+    check_scaling(write_gen_GEN, parse,
+                  lambda: sum(len(st.testcases) for st in subtasks.values()))
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "--verbose", "-s"]))
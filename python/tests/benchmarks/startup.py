@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import json
+import os.path
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import pytest
+
+# number of times the startup is measured, the fastest one is considered
+NUM_RUNS = 5
+# upper bound of the time to run `task-maker --help`, in seconds
+MAX_STARTUP_TIME = 0.5
+# modules that must not be imported just by starting task-maker
+HEAVY_MODULES = [
+    "pytoml", "ruamel.yaml", "task_maker.task_maker_frontend",
+    "task_maker.formats", "task_maker.uis", "task_maker.manager"
+]
+# task parsed by `task-maker --task-info`
+TASK_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "task_with_st")
+# upper bound of the time to run `task-maker --task-info`, in seconds
+MAX_TASK_INFO_TIME = 1.0
+# modules that must not be imported just to print the task information
+TASK_INFO_HEAVY_MODULES = [
+    "task_maker.task_maker_frontend", "task_maker.remote",
+    "task_maker.solution", "task_maker.uis", "curses"
+]
+
+
+def imported_modules(code: str) -> List[str]:
+    """
+    The modules imported after running code in a new interpreter
+    """
+    code += "\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-c", code],
+                          stdout=subprocess.PIPE,
+                          check=True)
+    return json.loads(proc.stdout.decode())
+
+
+def task_info_args(storedir: str) -> List[str]:
+    """
+    The arguments of task-maker to print the task information, the snapshot of
+    the task is stored in storedir
+    """
+    return [
+        "--task-info", "--ui", "silent", "--dry-run", "--task-dir", TASK_DIR,
+        "--storedir", os.path.join(storedir, "files")
+    ]
+
+
+def test_import_is_lazy():
+    modules = imported_modules("import task_maker.task_maker")
+    for module in HEAVY_MODULES:
+        assert module not in modules
+
+
+def test_languages_are_lazy():
+    modules = imported_modules(
+        "from task_maker.languages import LanguageManager\n"
+        "LanguageManager.from_file('sol.cpp')")
+    assert "task_maker.languages.cpp" in modules
+    assert "task_maker.languages.python" not in modules
+    assert "task_maker.languages.pascal" not in modules
+
+
+def test_task_info_is_lazy():
+    with tempfile.TemporaryDirectory() as storedir:
+        argv = ["task-maker"] + task_info_args(storedir)
+        # the second run loads the snapshot of the task
+        for _ in range(2):
+            modules = imported_modules(
+                "import sys\n"
+                "from task_maker.task_maker import main\n"
+                "sys.argv = %r\n"
+                "try:\n"
+                "    main()\n"
+                "except SystemExit:\n"
+                "    pass" % argv)
+            for module in TASK_INFO_HEAVY_MODULES:
+                assert module not in modules
+
+
+def test_help_startup_time():
+    times = []
+    for _ in range(NUM_RUNS):
+        start = time.monotonic()
+        subprocess.run(
+            [sys.executable, "-m", "task_maker.task_maker", "--help"],
+            stdout=subprocess.DEVNULL,
+            check=True)
+        times.append(time.monotonic() - start)
+    print("task-maker --help started in %.3fs" % min(times))
+    assert min(times) <= MAX_STARTUP_TIME
+
+
+def test_task_info_startup_time():
+    times = []
+    with tempfile.TemporaryDirectory() as storedir:
+        for _ in range(NUM_RUNS):
+            start = time.monotonic()
+            subprocess.run(
+                [sys.executable, "-m", "task_maker.task_maker"] +
+                task_info_args(storedir),
+                stdout=subprocess.DEVNULL,
+                check=True)
+            times.append(time.monotonic() - start)
+    print("task-maker --task-info started in %.3fs" % min(times))
+    assert min(times) <= MAX_TASK_INFO_TIME
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "--verbose", "-s"]))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import pytest
+from task_maker.capture import StreamCapture
+
+
+def feed_all(capture: StreamCapture, *chunks: bytes):
+    for chunk in chunks:
+        capture.feed(chunk)
+    capture.feed(b"")
+
+
+def test_short_stream():
+    capture = StreamCapture(head=4, tail=4)
+    feed_all(capture, b"abc", b"def")
+    assert capture.done
+    assert capture.size == 6
+    assert not capture.truncated
+    assert capture.content_bytes == b"abcdef"
+    assert capture.content == "abcdef"
+
+
+def test_head_and_tail():
+    capture = StreamCapture(head=4, tail=3)
+    feed_all(capture, b"ab", b"cdefgh", b"ij", b"k", b"lmn")
+    assert capture.size == 14
+    assert capture.truncated
+    assert capture.content_bytes == b"abcd\n[... 7 bytes omitted ...]\nlmn"
+
+
+def test_stream_as_long_as_kept():
+    capture = StreamCapture(head=4, tail=3)
+    feed_all(capture, b"abcdefg")
+    assert not capture.truncated
+    assert capture.content_bytes == b"abcdefg"
+
+
+def test_no_tail():
+    capture = StreamCapture(head=2, tail=0)
+    feed_all(capture, b"abc", b"def")
+    assert capture.content_bytes == b"ab\n[... 4 bytes omitted ...]\n"
+
+
+def test_tail_in_a_single_chunk():
+    capture = StreamCapture(head=1, tail=2)
+    feed_all(capture, b"abcdefgh")
+    assert capture.content_bytes == b"a\n[... 5 bytes omitted ...]\ngh"
+
+
+def test_content_cut_multibyte():
+    capture = StreamCapture(head=1, tail=0)
+    feed_all(capture, "è".encode())
+    assert capture.content == "�\n[... 1 bytes omitted ...]\n"
+
+
+def test_path(tmpdir):
+    path = str(tmpdir / "stdout")
+    capture = StreamCapture(head=2, tail=2, path=path)
+    capture.feed(b"abc")
+    capture.feed(b"defgh")
+    capture.feed(b"")
+    with open(path, "rb") as f:
+        assert f.read() == b"abcdefgh"
+    assert capture.content_bytes == b"ab\n[... 4 bytes omitted ...]\ngh"
+
+
+def test_path_empty_stream(tmpdir):
+    path = str(tmpdir / "stdout")
+    capture = StreamCapture(path=path)
+    capture.feed(b"")
+    with open(path, "rb") as f:
+        assert f.read() == b""
+
+
+def test_on_chunk():
+    chunks = []
+    capture = StreamCapture(head=1, tail=1, on_chunk=chunks.append)
+    feed_all(capture, b"abc", b"def")
+    assert chunks == [b"abc", b"def"]
+    assert capture.content_bytes == b"a\n[... 4 bytes omitted ...]\nf"
+
+
+def test_feed_after_end():
+    capture = StreamCapture()
+    feed_all(capture, b"abc")
+    with pytest.raises(ValueError):
+        capture.feed(b"def")
+    with pytest.raises(ValueError):
+        capture.feed(b"")
+    assert capture.content_bytes == b"abc"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "--verbose"]))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+from task_maker.include_index import IncludeIndex, parse_includes
+from task_maker.languages.c import find_c_dependency
+
+
+def write(path, content: str, mtime_ns: int = None):
+    with open(str(path), "w") as f:
+        f.write(content)
+    if mtime_ns is not None:
+        os.utime(str(path), ns=(mtime_ns, mtime_ns))
+
+
+def test_parse_includes():
+    source = '#include "a.h"\n' \
+             '  #  include <b.h>\n' \
+             '#include"c.h"\n' \
+             'int x; #include "d.h"\n'
+    assert parse_includes(source) == ["a.h", "b.h", "c.h"]
+
+
+def test_parse_includes_skips_comments():
+    source = '// #include "a.h"\n' \
+             '/* #include "b.h"\n' \
+             '#include "c.h" */\n' \
+             '/* x */ #include "d.h"\n' \
+             'const char* s = "/*";\n' \
+             '#include "e.h" // */\n'
+    assert parse_includes(source) == ["d.h", "e.h"]
+
+
+def test_parse_includes_skips_disabled_branches():
+    source = '#if 0\n' \
+             '#include "a.h"\n' \
+             '#if 1\n' \
+             '#include "b.h"\n' \
+             '#endif\n' \
+             '#elif 1\n' \
+             '#include "c.h"\n' \
+             '#else\n' \
+             '#include "d.h"\n' \
+             '#endif\n' \
+             '#ifdef DEBUG\n' \
+             '#include "e.h"\n' \
+             '#else\n' \
+             '#include "f.h"\n' \
+             '#endif\n' \
+             '#include "g.h"\n'
+    assert parse_includes(source) == ["c.h", "e.h", "f.h", "g.h"]
+
+
+def test_parse_includes_line_continuation():
+    assert parse_includes('#include \\\n"a.h"\n') == ["a.h"]
+
+
+def test_find_c_dependency(tmpdir):
+    tmpdir.mkdir("lib")
+    write(tmpdir / "sol.cpp", '#include "lib/a.h"\n#include <vector>\n'
+          '#include "missing.h"\n')
+    write(tmpdir / "lib" / "a.h", '#include "b.h"\n#include "../c.h"\n')
+    write(tmpdir / "lib" / "b.h", '#include "a.h"\n')
+    write(tmpdir / "c.h", '#if 0\n#include "lib/b.h"\n#endif\n')
+    dependencies = find_c_dependency(str(tmpdir / "sol.cpp"))
+    assert [(d.name, d.path) for d in dependencies] == [
+        ("lib/a.h", str(tmpdir / "lib" / "a.h")),
+        ("lib/b.h", str(tmpdir / "lib" / "b.h")),
+        ("c.h", str(tmpdir / "c.h")),
+    ]
+
+
+def test_index_invalidation(tmpdir):
+    path = tmpdir / "sol.cpp"
+    write(path, '#include "a.h"\n', 10**18)
+    index = IncludeIndex(None)
+    assert index.get_includes(str(path)) == ["a.h"]
+    write(path, '#include "b.h"\n', 2 * 10**18)
+    # the files are checked once per evaluation
+    assert index.get_includes(str(path)) == ["a.h"]
+    index.refresh()
+    assert index.get_includes(str(path)) == ["b.h"]
+
+
+def test_index_persistence(tmpdir):
+    path = tmpdir / "sol.cpp"
+    index_path = str(tmpdir / "cache" / "includes.json")
+    write(path, '#include "a.h"\n', 10**18)
+    index = IncludeIndex(index_path)
+    index.get_includes(str(path))
+    index.save()
+    # the file is not parsed again if it didn't change
+    write(path, '#include "b.h"\n', 10**18)
+    index = IncludeIndex(index_path)
+    assert index.get_includes(str(path)) == ["a.h"]
+    assert not index.dirty
+    write(path, '#include "bb.h"\n', 2 * 10**18)
+    index = IncludeIndex(index_path)
+    assert index.get_includes(str(path)) == ["bb.h"]
+    assert index.dirty
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "--verbose"]))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import pytest
+from task_maker.languages import LanguageManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """
+    A LanguageManager without any plugin loaded
+    """
+    monkeypatch.setattr(LanguageManager, "LANGUAGES", [])
+    monkeypatch.setattr(LanguageManager, "EXT_CACHE", {})
+    monkeypatch.setattr(LanguageManager, "LOADED_PLUGINS", set())
+    return LanguageManager
+
+
+def test_plugins_match_the_languages(manager):
+    manager.load_languages()
+    plugins = dict((ext, type(language).__module__.split(".")[-1])
+                   for ext, language in manager.EXT_CACHE.items())
+    assert plugins == manager.PLUGINS
+
+
+def test_from_file_loads_only_its_plugin(manager):
+    assert manager.from_file("sol.cpp").name == "C++"
+    assert manager.LOADED_PLUGINS == {"cpp"}
+
+
+def test_from_file_unlisted_extension(manager, monkeypatch):
+    plugins = dict(manager.PLUGINS)
+    del plugins[".rs"]
+    monkeypatch.setattr(manager, "PLUGINS", plugins)
+    assert manager.from_file("sol.rs").name == "Rust"
+
+
+def test_from_file_unknown_extension(manager):
+    with pytest.raises(ValueError):
+        manager.from_file("sol.unknown")
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "--verbose"]))
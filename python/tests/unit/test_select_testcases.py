@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import pytest
+from task_maker.config import Config
+import task_maker.formats as formats
+from task_maker.formats import IOITask, ScoreMode, Subtask, TaskType, \
+    parse_ranges, select_testcases
+
+
+def make_task() -> IOITask:
+    # subtask 0: testcases 0-1, subtask 1: testcases 2-4, subtask 2: testcase 5
+    subtasks = dict()
+    tc_num = 0
+    for st_num, num_testcases in enumerate([2, 3, 1]):
+        testcases = dict()
+        for _ in range(num_testcases):
+            testcases[tc_num] = formats.TestCase(None, None, [], [], "input",
+                                                 None, None, None)
+            tc_num += 1
+        subtasks[st_num] = Subtask("st%d" % st_num, "", ScoreMode.MIN, 10,
+                                   testcases, [])
+    return IOITask("task", "Task", subtasks, None, dict(), None, 1.0, 262144,
+                   "", "", TaskType.Batch, dict())
+
+
+def selection(task: IOITask):
+    return dict((st_num, sorted(subtask.testcases))
+                for st_num, subtask in task.subtasks.items())
+
+
+def select(subtask=None, testcase=None) -> IOITask:
+    config = Config()
+    config.subtask = subtask
+    config.testcase = testcase
+    return select_testcases(make_task(), config)
+
+
+def test_parse_ranges():
+    assert parse_ranges("3") == {3}
+    assert parse_ranges("0,2-4,7") == {0, 2, 3, 4, 7}
+    assert parse_ranges(" 1 , 3-3 ") == {1, 3}
+    assert parse_ranges("1-3,2-4") == {1, 2, 3, 4}
+    assert parse_ranges("4-2") == set()
+
+
+@pytest.mark.parametrize("ranges", ["", "a", "1,", "1-", "-1", "1-2-3"])
+def test_parse_ranges_invalid(ranges):
+    with pytest.raises(ValueError):
+        parse_ranges(ranges)
+
+
+def test_select_nothing():
+    task = make_task()
+    assert select_testcases(task, Config()) is task
+
+
+def test_select_subtasks():
+    assert selection(select(subtask="0,2")) == {0: [0, 1], 2: [5]}
+
+
+def test_select_testcases():
+    assert selection(select(testcase="1-3")) == {0: [1], 1: [2, 3]}
+
+
+def test_select_both():
+    assert selection(select(subtask="1-2", testcase="0-2,5")) == {
+        1: [2],
+        2: [5]
+    }
+
+
+def test_select_does_not_modify_the_task():
+    task = make_task()
+    config = Config()
+    config.testcase = "0"
+    selected = select_testcases(task, config)
+    assert selection(selected) == {0: [0]}
+    assert selection(task) == {0: [0, 1], 1: [2, 3, 4], 2: [5]}
+    assert selected.subtasks[0].name == "st0"
+    assert selected.time_limit == task.time_limit
+
+
+@pytest.mark.parametrize("subtask,testcase", [("3", None), (None, "6-9"),
+                                              ("0", "2-5")])
+def test_select_empty(subtask, testcase):
+    with pytest.raises(ValueError):
+        select(subtask=subtask, testcase=testcase)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "--verbose"]))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import json
+import time
+from task_maker.task_maker_frontend import Result
+from task_maker.utils import resources_to_dict
+from typing import Dict, List, Optional
+
+# the frontend events are put in this fake thread of the trace
+FRONTEND_THREAD = "frontend"
+
+
+class ExecutionTrace:
+    """
+    Timestamps of the events of a single execution, in seconds since the
+    creation of the tracer.
+    """
+    __slots__ = ("name", "tag", "declared", "started", "finished", "skipped",
+                 "stdout_fetched", "stderr_fetched", "result")
+
+    def __init__(self, name: str, tag: str, declared: float):
+        self.name = name
+        self.tag = tag
+        self.declared = declared
+        self.started = None  # type: Optional[float]
+        self.finished = None  # type: Optional[float]
+        self.skipped = None  # type: Optional[float]
+        self.stdout_fetched = None  # type: Optional[float]
+        self.stderr_fetched = None  # type: Optional[float]
+        self.result = None  # type: Optional[Result]
+
+
+class ExecutionTracer:
+    """
+    Collects the timings of all the executions of a pool and writes them as a
+    Chrome trace, viewable with chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start_time = time.monotonic()
+        self.traces = dict()  # type: Dict[Execution, ExecutionTrace]
+
+    def now(self) -> float:
+        return time.monotonic() - self.start_time
+
+    def declared(self, execution: "Execution"):
+        self.traces[execution] = ExecutionTrace(
+            execution.name, execution.ui_print_tag, self.now())
+
+    def started(self, execution: "Execution"):
+        self.traces[execution].started = self.now()
+
+    def finished(self, execution: "Execution", result: Result):
+        trace = self.traces[execution]
+        trace.finished = self.now()
+        trace.result = result
+
+    def skipped(self, execution: "Execution"):
+        self.traces[execution].skipped = self.now()
+
+    def stdout_fetched(self, execution: "Execution"):
+        self.traces[execution].stdout_fetched = self.now()
+
+    def stderr_fetched(self, execution: "Execution"):
+        self.traces[execution].stderr_fetched = self.now()
+
+    def save(self):
+        """
+        Write the trace file
+        """
+        with open(self.path, "w") as f:
+            json.dump({
+                "traceEvents": self._events(),
+                "displayTimeUnit": "ms"
+            }, f)
+
+    def _events(self) -> List[dict]:
+        threads = {FRONTEND_THREAD: 0}
+        events = []
+
+        def us(seconds: float) -> int:
+            return int(seconds * 1000000)
+
+        def tid(worker: str) -> int:
+            if worker not in threads:
+                threads[worker] = len(threads)
+            return threads[worker]
+
+        def async_event(name: str, cat: str, id: int, begin: float,
+                        end: float):
+            common = {"name": name, "cat": cat, "id": id, "pid": 1}
+            events.append({"ph": "b", "ts": us(begin), "tid": 0, **common})
+            events.append({"ph": "e", "ts": us(end), "tid": 0, **common})
+
+        for id, trace in enumerate(self.traces.values()):
+            if trace.skipped is not None:
+                async_event(trace.name, "skipped", id, trace.declared,
+                            trace.skipped)
+                continue
+            if trace.finished is None:
+                continue
+            started = trace.started
+            if started is None:
+                started = trace.finished
+            async_event(trace.name, "waiting", id, trace.declared, started)
+            result = trace.result
+            worker = result.worker or "unknown worker"
+            events.append({
+                "name": trace.name,
+                "cat": trace.tag,
+                "ph": "X",
+                "ts": us(started),
+                "dur": us(trace.finished - started),
+                "pid": 1,
+                "tid": tid(worker),
+                "args": {
+                    "worker": result.worker,
+                    "was_cached": result.was_cached,
+                    "was_killed": result.was_killed,
+                    "resources": resources_to_dict(result.resources)
+                }
+            })
+            # the content of the streams may arrive before the result
+            if trace.stdout_fetched is not None:
+                async_event("stdout of " + trace.name, "fetch-stdout", id,
+                            min(trace.finished, trace.stdout_fetched),
+                            trace.stdout_fetched)
+            if trace.stderr_fetched is not None:
+                async_event("stderr of " + trace.name, "fetch-stderr", id,
+                            min(trace.finished, trace.stderr_fetched),
+                            trace.stderr_fetched)
+
+        for worker, id in threads.items():
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": id,
+                "args": {
+                    "name": worker
+                }
+            })
+        return events
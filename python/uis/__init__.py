@@ -18,7 +18,7 @@ from task_maker.statements import Statement, StatementCompilationStatus, \
     StatementDepInfo, StatementDepCompilationStatus
 from task_maker.task_maker_frontend import Result, ResultStatus, Resources
 from task_maker.uis.ui_printer import UIPrinter
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 from task_maker.uis.ui_tmsocial_printer import UITMSocialPrinter
 
@@ -69,7 +69,13 @@ class UIInterface:
         self.statements = dict()  # type: Dict[str, Statement]
         self.warnings = list()  # type: List[str]
         self.errors = list()  # type: List[str]
+        # (origin, warnings or errors, message) for the messages whose origin
+        # is known, see forget_messages
+        self._messages = list()  # type: List[Tuple[tuple, List[str], str]]
+        self._origin = None  # type: Optional[tuple]
         self.pool = None  # type: ExecutionPool
+        # the graders compiled separately, tracked only once
+        self.graders = set()  # type: Set[Execution]
 
         if do_print:
             self.printer = StdoutPrinter()
@@ -86,6 +92,7 @@ class UIInterface:
         Add a non-solution file to the ui (ie a generator/checker/...)
         """
         name = source_file.name
+        self.forget_messages(("source", name))
         self.non_solutions[name] = SourceFileCompilationResult(
             source_file.language.need_compilation)
 
@@ -101,7 +108,8 @@ class UIInterface:
                     self.non_solutions[
                         name].status = SourceFileCompilationStatus.DONE
                 else:
-                    self.add_error("Failed to compile " + name)
+                    self.add_error("Failed to compile " + name,
+                                   ("source", name))
                     self.non_solutions[
                         name].status = SourceFileCompilationStatus.FAILURE
 
@@ -114,6 +122,7 @@ class UIInterface:
         Add a solution to the UI
         """
         name = source_file.name
+        self.forget_messages(("solution", name))
         self.solutions[name] = SourceFileCompilationResult(
             source_file.language.need_compilation)
 
@@ -129,14 +138,38 @@ class UIInterface:
                     self.solutions[
                         name].status = SourceFileCompilationStatus.DONE
                 else:
-                    self.add_warning("Failed to compile: " + name)
+                    self.add_warning("Failed to compile: " + name,
+                                     ("solution", name))
                     self.solutions[
                         name].status = SourceFileCompilationStatus.FAILURE
 
-            source_file.compilation.bind(on_done, on_start)
+            def on_skip():
+                # the grader failed to compile
+                self.solutions[
+                    name].status = SourceFileCompilationStatus.FAILURE
+
+            source_file.compilation.bind(on_done, on_start, on_skip)
+            if source_file.grader_compilation:
+                self._add_grader(source_file.grader_compilation)
         else:
             self.solutions[name].status = SourceFileCompilationStatus.DONE
 
+    def _add_grader(self, compilation: Execution):
+        if compilation in self.graders:
+            return
+        self.graders.add(compilation)
+        origin = ("grader", compilation.name)
+        self.forget_messages(origin)
+
+        def on_done(result: Result):
+            if result.status != ResultStatus.SUCCESS:
+                self.add_error(
+                    "Failed to compile the grader: %s\n%s" %
+                    (result_to_str(result), compilation.stderr_content),
+                    origin)
+
+        compilation.bind(on_done)
+
     def add_statement(self, statement: Statement):
         """
         Add a statement to the UI
@@ -192,20 +225,60 @@ class UIInterface:
 
             register_execution(info)
 
-    def add_warning(self, message: str):
+    def add_warning(self, message: str, origin: Optional[tuple] = None):
         """
-        Add a warning message to the list of warnings
+        Add a warning message to the list of warnings. The origin is the part
+        of the task the message is about, the one of messages_from by default
         """
         self.warnings.append(message)
+        self._add_origin(origin, self.warnings, message)
         self.ui_printer.warning(message.strip())
 
-    def add_error(self, message: str):
+    def add_error(self, message: str, origin: Optional[tuple] = None):
         """
-        Add an error message to the list of errors, this wont stop anything
+        Add an error message to the list of errors, this wont stop anything.
+        The origin is the part of the task the message is about, the one of
+        messages_from by default
         """
         self.errors.append(message)
+        self._add_origin(origin, self.errors, message)
         self.ui_printer.error(message.strip())
 
+    @contextmanager
+    def messages_from(self, origin: tuple):
+        """
+        The messages added in the block without an origin come from origin.
+        The callbacks of the executions are called later, outside the block,
+        they have to pass their origin explicitly.
+        """
+        previous = self._origin
+        self._origin = origin
+        try:
+            yield
+        finally:
+            self._origin = previous
+
+    def forget_messages(self, origin: tuple):
+        """
+        Remove the warnings and the errors coming from origin, or from an
+        origin that starts with it, before that part of the task is evaluated
+        again
+        """
+        kept = list()  # type: List[Tuple[tuple, List[str], str]]
+        for message in self._messages:
+            message_origin, messages, text = message
+            if message_origin[:len(origin)] == origin:
+                messages.remove(text)
+            else:
+                kept.append(message)
+        self._messages = kept
+
+    def _add_origin(self, origin: Optional[tuple], messages: List[str],
+                    message: str):
+        origin = origin or self._origin
+        if origin:
+            self._messages.append((origin, messages, message))
+
     @contextmanager
     def run_in_ui(self, curses_ui: Optional["CursesUI"],
                   finish_ui: Optional["FinishUI"]):
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 
+import statistics
+import sys
 from enum import Enum
+from task_maker.args import Statistic
 from task_maker.formats import IOITask, ScoreMode
 from task_maker.remote import Execution
 from task_maker.source_file import SourceFile
 from task_maker.task_maker_frontend import Result, ResultStatus
 from task_maker.uis import result_to_str, UIInterface
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from task_maker.formats.ioi_format.execution import EvaluationFiles
 
 
 class TestcaseGenerationStatus(Enum):
@@ -51,18 +57,51 @@ class SubtaskSolutionResult(Enum):
 
 class TestcaseSolutionInfo:
     """
-    Information about a solution of a testcase
+    Information about a solution of a testcase. There is one of these for each
+    pair (solution, testcase) so it's kept as small as possible: no instance
+    dict and the message is computed only when needed.
     """
+    __slots__ = ("status", "result", "score", "checker_outcome", "checked",
+                 "checker_result", "runs")
 
     def __init__(self):
         # to be considered definitive only if checked == True
         self.status = TestcaseSolutionStatus.WAITING
-        self.result = []  # type: List[Result]
+        self.result = []  # type: List[Optional[Result]]
         self.score = 0.0
-        self.message = "Waiting..."
         self.checker_outcome = "Waiting..."
         self.checked = False
         self.checker_result = None  # type: Optional[Result]
+        # results of the timed runs, only with --repeat
+        self.runs = None  # type: Optional[List[Result]]
+
+    @property
+    def message(self) -> str:
+        """
+        The message to show to the user: the outcome of the checker if all the
+        executions succeeded, the reason of the failures otherwise
+        """
+        results = [res for res in self.result if res is not None]
+        if all(res.status == ResultStatus.SUCCESS for res in results):
+            return self.checker_outcome
+        return " | ".join(map(result_to_str, results))
+
+    def timings(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        Minimum, median and standard deviation of the cpu and wall time of the
+        timed runs, None if the testcase was not evaluated with --repeat
+        """
+        if not self.runs:
+            return None
+        timings = dict()
+        for resource in ["cpu_time", "wall_time"]:
+            values = [getattr(run.resources, resource) for run in self.runs]
+            timings[resource] = {
+                "min": min(values),
+                "median": statistics.median(values),
+                "stddev": statistics.pstdev(values)
+            }
+        return timings
 
 
 class TestcaseGenerationResult:
@@ -70,6 +109,8 @@ class TestcaseGenerationResult:
     Information about the generation of a testcase
     """
 
+    __slots__ = ("status", "generation", "validation", "solution")
+
     def __init__(self):
         self.status = TestcaseGenerationStatus.WAITING
         self.generation = None  # type: Optional[Execution]
@@ -82,6 +123,8 @@ class CustomCheckerState:
     State of a custom checker in a testcase
     """
 
+    __slots__ = ("solution", "result", "stdout", "stderr", "callback")
+
     def __init__(self, solution: str):
         self.solution = solution
         self.result = None  # type: Optional[Result]
@@ -132,6 +175,12 @@ class SolutionStatus:
             (st_num, SubtaskSolutionResult.WAITING) for st_num in subtasks)
         self.testcase_results = dict(
         )  # type: Dict[int, Dict[int, TestcaseSolutionInfo]]
+        # the executions that are canceled when the subtask is short-circuited
+        self.cancelable = dict((st_num, []) for st_num in subtasks
+                               )  # type: Dict[int, List[Execution]]
+        self.short_circuited = set()  # type: Set[int]
+        # whether the provisional score has already been reported
+        self.provisional_reported = False
 
         for st_num, subtask in subtasks.items():
             self.testcase_results[st_num] = dict()
@@ -169,7 +218,6 @@ class SolutionStatus:
             testcase_status.status = TestcaseSolutionStatus.FAILED
             testcase_status.checked = True
             self._compute_st_score(subtask)
-        testcase_status.message = self._get_solution_message(testcase_status)
 
     def update_default_check_result(self, subtask: int, testcase: int,
                                     result: Result):
@@ -193,7 +241,6 @@ class SolutionStatus:
             testcase_status.status = TestcaseSolutionStatus.FAILED
             testcase_status.checker_outcome = "Internal error: " + result.error
 
-        testcase_status.message = self._get_solution_message(testcase_status)
         self._compute_st_score(subtask)
 
     def update_custom_check_result(self, subtask: int, testcase: int,
@@ -215,9 +262,8 @@ class SolutionStatus:
             testcase_status.status = TestcaseSolutionStatus.FAILED
             testcase_status.checker_outcome = "Failed to check: " + \
                                               result_to_str(state.result)
-            testcase_status.message = self._get_solution_message(
-                testcase_status)
             testcase_status.checked = True
+            self._short_circuit(subtask)
             return
         stdout = state.stdout.strip()
         try:
@@ -226,25 +272,23 @@ class SolutionStatus:
             testcase_status.status = TestcaseSolutionStatus.FAILED
             testcase_status.checker_outcome = \
                 "Failed to check: invalid score: {}".format(stdout)
-            testcase_status.message = self._get_solution_message(
-                testcase_status)
             testcase_status.checked = True
-            self.interface.add_error("Invalid output '{}' for checker "
-                                     "at testcase #{} for solution {}".format(
-                                         stdout, testcase,
-                                         self.source_file.name))
+            self.interface.add_error(
+                "Invalid output '{}' for checker at testcase #{} for "
+                "solution {}".format(stdout, testcase, self.source_file.name),
+                ("solution", self.source_file.name, subtask, testcase))
+            self._short_circuit(subtask)
             return
         if not 0.0 <= score <= 1.0:
             testcase_status.status = TestcaseSolutionStatus.FAILED
             testcase_status.checker_outcome = \
                 "Failed to check: invalid score: {}".format(stdout)
-            testcase_status.message = self._get_solution_message(
-                testcase_status)
             testcase_status.checked = True
-            self.interface.add_error("Invalid score '{}' from checker "
-                                     "at testcase #{} for solution {}".format(
-                                         stdout, testcase,
-                                         self.source_file.name))
+            self.interface.add_error(
+                "Invalid score '{}' from checker at testcase #{} for "
+                "solution {}".format(stdout, testcase, self.source_file.name),
+                ("solution", self.source_file.name, subtask, testcase))
+            self._short_circuit(subtask)
             return
         self.testcase_results[subtask][testcase].score = score
         if score == 1.0:
@@ -257,16 +301,96 @@ class SolutionStatus:
             testcase_status.status = TestcaseSolutionStatus.PARTIAL
             testcase_status.checker_outcome = "Output is partially correct"
         if stdout:
-            testcase_status.checker_outcome = state.stderr.strip()
-        testcase_status.message = self._get_solution_message(testcase_status)
+            # the checkers print the same few messages over and over, share
+            # them between the testcases
+            testcase_status.checker_outcome = sys.intern(state.stderr.strip())
         testcase_status.checked = all(res for res in testcase_status.result)
         self._compute_st_score(subtask)
 
-    def _compute_st_score(self, subtask: int):
-        # skip if not all the testcases have been computed
-        if not all(t.checked for t in self.testcase_results[subtask].values()):
+    def testcase_skipped(self, subtask: int, testcase: int):
+        """
+        An execution of the testcase has been skipped. If it was canceled
+        because the subtask has been short-circuited the testcase is considered
+        checked, with zero points.
+        """
+        testcase_status = self.testcase_results[subtask][testcase]
+        if subtask not in self.short_circuited or testcase_status.checked:
             return
-        scores = [t.score for t in self.testcase_results[subtask].values()]
+        testcase_status.status = TestcaseSolutionStatus.SKIPPED
+        testcase_status.checker_outcome = "Skipped"
+        testcase_status.score = 0.0
+        testcase_status.checked = True
+        self._compute_st_score(subtask)
+
+    def _short_circuit(self, subtask: int):
+        # the score of a min subtask is settled as soon as a testcase gets
+        # zero points, the remaining executions are useless
+        if not self.interface.short_circuit or \
+                subtask in self.short_circuited:
+            return
+        if self.task.subtasks[subtask].score_mode != ScoreMode.MIN:
+            return
+        if not any(t.checked and t.score == 0.0
+                   for t in self.testcase_results[subtask].values()):
+            return
+        self.short_circuited.add(subtask)
+        for execution in self.cancelable[subtask]:
+            execution.cancel()
+        self.cancelable[subtask] = []
+
+    def reset_testcase(self, subtask: int, testcase: int,
+                       keep_evaluation: bool = False):
+        """
+        Forget the outcome of the solution on the testcase before it's
+        evaluated again with --watch. With keep_evaluation only the checking
+        is done again, the results of the solution are kept.
+        """
+        if keep_evaluation:
+            testcase_status = self.testcase_results[subtask][testcase]
+            testcase_status.status = TestcaseSolutionStatus.SOLVED
+            testcase_status.score = 0.0
+            testcase_status.checker_outcome = "Waiting..."
+            testcase_status.checked = False
+            testcase_status.checker_result = None
+        else:
+            self.testcase_results[subtask][testcase] = TestcaseSolutionInfo()
+        self.interface.forget_messages(
+            ("solution", self.source_file.name, subtask, testcase))
+        self.subtask_results[subtask] = SubtaskSolutionResult.WAITING
+        self.subtask_scores[subtask] = 0.0
+        self.score = sum(self.subtask_scores.values())
+        self.short_circuited.discard(subtask)
+        self.cancelable[subtask] = []
+
+    @property
+    def provisional_score(self) -> Optional[float]:
+        """
+        The score of the solution estimated from the sample of the testcases
+        evaluated first with --quick-feedback: the completed subtasks count
+        with their score, the others with the score of their sample. None if
+        there is no sample or some sampled testcase is still running.
+        """
+        if not self.interface.sample:
+            return None
+        score = 0.0
+        for st_num, testcases in self.testcase_results.items():
+            if self.subtask_results[st_num] not in [
+                    SubtaskSolutionResult.WAITING,
+                    SubtaskSolutionResult.RUNNING
+            ]:
+                score += self.subtask_scores[st_num]
+                continue
+            sampled = [
+                testcases[tc_num]
+                for tc_num in self.interface.sample.get(st_num, ())
+                if tc_num in testcases
+            ]
+            if not sampled or not all(t.checked for t in sampled):
+                return None
+            score += self._score_of(st_num, [t.score for t in sampled])
+        return score
+
+    def _score_of(self, subtask: int, scores: List[float]) -> float:
         score_mode = self.task.subtasks[subtask].score_mode
         if score_mode == ScoreMode.MIN:
             score = min(scores)
@@ -276,7 +400,26 @@ class SolutionStatus:
             score = sum(scores) / len(scores)
         else:
             raise ValueError("Invalid score mode", score_mode)
-        score *= self.task.subtasks[subtask].max_score
+        return score * self.task.subtasks[subtask].max_score
+
+    def _report_provisional_score(self):
+        if self.provisional_reported:
+            return
+        score = self.provisional_score
+        if score is None:
+            return
+        self.provisional_reported = True
+        self.interface.ui_printer.provisional_score(self.source_file.name,
+                                                    score)
+
+    def _compute_st_score(self, subtask: int):
+        self._short_circuit(subtask)
+        # skip if not all the testcases have been computed
+        if not all(t.checked for t in self.testcase_results[subtask].values()):
+            self._report_provisional_score()
+            return
+        scores = [t.score for t in self.testcase_results[subtask].values()]
+        score = self._score_of(subtask, scores)
         self.subtask_scores[subtask] = score
         self.score = sum(self.subtask_scores.values())
         if min(scores) == 1.0:
@@ -288,14 +431,7 @@ class SolutionStatus:
         self.interface.ui_printer.subtask_outcome(
             self.source_file.name, subtask, self.subtask_results[subtask],
             score)
-
-    def _get_solution_message(self,
-                              testcase_status: TestcaseSolutionInfo) -> str:
-        if all(res.status == ResultStatus.SUCCESS
-               for res in testcase_status.result):
-            return testcase_status.checker_outcome
-
-        return " | ".join(map(result_to_str, testcase_status.result))
+        self._report_provisional_score()
 
 
 class IOIUIInterface(UIInterface):
@@ -304,14 +440,28 @@ class IOIUIInterface(UIInterface):
     """
 
     def __init__(self, task: IOITask, testcases: Dict[int, List[int]],
-                 do_print: bool, json: bool, tmsocial=False):
+                 do_print: bool, json: bool, tmsocial=False,
+                 short_circuit=False, repeat_statistic=Statistic.MEDIAN,
+                 show_stderr=False):
         super().__init__(task, do_print, json, tmsocial)
 
         self.task = task
+        # cancel the evaluations of a min subtask once its score is settled
+        self.short_circuit = short_circuit
+        # which of the repeated runs of a testcase gives the verdict
+        self.repeat_statistic = repeat_statistic
+        # the stderr of the successful generations, validations and solutions
+        # is fetched only if the UIs show it
+        self.show_stderr = show_stderr
         self.subtasks = dict(
         )  # type: Dict[int, Dict[int, TestcaseGenerationResult]]
         self.testcases = testcases
         self.testing = dict()  # type: Dict[str, SolutionStatus]
+        # subtask -> testcases evaluated first, only with --quick-feedback
+        self.sample = dict()  # type: Dict[int, Set[int]]
+        # the files of the last completed evaluation, reused by the next one
+        # with --watch
+        self.evaluation = None  # type: Optional[EvaluationFiles]
 
         for st_num, subtask in testcases.items():
             self.subtasks[st_num] = dict()
@@ -323,6 +473,14 @@ class IOIUIInterface(UIInterface):
         self.testing[source_file.name] = SolutionStatus(
             source_file, self.task, self, self.testcases)
 
+    def reset_testcase(self, subtask: int, testcase: int):
+        """
+        Forget the generation of the testcase before it's generated again with
+        --watch
+        """
+        self.subtasks[subtask][testcase] = TestcaseGenerationResult()
+        self.forget_messages(("testcase", subtask, testcase))
+
     def add_generation(self, subtask: int, testcase: int,
                        generation: Execution):
         """
@@ -330,6 +488,8 @@ class IOIUIInterface(UIInterface):
         """
         testcase_status = self.subtasks[subtask][testcase]
         testcase_status.generation = generation
+        if self.show_stderr:
+            generation.fetch_stderr()
 
         def on_start():
             testcase_status.status = TestcaseGenerationStatus.GENERATING
@@ -338,7 +498,8 @@ class IOIUIInterface(UIInterface):
             if result.status == ResultStatus.SUCCESS:
                 testcase_status.status = TestcaseGenerationStatus.GENERATED
             else:
-                self.add_error("Failed to generate testcase #%d" % testcase)
+                self.add_error("Failed to generate testcase #%d" % testcase,
+                               ("testcase", subtask, testcase))
                 testcase_status.status = TestcaseGenerationStatus.FAILURE
 
         generation.bind(on_done, on_start)
@@ -350,6 +511,8 @@ class IOIUIInterface(UIInterface):
         """
         testcase_status = self.subtasks[subtask][testcase]
         testcase_status.validation = validation
+        if self.show_stderr:
+            validation.fetch_stderr()
 
         def on_start():
             testcase_status.status = TestcaseGenerationStatus.VALIDATING
@@ -358,7 +521,8 @@ class IOIUIInterface(UIInterface):
             if result.status == ResultStatus.SUCCESS:
                 testcase_status.status = TestcaseGenerationStatus.VALIDATED
             else:
-                self.add_error("Failed to validate testcase #%d" % testcase)
+                self.add_error("Failed to validate testcase #%d" % testcase,
+                               ("testcase", subtask, testcase))
                 testcase_status.status = TestcaseGenerationStatus.FAILURE
 
         validation.bind(on_done, on_start)
@@ -369,6 +533,8 @@ class IOIUIInterface(UIInterface):
         """
         testcase_status = self.subtasks[subtask][testcase]
         testcase_status.solution = solving
+        if self.show_stderr:
+            solving.fetch_stderr()
 
         def on_start():
             testcase_status.status = TestcaseGenerationStatus.SOLVING
@@ -378,7 +544,8 @@ class IOIUIInterface(UIInterface):
                 testcase_status.status = TestcaseGenerationStatus.DONE
             else:
                 self.add_error(
-                    "Failed to generate output of testcase #%d" % testcase)
+                    "Failed to generate output of testcase #%d" % testcase,
+                    ("testcase", subtask, testcase))
                 testcase_status.status = TestcaseGenerationStatus.FAILURE
 
         solving.bind(on_done, on_start)
@@ -392,6 +559,8 @@ class IOIUIInterface(UIInterface):
                                                                                 None
                                                                             ] * len(
             evaluations)
+        if self.short_circuit:
+            self.testing[solution].cancelable[subtask].extend(evaluations)
         started = False
         skipped = False
         for num, evaluation in enumerate(evaluations):
@@ -412,14 +581,102 @@ class IOIUIInterface(UIInterface):
                 skipped = True
                 self.testing[solution].testcase_results[subtask][
                     testcase].status = TestcaseSolutionStatus.SKIPPED
+                self.testing[solution].testcase_skipped(subtask, testcase)
 
             evaluation.bind(on_done, on_start, on_skip)
 
+    def add_repeated_evaluation(self, subtask: int, testcase: int,
+                                solution: str, runs: List[Execution],
+                                checks: List[Execution],
+                                warmup: Optional[Execution]):
+        """
+        Start tracking the timed runs of a solution on a testcase, with
+        --repeat. Each run has its own checking, the verdict is the one of the
+        run chosen by --repeat-statistic once all of them are done.
+        """
+        testcase_status = self.testing[solution].testcase_results[subtask][
+            testcase]
+        testcase_status.result = [None]
+        testcase_status.runs = []
+        if self.short_circuit:
+            self.testing[solution].cancelable[subtask].extend(runs + checks)
+            if warmup:
+                self.testing[solution].cancelable[subtask].append(warmup)
+        on_check_done, _, on_check_skip = self._checking_callbacks(
+            subtask, testcase, solution)
+        run_results = [None] * len(runs)  # type: List[Optional[Result]]
+        check_results = [None] * len(checks)  # type: List[Optional[Result]]
+        pending = len(runs) + len(checks)
+        skipped = False
+
+        def on_start():
+            if testcase_status.status == TestcaseSolutionStatus.WAITING:
+                testcase_status.status = TestcaseSolutionStatus.SOLVING
+
+        def on_skip():
+            nonlocal skipped
+            if not skipped:
+                skipped = True
+                testcase_status.status = TestcaseSolutionStatus.SKIPPED
+                self.testing[solution].testcase_skipped(subtask, testcase)
+            on_end()
+
+        def on_end():
+            nonlocal pending
+            pending -= 1
+            if pending or skipped:
+                return
+            by_time = sorted(
+                range(len(runs)),
+                key=lambda num: run_results[num].resources.cpu_time)
+            if self.repeat_statistic == Statistic.MIN:
+                num = by_time[0]
+            elif self.repeat_statistic == Statistic.MAX:
+                num = by_time[-1]
+            else:
+                num = by_time[(len(by_time) - 1) // 2]
+            self.testing[solution].update_eval_result(subtask, testcase,
+                                                      run_results[num], 0)
+            if check_results[num] is not None:
+                on_check_done(checks[num], check_results[num])
+            else:
+                on_check_skip()
+
+        for num, (run, check) in enumerate(zip(runs, checks)):
+
+            def on_run_done(result: Result, num=num):
+                run_results[num] = result
+                testcase_status.runs.append(result)
+                on_end()
+
+            def on_checked(result: Result, num=num):
+                check_results[num] = result
+                on_end()
+
+            def on_check_skipped():
+                # the run failed, its own result gives the verdict
+                on_end()
+
+            run.bind(on_run_done, on_start, on_skip)
+            check.bind(on_checked, None, on_check_skipped)
+        if warmup:
+            # the time of the warm-up is discarded, and a failure is repeated
+            # by the timed runs
+            warmup.bind(lambda result: None, on_start)
+
     def add_evaluate_checking(self, subtask: int, testcase: int, solution: str,
                               checking: Execution):
         """
         Start tracking the checking of a solution in a testcase
         """
+        if self.short_circuit:
+            self.testing[solution].cancelable[subtask].append(checking)
+        on_done, on_start, on_skip = self._checking_callbacks(
+            subtask, testcase, solution)
+        checking.bind(lambda result: on_done(checking, result), on_start,
+                      on_skip)
+
+    def _checking_callbacks(self, subtask: int, testcase: int, solution: str):
         has_custom_checker = self.task.checker
         custom_checker_state = CustomCheckerState(solution)
 
@@ -427,13 +684,14 @@ class IOIUIInterface(UIInterface):
             self.testing[solution].testcase_results[subtask][
                 testcase].status = TestcaseSolutionStatus.CHECKING
 
-        def on_done(result: Result):
+        def on_done(checking: Execution, result: Result):
             if has_custom_checker:
                 custom_checker_state.set_result(result)
                 if result.status != ResultStatus.SUCCESS:
                     self.add_error(
                         "Checker failed for testcase #%d for solution %s" %
-                        (testcase, solution))
+                        (testcase, solution),
+                        ("solution", solution, subtask, testcase))
                 custom_checker_state.set_stdout(checking.stdout_content)
                 custom_checker_state.set_stderr(checking.stderr_content)
             else:
@@ -450,6 +708,9 @@ class IOIUIInterface(UIInterface):
                 solution, testcase, subtask,
                 self.testing[solution].testcase_results[subtask][testcase])
 
+        def on_skip():
+            self.testing[solution].testcase_skipped(subtask, testcase)
+
         if has_custom_checker:
             custom_checker_state.set_callback(on_checked)
-        checking.bind(on_done, on_start)
+        return on_done, on_start, on_skip
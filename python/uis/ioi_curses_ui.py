@@ -157,7 +157,11 @@ def print_solutions_result(printer: Printer, task: IOITask,
             s == SubtaskSolutionResult.RUNNING
             for s in status.subtask_results.values()
         ]):
-            printer.text("  {}  ".format(loading))
+            provisional = status.provisional_score
+            if provisional is None:
+                printer.text("  {}  ".format(loading))
+            else:
+                printer.text("~{:^3.0f} ".format(provisional))
         else:
             printer.text(" {:^3.0f} ".format(status.score))
         printer.text("|")
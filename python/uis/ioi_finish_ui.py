@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 
 from task_maker.config import Config
+from task_maker.remote import Execution
 from task_maker.task_maker_frontend import ResultStatus
 from task_maker.uis import result_to_str, FinishUI, get_max_sol_len, \
     SourceFileCompilationStatus
 from task_maker.uis.ioi import IOIUIInterface, TestcaseGenerationStatus
 from task_maker.uis.ioi_curses_ui import print_solutions_result
+from typing import Dict, Optional
 
 
 class IOIFinishUI(FinishUI):
@@ -117,8 +119,33 @@ class IOIFinishUI(FinishUI):
                         success = False
 
                 self.printer.text("\n")
+                if self.interface.show_stderr:
+                    for execution in [result.generation, result.validation,
+                                      result.solution]:
+                        self._print_stderr(execution)
         return success
 
+    def _print_stderr(self, execution: Optional[Execution]):
+        """
+        Print the stderr of a successful execution, the ones of the failed
+        executions are always printed
+        """
+        if not execution or not execution.result or \
+                execution.result.status != ResultStatus.SUCCESS:
+            return
+        if execution.stderr_content:
+            self.printer.text(execution.name + ":\n")
+            self.printer.text(execution.stderr_content)
+
+    def _print_timings(self, timings: Dict[str, Dict[str, float]]):
+        self.printer.text(" [")
+        self.printer.text(" | ".join(
+            "{} min {:.3f}s med {:.3f}s sd {:.3f}s".format(
+                name, timing["min"], timing["median"], timing["stddev"])
+            for name, timing in [("cpu", timings["cpu_time"]),
+                                 ("wall", timings["wall_time"])]))
+        self.printer.text("]")
+
     def _print_solution(self, solution: str):
         self.printer.bold(solution)
         self.printer.text(": ")
@@ -166,6 +193,9 @@ class IOIFinishUI(FinishUI):
                     memory = 0
                 self._print_exec_stat(used_time, memory, self.task.time_limit,
                                       self.task.memory_limit_kb, "")
+                timings = testcase.timings()
+                if timings:
+                    self._print_timings(timings)
                 if self.config.detailed_checker and testcase.checker_result:
                     self._print_resources(testcase.checker_result.resources,
                                           self.task.time_limit * 2,
@@ -86,7 +86,9 @@ class IOIFinishUIJSON(FinishUI):
                         "checker_outcome":
                             testcase.checker_outcome,
                         "checker_result":
-                            result_to_dict(testcase.checker_result)
+                            result_to_dict(testcase.checker_result),
+                        "timings":
+                            testcase.timings()
                     }
                     for tc_num, testcase in subtask.items()
                 }
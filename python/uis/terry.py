@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 
 import json
+import statistics
 from enum import Enum
 from task_maker.formats import TerryTask
 from task_maker.remote import Execution
 from task_maker.source_file import SourceFile
 from task_maker.task_maker_frontend import Result, ResultStatus
 from task_maker.uis import UIInterface, result_to_str
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List
 
 
 class SolutionStatus(Enum):
@@ -62,61 +63,79 @@ class TerryUIInterface(UIInterface):
     def __init__(self, task: TerryTask, do_print: bool, json: bool):
         super().__init__(task, do_print, json)
         self.task = task
+        # the evaluation with the first seed of each solution
         self.solutions_info = dict()  # type: Dict[str, SolutionInfo]
+        # solution -> seed -> evaluation, with --seeds there are many
+        self.seeds_info = dict()  # type: Dict[str, Dict[int, SolutionInfo]]
 
     def add_solution(self, source_file: SourceFile):
         super().add_solution(source_file)
         self.solutions_info[source_file.name] = SolutionInfo(source_file)
+        self.seeds_info[source_file.name] = dict()
 
-    def add_generation(self, solution: str, seed: int, generation: Execution):
+    def add_generation(self, solutions: List[str], seed: int,
+                       generation: Execution):
         """
-        Start tracking the generation of a testcase
+        Start tracking the generation of the input of a seed, shared by the
+        specified solutions
         """
-        info = self.solutions_info[solution]
-        info.seed = seed
-        info.generation = generation
+        infos = [self._get_info(solution, seed) for solution in solutions]
+        for info in infos:
+            info.generation = generation
 
         def on_start():
-            info.status = SolutionStatus.GENERATING
+            for info in infos:
+                info.status = SolutionStatus.GENERATING
 
         def on_done(result: Result):
-            if result.status == ResultStatus.SUCCESS:
-                info.status = SolutionStatus.GENERATED
-            else:
+            if result.status != ResultStatus.SUCCESS:
                 self.add_error(
                     "Failed to generate input for {} with seed {}".format(
-                        solution, seed))
-                info.status = SolutionStatus.FAILED
-                info.message = "Generator failed: " + result_to_str(result)
+                        ", ".join(solutions), seed))
+            for info in infos:
+                if result.status == ResultStatus.SUCCESS:
+                    info.status = SolutionStatus.GENERATED
+                else:
+                    info.status = SolutionStatus.FAILED
+                    info.message = "Generator failed: " + result_to_str(
+                        result)
 
         generation.bind(on_done, on_start)
 
-    def add_validation(self, solution: str, validation: Execution):
+    def add_validation(self, solutions: List[str], seed: int,
+                       validation: Execution):
         """
-        Start tracking the validation of a testcase
+        Start tracking the validation of the input of a seed, shared by the
+        specified solutions
         """
-        info = self.solutions_info[solution]
-        info.validation = validation
+        infos = [self._get_info(solution, seed) for solution in solutions]
+        for info in infos:
+            info.validation = validation
 
         def on_start():
-            info.status = SolutionStatus.VALIDATING
+            for info in infos:
+                info.status = SolutionStatus.VALIDATING
 
         def on_done(result: Result):
-            if result.status == ResultStatus.SUCCESS:
-                info.status = SolutionStatus.VALIDATED
-            else:
+            if result.status != ResultStatus.SUCCESS:
                 self.add_error(
-                    "Failed to validate input for {}".format(solution))
-                info.status = SolutionStatus.FAILED
-                info.message = "Validator failed: " + result_to_str(result)
+                    "Failed to validate input for {} with seed {}".format(
+                        ", ".join(solutions), seed))
+            for info in infos:
+                if result.status == ResultStatus.SUCCESS:
+                    info.status = SolutionStatus.VALIDATED
+                else:
+                    info.status = SolutionStatus.FAILED
+                    info.message = "Validator failed: " + result_to_str(
+                        result)
 
         validation.bind(on_done, on_start)
 
-    def add_solving(self, solution: str, solving: Execution):
+    def add_solving(self, solution: str, seed: int, solving: Execution):
         """
         Start tracking the evaluation of a solution
         """
-        info = self.solutions_info[solution]
+        info = self._get_info(solution, seed)
         info.solution = solving
 
         def on_start():
@@ -126,40 +145,92 @@ class TerryUIInterface(UIInterface):
             if result.status == ResultStatus.SUCCESS:
                 info.status = SolutionStatus.SOLVED
             else:
-                self.add_error("Solution {} failed".format(solution))
+                self.add_error("Solution {} failed with seed {}".format(
+                    solution, seed))
                 info.status = SolutionStatus.FAILED
                 info.message = "Solution failed: " + result_to_str(result)
 
         solving.bind(on_done, on_start)
 
-    def add_checking(self, solution: str, checking: Execution):
+    def add_checking(self, solution: str, seed: int, checking: Execution):
         """
         Start the tracking of a checker
         """
-        info = self.solutions_info[solution]
+        info = self._get_info(solution, seed)
         info.checking = checking
 
         def on_start():
             info.status = SolutionStatus.CHECKING
 
         def on_done(result: Result):
-            self._compute_score(solution, checking.stdout_content)
+            self._compute_score(info, checking.stdout_content)
             self.ui_printer.terry_solution_outcome(solution, info)
             if result.status == ResultStatus.SUCCESS:
                 info.status = SolutionStatus.DONE
             else:
                 self.add_error(
-                    "Checker failed on output of solution {}".format(solution))
+                    "Checker failed on output of solution {} with seed {}".
+                    format(solution, seed))
                 info.status = SolutionStatus.FAILED
                 info.message = "Checker failed: " + result_to_str(result)
 
         checking.bind(on_done, on_start)
 
-    def _compute_score(self, solution: str, check_outcome: str):
+    def seed_statistics(self, solution: str) -> Optional[Dict[str, Any]]:
+        """
+        Aggregate the evaluations of a solution with all the seeds: the
+        distribution of the score, the worst seed and the cpu time of each
+        stage. The failed evaluations count as zero.
+        """
+        infos = list(self.seeds_info[solution].values())
+        if not infos:
+            return None
+        scores = [
+            info.score if info.status == SolutionStatus.DONE else 0.0
+            for info in infos
+        ]
+        worst = min(range(len(infos)), key=lambda i: scores[i])
+        timings = dict()  # type: Dict[str, Dict[str, float]]
+        for stage in ["generation", "validation", "solution", "checking"]:
+            times = [
+                execution.result.resources.cpu_time
+                for execution in (getattr(info, stage) for info in infos)
+                if execution is not None and execution.result is not None
+            ]
+            if times:
+                timings[stage] = {
+                    "mean": statistics.mean(times),
+                    "max": max(times)
+                }
+        return {
+            "seeds": len(infos),
+            "done": sum(info.status == SolutionStatus.DONE for info in infos),
+            "failed":
+                sum(info.status == SolutionStatus.FAILED for info in infos),
+            "min": min(scores),
+            "median": statistics.median(scores),
+            "mean": statistics.mean(scores),
+            "max": max(scores),
+            "worst_seed": infos[worst].seed,
+            "worst_score": scores[worst],
+            "timings": timings
+        }
+
+    def _get_info(self, solution: str, seed: int) -> SolutionInfo:
+        seeds = self.seeds_info[solution]
+        if seed not in seeds:
+            if seeds:
+                info = SolutionInfo(self.solutions_info[solution].source_file)
+            else:
+                info = self.solutions_info[solution]
+            info.seed = seed
+            seeds[seed] = info
+        return seeds[seed]
+
+    def _compute_score(self, info: SolutionInfo, check_outcome: str):
         """
         Process the checker's outcome and compute the score of a solution
         """
-        info = self.solutions_info[solution]
         try:
             outcome = json.loads(check_outcome)
         except json.JSONDecodeError as ex:
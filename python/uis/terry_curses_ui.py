@@ -5,6 +5,7 @@ from task_maker.uis import CursesUI, get_max_sol_len
 from task_maker.uis.ioi_curses_ui import print_compilation_status
 from task_maker.uis.terry import TerryUIInterface, SolutionInfo, \
     SolutionStatus, TestcaseStatus
+from typing import List
 
 
 def print_terry_solution_info(printer: CursesPrinter, solution: str,
@@ -56,6 +57,30 @@ def print_terry_solution_info(printer: CursesPrinter, solution: str,
     printer.text("\n")
 
 
+def print_terry_seeds_info(printer: CursesPrinter, solution: str,
+                           infos: List[SolutionInfo], max_sol_len: int,
+                           loading: str, max_score: float):
+    """
+    Print the status of a solution evaluated with many seeds: how many
+    evaluations are completed and the range of the scores so far.
+    """
+    printer.text("{:>{len}} ".format(solution, len=max_sol_len))
+    done = [info for info in infos if info.status == SolutionStatus.DONE]
+    failed = [info for info in infos if info.status == SolutionStatus.FAILED]
+    if len(done) + len(failed) < len(infos):
+        printer.text("  {}  ".format(loading))
+    else:
+        printer.bold(" " * 5)
+    printer.text(" {}/{} seeds".format(len(done) + len(failed), len(infos)))
+    if failed:
+        printer.red(" {} failed".format(len(failed)), bold=True)
+    if done:
+        scores = [info.score * max_score for info in done]
+        printer.text(" score min {:.0f} mean {:.0f} max {:.0f}".format(
+            min(scores), sum(scores) / len(scores), max(scores)))
+    printer.text("\n")
+
+
 class TerryCursesUI(CursesUI):
     """
     UIInterface for Terry-like tasks
@@ -85,8 +110,15 @@ class TerryCursesUI(CursesUI):
         printer.text("\n")
 
         for solution, info in self.interface.solutions_info.items():
-            print_terry_solution_info(printer, solution, info, max_sol_len,
-                                      loading, self.interface.task.max_score)
+            seeds = self.interface.seeds_info[solution]
+            if len(seeds) > 1:
+                print_terry_seeds_info(printer, solution,
+                                       list(seeds.values()), max_sol_len,
+                                       loading, self.interface.task.max_score)
+            else:
+                print_terry_solution_info(printer, solution, info,
+                                          max_sol_len, loading,
+                                          self.interface.task.max_score)
 
         printer.text("\n")
 
@@ -2,7 +2,8 @@
 from task_maker.config import Config
 from task_maker.uis import FinishUI, get_max_sol_len
 from task_maker.uis.terry import TerryUIInterface, SolutionInfo
-from task_maker.uis.terry_curses_ui import print_terry_solution_info
+from task_maker.uis.terry_curses_ui import print_terry_solution_info, \
+    print_terry_seeds_info
 
 
 class TerryFinishUI(FinishUI):
@@ -45,6 +46,9 @@ class TerryFinishUI(FinishUI):
             self._print_summary_row(solution, max_sol_len)
 
     def _print_solution(self, solution: str):
+        if len(self.interface.seeds_info[solution]) > 1:
+            self._print_seeds(solution)
+            return
         info = self.interface.solutions_info[solution]  # type: SolutionInfo
         score = self.task.max_score * info.score
 
@@ -86,7 +90,40 @@ class TerryFinishUI(FinishUI):
         if info.checking.stderr_content:
             self.printer.text(info.checking.stderr_content)
 
+    def _print_seeds(self, solution: str):
+        stats = self.interface.seed_statistics(solution)
+        max_score = self.task.max_score
+        self.printer.bold(solution)
+        self.printer.text(" ")
+        self._print_score(stats["mean"] * max_score, max_score,
+                          [stats["min"]])
+        self.printer.text(" mean over {} seeds\n".format(stats["seeds"]))
+        self.printer.text("{:>10}: min {:.2f} median {:.2f} max {:.2f}\n".
+                          format("Score", stats["min"] * max_score,
+                                 stats["median"] * max_score,
+                                 stats["max"] * max_score))
+        self.printer.text("{:>10}: {} ({:.2f})\n".format(
+            "Worst seed", stats["worst_seed"],
+            stats["worst_score"] * max_score))
+        if stats["failed"]:
+            self.printer.text("{:>10}: ".format("Failed"))
+            self.printer.red("{} seeds\n".format(stats["failed"]), bold=False)
+        for stage, timing in stats["timings"].items():
+            self.printer.text("{:>10}: mean {:.3f}s max {:.3f}s\n".format(
+                stage.capitalize(), timing["mean"], timing["max"]))
+        for info in self.interface.seeds_info[solution].values():
+            if info.message:
+                self.printer.text("{:>10}: ".format(info.seed))
+                self.printer.red(info.message, bold=False)
+                self.printer.text("\n")
+
     def _print_summary_row(self, solution: str, max_sol_len: int):
+        seeds = self.interface.seeds_info[solution]
+        if len(seeds) > 1:
+            print_terry_seeds_info(self.printer, solution,
+                                   list(seeds.values()), max_sol_len, "?",
+                                   self.task.max_score)
+            return
         info = self.interface.solutions_info[solution]  # type: SolutionInfo
         print_terry_solution_info(self.printer, solution, info, max_sol_len,
                                   "?", self.task.max_score)
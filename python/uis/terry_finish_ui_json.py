@@ -48,7 +48,14 @@ class TerryFinishUIJSON(FinishUI):
         pass
 
     def _get_testing(self):
-        return {
-            name: get_solution(solution)
-            for name, solution in self.interface.solutions_info.items()
-        }
+        testing = dict()
+        for name, solution in self.interface.solutions_info.items():
+            testing[name] = get_solution(solution)
+            seeds = self.interface.seeds_info[name]
+            if len(seeds) > 1:
+                testing[name]["seeds"] = [
+                    get_solution(info) for info in seeds.values()
+                ]
+                testing[name]["statistics"] = \
+                    self.interface.seed_statistics(name)
+        return testing
@@ -43,6 +43,17 @@ class UIPrinter:
             }
         )
 
+    def provisional_score(self, solution: str, score: float):
+        self.print(
+            f"Solution {solution} provisionally scored {score:.2f}",
+            "provisional-score",
+            "SUCCESS",
+            {
+                "name": solution,
+                "score": score,
+            }
+        )
+
     def terry_solution_outcome(self, solution: str, info: "SolutionInfo"):
         self.print(
             f"Outcome of solution {solution}: score={info.score} message={info.message}",
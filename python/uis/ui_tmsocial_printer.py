@@ -55,6 +55,9 @@ class UITMSocialPrinter:
         self.value_event(key=f"subtask.{subtask}.status", value=dict(type="status", status=self.get_subtask_result(result)))
         self.value_event(key=f"subtask.{subtask}.score", value=dict(type="score", score=score))
 
+    def provisional_score(self, solution: str, score: float):
+        self.value_event(key="provisional_score", value=dict(type="score", score=score))
+
     def warning(self, message: str):
         self.print(message, "warning", "WARNING", {"message": message})
 
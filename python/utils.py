@@ -56,9 +56,9 @@ def get_execution(ex: "Execution"):
     if ex is None:
         return None
     res = {}
-    if ex.store_stdout:
+    if ex.store_stdout or ex.stdout_capture:
         res["stdout"] = ex.stdout_content
-    if ex.store_stderr:
+    if ex.store_stderr or ex.stderr_capture:
         res["stderr"] = ex.stderr_content
     res["result"] = result_to_dict(ex.result)
     return res
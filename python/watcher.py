@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+# directories of the task whose changes trigger a new evaluation
+WATCHED_DIRS = [
+    "sol", "solutions", "gen", "cor", "check", "statement", "testo", "att",
+    "managers"
+]
+# time to wait for the burst of events of a save to finish, in seconds
+DEBOUNCE_TIME = 0.2
+# polling interval when inotify is not available, in seconds
+POLL_INTERVAL = 0.5
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | \
+                IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def _is_ignored(name: str) -> bool:
+    """
+    Temporary files of the editors and hidden files are not considered
+    """
+    return name.startswith(".") or name.endswith("~") or name.endswith(".swp")
+
+
+class TaskWatcher:
+    """
+    Watch the source directories of a task for changes, using inotify if
+    available or falling back to polling the modification times. The changes
+    are recorded from start() on, also while the task is being evaluated.
+    """
+
+    def __init__(self, task_dir: str):
+        self.task_dir = task_dir
+        # absolute paths written by task-maker itself, their changes are not
+        # reported
+        self.ignored = set()  # type: Set[str]
+        self._libc = None
+        self._fd = None  # type: Optional[int]
+        self._watches = dict()  # type: Dict[int, str]
+        self._before = dict()  # type: Dict[str, Tuple[int, int]]
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.inotify_init1
+            self._libc = libc
+        except (OSError, AttributeError):
+            pass
+
+    def start(self):
+        """
+        Start recording the changes, must be called before wait_for_changes.
+        """
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(os.O_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+                for path in self._watched_dirs():
+                    self._add_watch(path)
+                return
+        self._before = self._snapshot()
+
+    def close(self):
+        """
+        Stop recording the changes.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._watches.clear()
+
+    def wait_for_changes(self) -> List[str]:
+        """
+        Block until something changes in the task, returns the list of the
+        changed paths, relative to the task directory. The changes happened
+        since the previous call are returned immediately.
+        """
+        while True:
+            if self._fd is not None:
+                changed = self._wait_inotify()
+            else:
+                changed = self._wait_poll()
+            changed = changed - self.ignored
+            if changed:
+                return sorted(
+                    os.path.relpath(path, self.task_dir) for path in changed)
+
+    def _watched_dirs(self) -> List[str]:
+        dirs = [self.task_dir]
+        for name in WATCHED_DIRS:
+            root = os.path.join(self.task_dir, name)
+            for path, subdirs, _ in os.walk(root):
+                subdirs[:] = [d for d in subdirs if not _is_ignored(d)]
+                dirs.append(path)
+        return dirs
+
+    def _add_watch(self, path: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path),
+                                          IN_WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = path
+
+    def _wait_inotify(self) -> Set[str]:
+        changed = set()  # type: Set[str]
+        timeout = None
+        while True:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if not ready:
+                # nothing happened during the debounce time
+                return changed
+            data = os.read(self._fd, 65536)
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if wd not in self._watches or _is_ignored(name):
+                    continue
+                path = os.path.join(self._watches[wd], name)
+                # only the source directories are watched recursively
+                if self._watches[wd] == self.task_dir and mask & IN_ISDIR:
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_watch(path)
+                changed.add(path)
+            if changed:
+                timeout = DEBOUNCE_TIME
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = dict()  # type: Dict[str, Tuple[int, int]]
+        for directory in self._watched_dirs():
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if _is_ignored(entry.name) or not entry.is_file():
+                    continue
+                st = entry.stat()
+                snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def _wait_poll(self) -> Set[str]:
+        while True:
+            after = self._snapshot()
+            changed = set(path for path in self._before.keys() | after.keys()
+                          if self._before.get(path) != after.get(path))
+            self._before = after
+            if changed:
+                return changed
+            time.sleep(POLL_INTERVAL)